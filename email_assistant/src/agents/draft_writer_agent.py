@@ -1,12 +1,18 @@
 """Draft Writer Agent - generates subject and body with tone-aware templates."""
 
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field
 
-from email_assistant.src.integrations.llm_factory import get_llm
-from email_assistant.src.memory.profile_store import load_profile
-from email_assistant.src.models.schemas import DraftResult, IntentType, ToneType
+from email_assistant.src.integrations.llm_factory import get_llm, invoke_structured
+from email_assistant.src.memory.profile_store import profile_from_state, recent_turns, search_history
+from email_assistant.src.models.schemas import DraftResult, IntentType, ToneType, UserProfile
+from email_assistant.src.nlp.substitution import REWRITE_SEPARATOR
+from email_assistant.src.nlp.text import estimate_tokens
+from email_assistant.src.prompts.registry import get_template
+
+_HISTORY_TOP_K = 3
+_HISTORY_TOKEN_BUDGET = 300
 
 
 class _DraftOutput(BaseModel):
@@ -19,27 +25,46 @@ class _DraftOutput(BaseModel):
 class DraftWriterAgent:
     """Generates an email draft using LLM with tone and conversation context."""
 
-    def _build_conversation_context(self, user_id: str) -> str:
-        profile = load_profile(user_id)
-        if not profile or not profile.conversation_history:
+    def _build_conversation_context(self, profile: Optional[UserProfile], query: str) -> str:
+        if not profile:
+            return ""
+        turns = search_history(profile.id, query, k=_HISTORY_TOP_K)
+        if turns is None:
+            turns = recent_turns(profile.id, _HISTORY_TOP_K, profile)
+        formatted: list[str] = []
+        budget = _HISTORY_TOKEN_BUDGET
+        for turn in turns:
+            line = f"- Prompt: {turn.prompt[:120]}... | Subject: {turn.subject[:80]}... | Intent: {turn.intent} | Tone: {turn.tone}"
+            budget -= estimate_tokens(line)
+            if budget < 0:
+                break
+            formatted.append(line)
+        if not formatted:
             return ""
-        recent = profile.conversation_history[-3:]
-        formatted = [
-            f"- Prompt: {turn.prompt[:120]}... | Subject: {turn.subject[:80]}... | Intent: {turn.intent} | Tone: {turn.tone}"
-            for turn in recent
-        ]
         return (
-            "Here are some of this user's recent email interactions. "
+            "Here are some of this user's past email interactions relevant to this request. "
             "Keep tone and style consistent where appropriate:\n"
             + "\n".join(formatted)
             + "\n\n"
         )
 
+    @staticmethod
+    def _phrase_hints(profile: UserProfile) -> str:
+        prefs = profile.style_preferences
+        if not prefs:
+            return ""
+        hints = ""
+        if prefs.preferred_phrases:
+            hints += "\nWhere natural, use the sender's preferred phrases: " + "; ".join(prefs.preferred_phrases) + "."
+        avoid = [rule.partition(REWRITE_SEPARATOR)[0].strip() for rule in prefs.avoid_phrases]
+        if avoid:
+            hints += "\nNever use these phrases: " + "; ".join(avoid) + "."
+        return hints
+
     def run(self, state: dict[str, Any]) -> dict[str, Any]:
         parsed = state.get("parsed_input")
         intent = state.get("intent", IntentType.OTHER)
         tone_context = state.get("tone_context", "")
-        user_id = state.get("user_id", "default")
 
         if not parsed:
             return {
@@ -51,15 +76,15 @@ class DraftWriterAgent:
                 ),
             }
 
-        llm = get_llm(temperature=0.7).with_structured_output(_DraftOutput)
+        llm = get_llm(temperature=0.7, node="draft_writer")
         recipient = f" Recipient: {parsed.recipient}" if parsed.recipient else ""
         length_hint = ""
         if parsed.constraints.max_length:
             length_hint = f" Keep the email under {parsed.constraints.max_length} words."
 
-        conversation_snippets = self._build_conversation_context(user_id)
+        profile = profile_from_state(state)
+        conversation_snippets = self._build_conversation_context(profile, parsed.prompt)
 
-        profile = load_profile(user_id)
         sender_info = ""
         if profile:
             name = profile.style_preferences.signature if profile.style_preferences and profile.style_preferences.signature else profile.name
@@ -67,19 +92,20 @@ class DraftWriterAgent:
                 sender_info = f"\nThe sender's name is: {name}. Use this name in the signoff -- do NOT use placeholders like [Your Name]."
             if profile.company:
                 sender_info += f"\nThe sender's company is: {profile.company}. Use this instead of any [Company] placeholder."
-
-        prompt = f"""Write a complete email based on this request.
-
-{parsed.prompt}{recipient}
-
-{tone_context}{length_hint}
-{sender_info}
-
-{conversation_snippets}Output a subject line and full body. Use proper email format (greeting, body, closing).
-Do NOT include any placeholder text like [Your Name], [Name], [Sender Name], [Company], etc."""
+            sender_info += self._phrase_hints(profile)
 
         try:
-            out = llm.invoke(prompt)
+            out = invoke_structured(
+                llm,
+                _DraftOutput,
+                get_template("draft_writer"),
+                tone_context=tone_context,
+                prompt=parsed.prompt,
+                recipient=recipient,
+                length_hint=length_hint,
+                sender_info=sender_info,
+                conversation_snippets=conversation_snippets,
+            )
             draft = DraftResult(
                 subject=out.subject,
                 body=out.body,
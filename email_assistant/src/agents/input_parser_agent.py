@@ -1,11 +1,15 @@
 """Input Parsing Agent - validates prompt, extracts intent, recipient, tone, constraints."""
 
+import re
 from typing import Any
 
 from pydantic import BaseModel, Field
 
-from email_assistant.src.integrations.llm_factory import get_llm
+from email_assistant.src.integrations.llm_factory import get_llm, invoke_structured
+from email_assistant.src.memory.profile_store import profile_from_state
+from email_assistant.src.memory.style_stats import match_recipient, predict_tone
 from email_assistant.src.models.schemas import Constraints, ParsedInput, ToneType
+from email_assistant.src.prompts.registry import get_template
 
 
 _TONE_MAP = {
@@ -16,6 +20,18 @@ _TONE_MAP = {
     "professional": ToneType.PROFESSIONAL,
 }
 
+# user_tone values meaning "no explicit choice, infer it"
+_AUTO_TONES = {"", "auto"}
+# The tone the CLI, batch runner and server default to; it is not evidence of a user's choice
+_DEFAULT_TONE = "professional"
+
+# Cues that the prompt carries constraints or a tone override only the LLM can extract
+_LLM_CUES = re.compile(
+    r"\d|\b(?:words?|short|brief|concise|length|language|tone|formal|casual|assertive|friendly|professional)\b"
+    r"|\bin (?:french|spanish|german|italian|portuguese|dutch|japanese|chinese|hindi)\b",
+    re.IGNORECASE,
+)
+
 
 class _ParsedOutput(BaseModel):
     """LLM structured output schema."""
@@ -28,7 +44,14 @@ class _ParsedOutput(BaseModel):
 
 
 class InputParserAgent:
-    """Validates user prompt and extracts structured fields."""
+    """Validates user prompt and extracts structured fields.
+
+    Tone and recipient are filled locally from the user's style statistics
+    when the request does not state them. The LLM extraction is skipped only
+    when the tone was predicted confidently or chosen explicitly (the default
+    ``professional`` does not count), a recipient is known, and the prompt has
+    no length, language or tone cues.
+    """
 
     def run(self, state: dict[str, Any]) -> dict[str, Any]:
         raw_prompt = state.get("raw_prompt", "")
@@ -41,20 +64,35 @@ class InputParserAgent:
                 "errors": (state.get("errors") or []) + ["Prompt cannot be empty"],
             }
 
-        llm = get_llm(temperature=0.1).with_structured_output(_ParsedOutput)
-        prompt = f"""Parse and normalize this email request. Extract recipient (if mentioned), tone, and any constraints (length, language).
-
-User's stated tone preference: {user_tone}
-User's stated recipient (if any): {user_recipient or "not provided"}
-
-Raw prompt:
-{raw_prompt}
-
-Return structured data. For tone, use one of: formal, casual, assertive, friendly, professional.
-Use the user's stated tone if they provided one and the prompt doesn't override it."""
+        profile = profile_from_state(state)
+        stats = profile.style_stats if profile else None
+        tone_known = str(user_tone or "").lower() in _TONE_MAP.keys() - {_DEFAULT_TONE}
+        if str(user_tone or "").lower() in _AUTO_TONES:
+            predicted = predict_tone(stats) if stats else None
+            user_tone = predicted.value if predicted else None
+            tone_known = predicted is not None
+        if not user_recipient and stats:
+            user_recipient = match_recipient(stats, raw_prompt)
+
+        if tone_known and user_recipient and not _LLM_CUES.search(raw_prompt):
+            parsed = ParsedInput(
+                prompt=raw_prompt.strip(),
+                recipient=user_recipient,
+                tone=_TONE_MAP.get(str(user_tone).lower(), ToneType.PROFESSIONAL),
+                constraints=Constraints(),
+            )
+            return {"parsed_input": parsed, "errors": []}
 
+        llm = get_llm(temperature=0.1, node="input_parser")
         try:
-            out = llm.invoke(prompt)
+            out = invoke_structured(
+                llm,
+                _ParsedOutput,
+                get_template("input_parser"),
+                user_tone=user_tone or "not provided",
+                user_recipient=user_recipient or "not provided",
+                raw_prompt=raw_prompt,
+            )
             tone = _TONE_MAP.get(out.tone.lower(), ToneType.PROFESSIONAL)
             parsed = ParsedInput(
                 prompt=out.prompt,
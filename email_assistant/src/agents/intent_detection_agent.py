@@ -4,8 +4,12 @@ from typing import Any
 
 from pydantic import BaseModel, Field
 
-from email_assistant.src.integrations.llm_factory import get_llm
+from email_assistant.src.integrations.config_loader import load_mcp_config
+from email_assistant.src.integrations.llm_factory import get_llm, invoke_structured
 from email_assistant.src.models.schemas import IntentType
+from email_assistant.src.nlp.intent_classifier import get_intent_classifier
+from email_assistant.src.observability.metrics import get_metrics
+from email_assistant.src.prompts.registry import get_template
 
 
 _INTENTS = [e.value for e in IntentType]
@@ -18,7 +22,13 @@ class _IntentOutput(BaseModel):
 
 
 class IntentDetectionAgent:
-    """Classifies the email request into an IntentType."""
+    """Classifies the email request into an IntentType.
+
+    A local classifier answers when its confidence reaches
+    ``intent_local_threshold`` (mcp.yaml); otherwise the LLM decides. Counters
+    ``intent.local``, ``intent.llm`` and ``intent.disagreement`` (LLM answer
+    differs from the local guess) are recorded to tune the threshold.
+    """
 
     def run(self, state: dict[str, Any]) -> dict[str, Any]:
         parsed = state.get("parsed_input")
@@ -30,16 +40,20 @@ class IntentDetectionAgent:
         if not parsed:
             return {"intent": IntentType.OTHER}
 
-        llm = get_llm(temperature=0).with_structured_output(_IntentOutput)
-        prompt = f"""Classify the intent of this email request into exactly one of: {", ".join(_INTENTS)}.
-
-Request: {parsed.prompt}
-
-Respond with the intent value only."""
+        metrics = get_metrics()
+        local_intent, confidence = get_intent_classifier().predict(parsed.prompt)
+        if confidence >= float(load_mcp_config()["intent_local_threshold"]):
+            metrics.increment("intent.local")
+            return {"intent": IntentType(local_intent)}
 
+        metrics.increment("intent.llm")
+        llm = get_llm(temperature=0, node="intent_detection")
         try:
-            out = llm.invoke(prompt)
+            out = invoke_structured(llm, _IntentOutput, get_template("intent_detection"), prompt=parsed.prompt)
             intent_val = out.intent.lower().replace("-", "_").replace(" ", "_")
-            return {"intent": IntentType(intent_val) if intent_val in _INTENTS else IntentType.OTHER}
         except Exception:
-            return {"intent": IntentType.OTHER}
+            return {"intent": IntentType(local_intent)}
+        intent = IntentType(intent_val) if intent_val in _INTENTS else IntentType.OTHER
+        if intent.value != local_intent:
+            metrics.increment("intent.disagreement")
+        return {"intent": intent}
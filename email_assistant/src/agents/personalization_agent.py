@@ -2,42 +2,32 @@
 
 from typing import Any
 
-from email_assistant.src.memory.profile_store import load_profile
+from email_assistant.src.memory.profile_store import profile_from_state
 from email_assistant.src.models.schemas import DraftResult
+from email_assistant.src.nlp.substitution import get_engine, signature_for
 
 
 class PersonalizationAgent:
-    """Applies user profile data (name, company, signature) to the draft."""
+    """Applies user profile data (name, company, signature) and phrase rules to the draft.
+
+    Placeholders and avoided phrases are handled in one pass by the profile's
+    compiled SubstitutionEngine. Avoided phrases without a rewrite are returned
+    as ``style_flags`` for the reviewer.
+    """
 
     def run(self, state: dict[str, Any]) -> dict[str, Any]:
         draft = state.get("draft")
-        user_id = state.get("user_id", "default")
 
         if not draft or not isinstance(draft, DraftResult):
-            return {"personalized_draft": draft}
-
-        profile = load_profile(user_id)
-        if not profile or (not profile.name and not profile.company and not profile.style_preferences):
-            return {"personalized_draft": draft}
-
-        body = draft.body
-        signature = (
-            profile.style_preferences.signature
-            if profile.style_preferences and profile.style_preferences.signature
-            else profile.name
-        )
+            return {"personalized_draft": draft, "style_flags": []}
 
-        if profile.company and "[Company]" in body:
-            body = body.replace("[Company]", profile.company)
+        profile = profile_from_state(state)
+        if not profile:
+            return {"personalized_draft": draft, "style_flags": []}
 
-        # Strip common LLM placeholder tokens
-        _PLACEHOLDERS = [
-            "[Your Name]", "[Name]", "[Sender Name]", "[Sender]",
-            "[Your Full Name]", "[Full Name]", "[Insert Name]",
-        ]
-        for ph in _PLACEHOLDERS:
-            if ph in body:
-                body = body.replace(ph, signature or "")
+        signature = signature_for(profile)
+        result = get_engine(profile).apply(draft.body)
+        body = result.body
 
         if signature:
             stripped = body.rstrip()
@@ -52,4 +42,4 @@ class PersonalizationAgent:
             intent=draft.intent,
             tone=draft.tone,
         )
-        return {"personalized_draft": personalized}
+        return {"personalized_draft": personalized, "style_flags": result.flags}
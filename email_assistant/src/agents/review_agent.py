@@ -1,23 +1,86 @@
 """Review & Validator Agent - checks grammar, tone alignment, coherence."""
 
+import hashlib
+import re
 from typing import Any
 
 from pydantic import BaseModel, Field
 
-from email_assistant.src.integrations.llm_factory import get_llm
+from email_assistant.src.integrations.llm_factory import get_llm, invoke_structured
 from email_assistant.src.models.schemas import DraftResult, ReviewResult
+from email_assistant.src.nlp.tone_classifier import get_tone_classifier
+from email_assistant.src.observability.metrics import get_metrics
+from email_assistant.src.observability.usage import economy_mode, economy_settings
+from email_assistant.src.prompts.registry import get_template
+
+# Local tone check: above this probability for the requested tone the LLM is
+# told tone is verified; a draft is failed without an LLM call only when the
+# classifier is confident about a different tone and near-certain it is not
+# the requested one.
+_TONE_VERIFIED = 0.8
+_TONE_MISMATCH = 0.9
+_TONE_REQUESTED_FLOOR = 0.05
+# Characters of each unchanged paragraph kept in the summary sent on retries
+_SUMMARY_CHARS = 60
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+class _SectionFinding(BaseModel):
+    """Review of one numbered section (subject or paragraph)."""
+
+    index: int = Field(..., description="Section number as shown in the draft")
+    ok: bool = Field(True, description="False if the section has a clear problem")
+    issues: list[str] = Field(default_factory=list, description="Detected issues")
+    suggestions: list[str] = Field(default_factory=list, description="Suggested edits")
 
 
 class _ReviewOutput(BaseModel):
     """LLM structured output for review."""
 
     passed: bool = Field(..., description="Whether the draft passes validation")
-    suggestions: list[str] = Field(default_factory=list, description="Suggested edits")
-    issues: list[str] = Field(default_factory=list, description="Detected issues")
+    suggestions: list[str] = Field(default_factory=list, description="Suggested edits for the whole email")
+    issues: list[str] = Field(default_factory=list, description="Issues spanning the whole email")
+    findings: list[_SectionFinding] = Field(default_factory=list, description="Per-section findings")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _sections(draft: DraftResult) -> list[str]:
+    """Subject followed by the non-empty body paragraphs, whitespace-normalized."""
+    paragraphs = [_normalize(p) for p in _PARAGRAPH_BREAK.split(draft.body)]
+    return [_normalize(draft.subject)] + [p for p in paragraphs if p]
+
+
+def _section_key(tone: str, index: int, text: str) -> str:
+    # The subject is keyed separately so an identical paragraph cannot reuse its review
+    kind = "subject" if index == 0 else "paragraph"
+    return hashlib.sha1(f"{tone}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _email_key(tone: str, section_keys: list[str]) -> str:
+    # The email-wide verdict holds for this exact sequence of sections only
+    return hashlib.sha1("\0".join([tone, "email", *section_keys]).encode("utf-8")).hexdigest()
 
 
 class ReviewAgent:
-    """Reviews draft for grammar, tone alignment, and coherence."""
+    """Reviews draft for grammar, tone alignment, and coherence.
+
+    Findings are cached in ``state["review_cache"]`` per normalized section
+    (subject or paragraph) hash, and the email-wide verdict per sequence of
+    section hashes. On a retry only new or changed sections go to the LLM,
+    with a short summary of the unchanged ones for context; if nothing
+    changed, the cached findings and verdict are reused without an LLM call.
+    Sections that were all reviewed before but never in this combination
+    (e.g. one was removed) are sent again so the email-wide checks rerun. When the
+    user's budget is nearly spent the LLM pass is skipped and only the local
+    checks apply.
+    """
+
+    def __init__(self) -> None:
+        self._tone_classifier = get_tone_classifier()
 
     def run(self, state: dict[str, Any]) -> dict[str, Any]:
         draft = state.get("personalized_draft") or state.get("draft")
@@ -29,28 +92,91 @@ class ReviewAgent:
         if not isinstance(draft, DraftResult):
             return {"review_result": ReviewResult(passed=True)}
 
-        llm = get_llm(temperature=0).with_structured_output(_ReviewOutput)
-        prompt = f"""Review this email draft for:
-1. Grammar and spelling
-2. Tone alignment (expected: {tone_context[:200] if tone_context else "professional"})
-3. Contextual coherence and clarity
-
-Subject: {draft.subject}
-
-Body:
-{draft.body}
-
-Return: passed (bool), suggestions (list of strings), issues (list of strings).
-Be lenient - only fail for clear grammar errors or major tone mismatch."""
-
-        try:
-            out = llm.invoke(prompt)
+        style_flags = state.get("style_flags") or []
+        if style_flags:
+            get_metrics().increment("review.style_flagged")
+            phrases = list(dict.fromkeys(style_flags))
             return {
                 "review_result": ReviewResult(
-                    passed=out.passed,
-                    suggestions=out.suggestions or [],
-                    issues=out.issues or [],
+                    passed=False,
+                    issues=[f"Uses avoided phrase: {p!r}" for p in phrases],
+                    suggestions=[f"Rephrase without {p!r}" for p in phrases],
                 ),
             }
-        except Exception:
+
+        expected_tone = tone_context[:200] if tone_context else "professional"
+        parsed = state.get("parsed_input")
+        if parsed is not None:
+            requested = parsed.tone.value
+            probs = self._tone_classifier.predict_proba(draft.body)
+            detected = max(probs, key=probs.__getitem__)
+            if probs[requested] >= _TONE_VERIFIED:
+                get_metrics().increment("review.tone_local_verified")
+                expected_tone = f"{requested} (already verified; do not fail for tone)"
+            elif probs[detected] >= _TONE_MISMATCH and probs[requested] < _TONE_REQUESTED_FLOOR:
+                get_metrics().increment("review.tone_local_mismatch")
+                return {
+                    "review_result": ReviewResult(
+                        passed=False,
+                        issues=[f"Tone reads as {detected}, expected {requested}"],
+                        suggestions=[f"Rewrite the draft in a {requested} tone"],
+                    ),
+                }
+            else:
+                get_metrics().increment("review.tone_llm_judged")
+
+        if economy_mode() and economy_settings()["skip_review_when_near"]:
+            get_metrics().increment("review.skipped_economy")
             return {"review_result": ReviewResult(passed=True)}
+
+        tone_key = parsed.tone.value if parsed is not None else expected_tone
+        cache: dict[str, dict] = dict(state.get("review_cache") or {})
+        sections = _sections(draft)
+        keys = [_section_key(tone_key, i, text) for i, text in enumerate(sections)]
+        email_key = _email_key(tone_key, keys)
+        pending = [i for i, key in enumerate(keys) if key not in cache]
+        if not pending and email_key not in cache:
+            pending = list(range(len(sections)))
+        get_metrics().increment("review.sections_cached", len(sections) - len(pending))
+        get_metrics().increment("review.sections_sent", len(pending))
+
+        if pending:
+            shown = "\n\n".join(f"[{i}] {'Subject: ' if i == 0 else ''}{sections[i]}" for i in pending)
+            reused = [i for i in range(len(sections)) if i not in pending]
+            unchanged = ""
+            if reused:
+                unchanged = "\n\nAlready reviewed (summary only):\n" + "\n".join(
+                    f"[{i}] {sections[i][:_SUMMARY_CHARS]}{'...' if len(sections[i]) > _SUMMARY_CHARS else ''}"
+                    for i in reused
+                )
+            llm = get_llm(temperature=0, node="review")
+            try:
+                out = invoke_structured(
+                    llm,
+                    _ReviewOutput,
+                    get_template("review"),
+                    expected_tone=expected_tone,
+                    sections=shown,
+                    unchanged=unchanged,
+                )
+            except Exception:
+                return {"review_result": ReviewResult(passed=True), "review_cache": cache}
+            findings = {f.index: f for f in out.findings}
+            for i in pending:
+                finding = findings.get(i)
+                cache[keys[i]] = (
+                    finding.model_dump(include={"ok", "issues", "suggestions"})
+                    if finding
+                    else {"ok": True, "issues": [], "suggestions": []}
+                )
+            cache[email_key] = {"ok": out.passed, "issues": out.issues or [], "suggestions": out.suggestions or []}
+
+        reviewed = [cache[email_key]] + [cache[key] for key in keys]
+        return {
+            "review_result": ReviewResult(
+                passed=all(r["ok"] for r in reviewed),
+                issues=[issue for r in reviewed for issue in r["issues"]],
+                suggestions=[s for r in reviewed for s in r["suggestions"]],
+            ),
+            "review_cache": cache,
+        }
@@ -3,12 +3,17 @@
 from typing import Any
 
 from email_assistant.src.integrations.config_loader import load_mcp_config
-from email_assistant.src.memory.profile_store import append_conversation, append_draft
+from email_assistant.src.memory.profile_store import record_turn
 from email_assistant.src.models.schemas import DraftResult, ReviewResult
 
 
 class RouterAgent:
-    """Logs drafts to memory, decides whether to retry or finish."""
+    """Decides whether to retry or finish, and commits the final draft to memory.
+
+    Drafts that are about to be retried are not logged; the finished request is
+    committed once, as a single turn-log append. Runs started with
+    ``remember=False`` (campaign templates) are never committed.
+    """
 
     def run(self, state: dict[str, Any]) -> dict[str, Any]:
         config = load_mcp_config()
@@ -17,33 +22,25 @@ class RouterAgent:
         review = state.get("review_result")
         draft = state.get("personalized_draft") or state.get("draft")
         user_id = state.get("user_id", "default")
+        parsed = state.get("parsed_input")
 
-        if draft and isinstance(draft, DraftResult):
-            intent_val = draft.intent.value if draft.intent else "other"
-            tone_val = draft.tone.value if draft.tone else "professional"
-
-            append_draft(
-                user_id=user_id,
-                subject=draft.subject,
-                intent=intent_val,
-                tone=tone_val,
-            )
+        should_retry = False
+        if isinstance(review, ReviewResult) and not review.passed:
+            if retry_count < max_retries:
+                should_retry = True
 
-            raw_prompt = state.get("raw_prompt") or ""
-            append_conversation(
+        if not should_retry and state.get("remember", True) and isinstance(draft, DraftResult):
+            record_turn(
                 user_id=user_id,
-                prompt=str(raw_prompt),
+                prompt=str(state.get("raw_prompt") or ""),
                 subject=draft.subject,
                 body=draft.body,
-                intent=intent_val,
-                tone=tone_val,
+                intent=draft.intent.value if draft.intent else "other",
+                tone=draft.tone.value if draft.tone else "professional",
+                recipient=parsed.recipient if parsed else None,
+                retries=retry_count,
             )
 
-        should_retry = False
-        if isinstance(review, ReviewResult) and not review.passed:
-            if retry_count < max_retries:
-                should_retry = True
-
         updates: dict[str, Any] = {"retry_count": retry_count + (1 if should_retry else 0)}
         if should_retry:
             updates["retry_reason"] = "; ".join((review.issues or [])[:3])
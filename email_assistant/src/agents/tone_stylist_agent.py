@@ -1,9 +1,9 @@
 """Tone Stylist Agent - adjusts tone using tokenized prompts and samples."""
 
-from pathlib import Path
 from typing import Any
 
 from email_assistant.src.models.schemas import IntentType, ToneType
+from email_assistant.src.nlp.tone_library import get_tone_library
 
 
 _TONE_PROMPTS = {
@@ -15,15 +15,15 @@ _TONE_PROMPTS = {
 }
 
 
+_EXAMPLES_PER_REQUEST = 2
+
+
 class ToneStylistAgent:
-    """Builds tone context from prompts and sample files for downstream agents."""
+    """Builds tone context from prompts and the tone x intent example library."""
 
-    def _load_tone_sample(self, tone: ToneType) -> str:
-        base = Path(__file__).resolve().parent.parent.parent.parent
-        sample_path = base / "email_assistant" / "data" / "tone_samples" / f"{tone.value}.txt"
-        if sample_path.exists():
-            return sample_path.read_text(encoding="utf-8").strip()
-        return ""
+    def __init__(self) -> None:
+        # Loaded and vectorized once; requests never touch the sample files
+        self._library = get_tone_library()
 
     def run(self, state: dict[str, Any]) -> dict[str, Any]:
         parsed = state.get("parsed_input")
@@ -33,8 +33,8 @@ class ToneStylistAgent:
 
         tone = parsed.tone
         base_prompt = _TONE_PROMPTS.get(tone, _TONE_PROMPTS[ToneType.PROFESSIONAL])
-        sample = self._load_tone_sample(tone)
-        if sample:
-            base_prompt += f"\n\nExample of this tone:\n{sample[:500]}"
+        examples = self._library.select(tone, intent, parsed.prompt, k=_EXAMPLES_PER_REQUEST)
+        if examples:
+            base_prompt += "\n\nExamples of this tone:\n" + "\n---\n".join(examples)
         context = f"Tone: {base_prompt}\nIntent: {intent.value}"
         return {"tone_context": context}
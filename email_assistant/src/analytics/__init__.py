@@ -0,0 +1 @@
+# Columnar export and vectorized queries over draft history
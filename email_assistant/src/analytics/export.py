@@ -0,0 +1,135 @@
+"""Stream the profile store's draft history into a columnar layout.
+
+Output directory layout::
+
+    manifest.json     row count, column dtypes, dictionaries
+    user.bin          int32 codes into dictionaries["user"]
+    intent.bin        int16 codes into dictionaries["intent"]
+    tone.bin          int16 codes into dictionaries["tone"]
+    body_words.bin    int32
+    subject_chars.bin int32
+    retries.bin       int16
+
+Columns are raw little-endian arrays appended in fixed-size batches, so
+memory stays flat however many turns are exported; readers memory-map them
+(see query.py). ``write_arrow`` converts an export to an Arrow/Feather file
+with dictionary-encoded columns when pyarrow is installed.
+
+Usage::
+
+    python -m email_assistant.src.analytics.export OUT_DIR [--arrow]
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from email_assistant.src.memory.profile_store import iter_turn_records
+
+COLUMNS: dict[str, str] = {
+    "user": "<i4",
+    "intent": "<i2",
+    "tone": "<i2",
+    "body_words": "<i4",
+    "subject_chars": "<i4",
+    "retries": "<i2",
+}
+DICTIONARY_COLUMNS = ("user", "intent", "tone")
+_BATCH_ROWS = 65536
+
+
+class _Dictionary:
+    """Assigns dense integer codes to string values in first-seen order."""
+
+    def __init__(self) -> None:
+        self.codes: dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+        return code
+
+    def values(self) -> list[str]:
+        return list(self.codes)
+
+
+def export_records(records: Iterable[tuple[str, dict]], out_dir: Path) -> int:
+    """Write (user_id, turn dict) records as columns under out_dir. Returns the row count."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    dictionaries = {name: _Dictionary() for name in DICTIONARY_COLUMNS}
+    files = {name: open(out_dir / f"{name}.bin", "wb") for name in COLUMNS}
+    batch: dict[str, list[int]] = {name: [] for name in COLUMNS}
+    rows = 0
+
+    def _flush() -> None:
+        for name, values in batch.items():
+            np.asarray(values, dtype=COLUMNS[name]).tofile(files[name])
+            values.clear()
+
+    try:
+        for user_id, record in records:
+            batch["user"].append(dictionaries["user"].encode(user_id))
+            batch["intent"].append(dictionaries["intent"].encode(record.get("intent") or "other"))
+            batch["tone"].append(dictionaries["tone"].encode(record.get("tone") or "professional"))
+            batch["body_words"].append(len((record.get("body") or "").split()))
+            batch["subject_chars"].append(len(record.get("subject") or ""))
+            batch["retries"].append(int(record.get("retries") or 0))
+            rows += 1
+            if len(batch["user"]) >= _BATCH_ROWS:
+                _flush()
+        _flush()
+    finally:
+        for f in files.values():
+            f.close()
+
+    manifest = {
+        "rows": rows,
+        "columns": COLUMNS,
+        "dictionaries": {name: d.values() for name, d in dictionaries.items()},
+    }
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return rows
+
+
+def export_store(out_dir: Path) -> int:
+    """Export every user's recorded turns from the profile store."""
+    return export_records(iter_turn_records(), out_dir)
+
+
+def write_arrow(export_dir: Path, path: Optional[Path] = None) -> Path:
+    """Convert an export to a Feather (Arrow IPC) file with dictionary-encoded columns."""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    from email_assistant.src.analytics.query import load_table
+
+    table = load_table(export_dir)
+    arrays = {}
+    for name in COLUMNS:
+        column = np.asarray(table.columns[name])
+        if name in DICTIONARY_COLUMNS:
+            arrays[name] = pa.DictionaryArray.from_arrays(column, pa.array(table.dictionaries[name]))
+        else:
+            arrays[name] = pa.array(column)
+    path = path or export_dir / "turns.feather"
+    feather.write_feather(pa.table(arrays), path)
+    return path
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export draft history to columnar files.")
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--arrow", action="store_true", help="Also write turns.feather (requires pyarrow)")
+    args = parser.parse_args(argv)
+    rows = export_store(args.out_dir)
+    print(f"Exported {rows} turns to {args.out_dir}")
+    if args.arrow:
+        print(f"Wrote {write_arrow(args.out_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Vectorized group-by queries over a columnar export (see export.py).
+
+Columns are memory-mapped, and aggregates are computed with ``np.bincount``
+over combined dictionary codes, so millions of turns aggregate in well under
+a second without materializing profiles.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+from email_assistant.src.analytics.export import DICTIONARY_COLUMNS
+
+GroupKey = Union[str, tuple[str, ...]]
+
+
+@dataclass
+class TurnTable:
+    """Memory-mapped columns plus the dictionaries for the encoded ones."""
+
+    rows: int
+    columns: dict[str, np.ndarray]
+    dictionaries: dict[str, list[str]]
+
+
+def load_table(export_dir: Path) -> TurnTable:
+    """Open an export directory without reading the columns into memory."""
+    manifest = json.loads((export_dir / "manifest.json").read_text(encoding="utf-8"))
+    rows = manifest["rows"]
+    columns = {}
+    for name, dtype in manifest["columns"].items():
+        path = export_dir / f"{name}.bin"
+        columns[name] = np.memmap(path, dtype=dtype, mode="r", shape=(rows,)) if rows else np.zeros(0, dtype=dtype)
+    return TurnTable(rows=rows, columns=columns, dictionaries=manifest["dictionaries"])
+
+
+@dataclass
+class _Groups:
+    codes: np.ndarray
+    names: tuple[str, ...]
+    sizes: list[int]
+
+    @property
+    def n(self) -> int:
+        return int(np.prod(self.sizes))
+
+    def label(self, table: TurnTable, flat: int) -> Union[str, tuple[str, ...]]:
+        parts = []
+        for name, size in zip(reversed(self.names), reversed(self.sizes)):
+            flat, code = divmod(flat, size)
+            parts.append(table.dictionaries[name][code])
+        return parts[0] if len(parts) == 1 else tuple(reversed(parts))
+
+
+def _groups(table: TurnTable, by: GroupKey) -> _Groups:
+    """Combine one or more dictionary columns into a single dense group code."""
+    names = (by,) if isinstance(by, str) else tuple(by)
+    for name in names:
+        if name not in DICTIONARY_COLUMNS:
+            raise ValueError(f"Can only group by dictionary columns {DICTIONARY_COLUMNS}, got {name!r}")
+    sizes = [len(table.dictionaries[name]) for name in names]
+    codes = np.zeros(table.rows, dtype=np.int64)
+    for name, size in zip(names, sizes):
+        codes = codes * size + table.columns[name]
+    return _Groups(codes=codes, names=names, sizes=sizes)
+
+
+def _collect(table: TurnTable, groups: _Groups, counts: np.ndarray, values: np.ndarray) -> dict:
+    """Map labels of non-empty groups to their aggregate value."""
+    return {groups.label(table, int(i)): values[i].item() for i in np.flatnonzero(counts)}
+
+
+def group_count(table: TurnTable, by: GroupKey) -> dict:
+    """Number of turns per group, e.g. group_count(t, ("tone", "intent"))."""
+    groups = _groups(table, by)
+    counts = np.bincount(groups.codes, minlength=groups.n)
+    return _collect(table, groups, counts, counts)
+
+
+def group_mean(table: TurnTable, value: str, by: GroupKey) -> dict:
+    """Mean of a numeric column per group, e.g. group_mean(t, "body_words", "intent")."""
+    groups = _groups(table, by)
+    counts = np.bincount(groups.codes, minlength=groups.n)
+    sums = np.bincount(groups.codes, weights=table.columns[value], minlength=groups.n)
+    return _collect(table, groups, counts, sums / np.maximum(counts, 1))
+
+
+def retry_rate(table: TurnTable, by: GroupKey) -> dict:
+    """Share of turns per group that needed at least one review retry."""
+    groups = _groups(table, by)
+    counts = np.bincount(groups.codes, minlength=groups.n)
+    retried = np.bincount(groups.codes, weights=table.columns["retries"] > 0, minlength=groups.n)
+    return _collect(table, groups, counts, retried / np.maximum(counts, 1))
+
+
+def length_histogram(table: TurnTable, bins: int | list[int] = 10) -> tuple[list[int], list[float]]:
+    """Histogram of body length in words. Returns (counts, bin edges)."""
+    counts, edges = np.histogram(table.columns["body_words"], bins=bins)
+    return counts.tolist(), edges.tolist()
@@ -0,0 +1,261 @@
+"""Command-line entry point (``email-assistant``).
+
+Subcommands::
+
+    email-assistant generate "Follow up on the proposal" --tone formal
+    email-assistant batch requests.jsonl -o results.jsonl --concurrency 8 --checkpoint run.ckpt
+    cat requests.jsonl | email-assistant batch - --ordered > results.jsonl
+    email-assistant campaign "Invite them to our launch webinar" --recipients people.csv -o drafts.jsonl
+    email-assistant jobs enqueue contexts.jsonl
+    email-assistant jobs work --processes 4
+    email-assistant jobs status <job-id>
+    email-assistant usage --user alice --month
+    email-assistant warmup --json
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+def _cmd_generate(args: argparse.Namespace) -> int:
+    from email_assistant.src.observability.usage import BudgetExceededError
+    from email_assistant.src.workflow.langgraph_flow import invoke, result_payload
+
+    try:
+        state = invoke(
+            raw_prompt=args.prompt,
+            user_tone=args.tone,
+            user_recipient=args.recipient,
+            user_intent_override=args.intent,
+            user_id=args.user_id,
+        )
+    except BudgetExceededError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    payload = result_payload(state)
+    if args.json:
+        print(json.dumps(payload, indent=2))
+    elif payload["draft"]:
+        print(f"Subject: {payload['draft']['subject']}\n\n{payload['draft']['body']}")
+    for err in payload["errors"]:
+        print(f"warning: {err}", file=sys.stderr)
+    return 0 if payload["draft"] else 1
+
+
+def _cmd_batch(args: argparse.Namespace) -> int:
+    from email_assistant.src.workflow.batch import open_output, run_batch
+
+    if args.checkpoint and not args.output:
+        print("error: --checkpoint requires --output (stdout cannot be resumed)", file=sys.stderr)
+        return 2
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = open_output(args.output, args.checkpoint) if args.output else sys.stdout
+    try:
+        stats = run_batch(
+            source,
+            output,
+            concurrency=args.concurrency,
+            ordered=args.ordered,
+            checkpoint_path=args.checkpoint,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(
+        f"done: {stats.succeeded} ok, {stats.failed} failed, {stats.skipped} already done",
+        file=sys.stderr,
+    )
+    return 0 if stats.failed == 0 else 1
+
+
+def _cmd_campaign(args: argparse.Namespace) -> int:
+    from email_assistant.src.workflow.campaign import load_recipients, run_campaign
+
+    recipients = load_recipients(args.recipients)
+    result = run_campaign(
+        args.prompt,
+        recipients,
+        tone=args.tone,
+        intent=args.intent,
+        user_id=args.user_id,
+        concurrency=args.concurrency,
+    )
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for item in result.drafts:
+            output.write(json.dumps(item.to_dict()) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    review = "passed" if result.review and result.review.passed else "not passed"
+    failed = sum(1 for d in result.drafts if d.error)
+    print(
+        f"template review {review}; {len(result.drafts)} copies, "
+        f"{sum(1 for d in result.drafts if d.touched_up)} touched up, {failed} with errors",
+        file=sys.stderr,
+    )
+    return 0 if failed == 0 else 1
+
+
+def _cmd_jobs_enqueue(args: argparse.Namespace) -> int:
+    from pydantic import ValidationError
+
+    from email_assistant.src.jobs.queue import JobQueue
+    from email_assistant.src.models.schemas import EmailContext
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    by_user: dict[str, list[EmailContext]] = {}
+    try:
+        for lineno, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                user_id = item.pop("user_id", None) or args.user_id
+                by_user.setdefault(user_id, []).append(EmailContext.model_validate(item))
+            except (ValueError, ValidationError) as e:
+                print(f"error: line {lineno}: {e}", file=sys.stderr)
+                return 2
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    with JobQueue(args.db) as queue:
+        for user_id, contexts in by_user.items():
+            for job_id in queue.enqueue_many(contexts, user_id=user_id, max_attempts=args.max_attempts):
+                print(job_id)
+    return 0
+
+
+def _cmd_jobs_work(args: argparse.Namespace) -> int:
+    from email_assistant.src.jobs.worker import run_workers
+
+    run_workers(args.processes, db_path=args.db, exit_when_idle=args.exit_when_idle, lease_s=args.lease)
+    return 0
+
+
+def _cmd_jobs_status(args: argparse.Namespace) -> int:
+    from email_assistant.src.jobs.queue import JobQueue
+
+    with JobQueue(args.db) as queue:
+        if args.job_id is None:
+            print(json.dumps(queue.counts(), indent=2))
+            return 0
+        job = queue.get(args.job_id)
+    if job is None:
+        print(f"error: no job {args.job_id}", file=sys.stderr)
+        return 1
+    print(json.dumps(job.to_dict(), indent=2))
+    return 0
+
+
+def _cmd_usage(args: argparse.Namespace) -> int:
+    from email_assistant.src.observability.usage import budget_settings, get_meter
+
+    period = "month" if args.month else "day"
+    meter = get_meter(args.db)
+    rows = meter.report(args.user, period)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    print(f"{'user':<16} {'node':<20} {'model':<28} {'calls':>6} {'in':>9} {'out':>8} {'cost_usd':>10}")
+    for r in rows:
+        print(
+            f"{r['user_id']:<16} {r['node']:<20} {r['model']:<28} {r['calls']:>6} "
+            f"{r['input_tokens']:>9} {r['output_tokens']:>8} {r['cost_usd']:>10.4f}"
+        )
+    print(f"total ({'this month' if args.month else 'today'}, UTC): ${sum(r['cost_usd'] for r in rows):.4f}")
+    if args.user:
+        settings = budget_settings(args.user)
+        for label, key, p in (("daily", "daily_usd", "day"), ("monthly", "monthly_usd", "month")):
+            if settings[key] is not None:
+                print(f"{label} budget: ${meter.spent(args.user, p):.4f} of ${float(settings[key]):.2f}")
+    return 0
+
+
+def _cmd_warmup(args: argparse.Namespace) -> int:
+    from email_assistant.src.workflow.warmup import format_report, warm_up
+
+    report = warm_up(connect=not args.no_connect, user_ids=args.user_id or ["default"])
+    print(json.dumps(report.to_dict(), indent=2) if args.json else format_report(report))
+    return 0 if report.ok else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="email-assistant", description="AI Email Assistant command line.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="Generate one email")
+    gen.add_argument("prompt")
+    gen.add_argument("--tone", default="professional")
+    gen.add_argument("--recipient", default=None)
+    gen.add_argument("--intent", default=None, help="Override intent detection")
+    gen.add_argument("--user-id", default="default")
+    gen.add_argument("--json", action="store_true", help="Print the full result as JSON")
+    gen.set_defaults(func=_cmd_generate)
+
+    batch = sub.add_parser("batch", help="Run a JSONL file of requests")
+    batch.add_argument("input", help="JSONL file of requests, or - for stdin")
+    batch.add_argument("-o", "--output", type=Path, default=None, help="Results file (default: stdout)")
+    batch.add_argument("--concurrency", type=int, default=4, help="Pipeline runs in parallel")
+    batch.add_argument("--ordered", action="store_true", help="Write results in input order (default: completion order)")
+    batch.add_argument("--checkpoint", type=Path, default=None, help="Checkpoint file; rerun with the same one to resume")
+    batch.set_defaults(func=_cmd_batch)
+
+    campaign = sub.add_parser("campaign", help="Draft one template and render it for many recipients")
+    campaign.add_argument("prompt")
+    campaign.add_argument("--recipients", type=Path, required=True, help="CSV or JSONL: name, email, company, touch_up, custom columns")
+    campaign.add_argument("--tone", default="professional")
+    campaign.add_argument("--intent", default=None, help="Override intent detection")
+    campaign.add_argument("--user-id", default="default")
+    campaign.add_argument("-o", "--output", type=Path, default=None, help="JSONL of per-recipient drafts (default: stdout)")
+    campaign.add_argument("--concurrency", type=int, default=4, help="Parallel touch-up calls")
+    campaign.set_defaults(func=_cmd_campaign)
+
+    jobs = sub.add_parser("jobs", help="Durable job queue for bulk drafting")
+    jobs.add_argument("--db", type=Path, default=None, help="Queue database (default: jobs.db_path in mcp.yaml)")
+    jobs_sub = jobs.add_subparsers(dest="jobs_command", required=True)
+    enqueue = jobs_sub.add_parser("enqueue", help="Enqueue a JSONL file of EmailContext objects; prints job ids")
+    enqueue.add_argument("input", help="JSONL file, or - for stdin; a line may carry its own user_id")
+    enqueue.add_argument("--user-id", default="default")
+    enqueue.add_argument("--max-attempts", type=int, default=None)
+    enqueue.set_defaults(func=_cmd_jobs_enqueue)
+    worker = jobs_sub.add_parser("work", help="Run worker processes")
+    worker.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    worker.add_argument("--lease", type=float, default=None, help="Lease (visibility timeout) in seconds")
+    worker.add_argument("--exit-when-idle", action="store_true", help="Exit once no jobs are queued or running")
+    worker.set_defaults(func=_cmd_jobs_work)
+    status = jobs_sub.add_parser("status", help="Show one job, or counts per state")
+    status.add_argument("job_id", nargs="?", default=None)
+    status.set_defaults(func=_cmd_jobs_status)
+
+    usage = sub.add_parser("usage", help="Metered LLM tokens and cost per user, node and model")
+    usage.add_argument("--user", default=None, help="Only this user, with their budget status")
+    usage.add_argument("--month", action="store_true", help="This month instead of today (UTC)")
+    usage.add_argument("--db", type=Path, default=None, help="Usage database (default: usage.sqlite3 next to the profile store)")
+    usage.add_argument("--json", action="store_true", help="Print the rows as JSON")
+    usage.set_defaults(func=_cmd_usage)
+
+    warmup = sub.add_parser("warmup", help="Run the startup warm-up and print each step's duration")
+    warmup.add_argument("--no-connect", action="store_true", help="Build clients but do not open provider connections")
+    warmup.add_argument("--user-id", action="append", default=None, help="Profile to preload (repeatable; default: default)")
+    warmup.add_argument("--json", action="store_true", help="Print the report as JSON")
+    warmup.set_defaults(func=_cmd_warmup)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    load_dotenv()
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Evaluation runner and load-testing harness
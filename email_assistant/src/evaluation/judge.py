@@ -0,0 +1,46 @@
+"""LLM-as-a-judge tone check, with the local tone classifier as a first pass."""
+
+from pydantic import BaseModel, Field
+
+from email_assistant.src.integrations.llm_factory import get_llm, invoke_structured
+from email_assistant.src.nlp.tone_classifier import classify_tone
+from email_assistant.src.prompts.registry import get_template
+
+# Local classifier probability above which the LLM judge is skipped
+LOCAL_JUDGE_THRESHOLD = 0.9
+
+
+class ToneJudgment(BaseModel):
+    """Structured response from the LLM judge."""
+
+    matches_requested_tone: bool = Field(
+        ..., description="True if the email body matches the requested tone"
+    )
+    detected_tone: str = Field(
+        ..., description="The tone the judge detects in the email"
+    )
+    confidence: float = Field(
+        ..., description="Confidence score 0.0-1.0"
+    )
+    reasoning: str = Field(
+        ..., description="Brief explanation for the judgment"
+    )
+
+
+def judge_tone(body: str, requested_tone: str) -> ToneJudgment:
+    """Judge locally when the tone classifier is confident, else use a separate LLM call."""
+    probs = classify_tone(body)
+    if probs.get(requested_tone, 0.0) >= LOCAL_JUDGE_THRESHOLD:
+        return ToneJudgment(
+            matches_requested_tone=True,
+            detected_tone=requested_tone,
+            confidence=probs[requested_tone],
+            reasoning="Local tone classifier was confident",
+        )
+    return invoke_structured(
+        get_llm(temperature=0, node="tone_judge"),
+        ToneJudgment,
+        get_template("tone_judge"),
+        requested_tone=requested_tone,
+        body=body,
+    )
@@ -0,0 +1,248 @@
+"""Load generator for the full pipeline.
+
+Drives ``invoke`` in-process, or the HTTP API (``--target http``), with
+simulated users and reports throughput, latency percentiles, error rate and
+profile-store contention.
+
+Two arrival models:
+
+- closed loop (default): ``--users`` users each send a request, wait for it,
+  then think for an exponentially distributed ``--think-ms`` before the next
+- open loop (``--rate``): requests arrive as a Poisson process at the given
+  rate and are served by ``--users`` concurrent workers; latency is measured
+  from arrival, so queueing under overload shows up in the percentiles
+
+In-process runs use the stub LLM with latency drawn from ``--llm-latency``
+(see ``stub_client.latency_sampler``) unless ``--real-llm`` is given, and a
+scratch profile store unless ``--store-dir`` points elsewhere. Usage::
+
+    python -m email_assistant.src.evaluation.loadtest --users 16 --duration 30 --llm-latency lognormal:600,0.4
+    python -m email_assistant.src.evaluation.loadtest --rate 5 --users 32 --shared-user
+    python -m email_assistant.src.evaluation.loadtest --target http --url http://localhost:8000 --users 32
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from email_assistant.src.observability.metrics import get_metrics
+
+_PROMPTS = [
+    ("Follow up with Dana about the signed contract", "professional"),
+    ("Ask the team to submit timesheets by Friday", "assertive"),
+    ("Thank Priya for covering my on-call shift", "friendly"),
+    ("Tell the board the audit starts next Monday", "formal"),
+    ("See if anyone wants to grab tacos after standup", "casual"),
+]
+
+# A target sends one request for user_id and returns an error string, or None on success
+Target = Callable[[str, str, str], Optional[str]]
+
+
+@dataclass
+class Sample:
+    started: float
+    latency_s: float
+    error: Optional[str]
+
+
+def invoke_target(user_id: str, prompt: str, tone: str) -> Optional[str]:
+    from email_assistant.src.workflow.langgraph_flow import invoke
+
+    state = invoke(raw_prompt=prompt, user_tone=tone, user_id=user_id)
+    errors = state.get("errors") or []
+    return errors[0].split(":")[0] if errors else None
+
+
+def http_target(url: str, timeout_s: float = 120.0) -> Target:
+    import httpx
+
+    client = httpx.Client(base_url=url, timeout=timeout_s)
+
+    def _send(user_id: str, prompt: str, tone: str) -> Optional[str]:
+        response = client.post("/v1/generate", json={"prompt": prompt, "tone": tone, "user_id": user_id})
+        if response.status_code != 200:
+            return f"HTTP {response.status_code}"
+        errors = response.json().get("errors") or []
+        return errors[0].split(":")[0] if errors else None
+
+    return _send
+
+
+def _call(target: Target, user_id: str, arrived: float) -> Sample:
+    prompt, tone = random.choice(_PROMPTS)
+    try:
+        error = target(user_id, prompt, tone)
+    except Exception as e:
+        error = type(e).__name__
+    return Sample(started=arrived, latency_s=time.perf_counter() - arrived, error=error)
+
+
+def _closed_loop(target: Target, users: int, deadline: float, think_s: float, user_ids: list[str]) -> list[Sample]:
+    samples: list[Sample] = []
+    lock = threading.Lock()
+
+    def _user(i: int) -> None:
+        while time.perf_counter() < deadline:
+            sample = _call(target, user_ids[i], time.perf_counter())
+            with lock:
+                samples.append(sample)
+            if think_s > 0:
+                time.sleep(min(random.expovariate(1 / think_s), max(0.0, deadline - time.perf_counter())))
+
+    threads = [threading.Thread(target=_user, args=(i,), name=f"load-user-{i}") for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples
+
+
+def _open_loop(target: Target, workers: int, deadline: float, rate: float, user_ids: list[str]) -> list[Sample]:
+    futures = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load-worker") as pool:
+        next_arrival = time.perf_counter()
+        while next_arrival < deadline:
+            time.sleep(max(0.0, next_arrival - time.perf_counter()))
+            futures.append(pool.submit(_call, target, random.choice(user_ids), next_arrival))
+            next_arrival += random.expovariate(rate)
+    return [f.result() for f in futures]
+
+
+def run_load(
+    target: Target,
+    users: int = 8,
+    duration_s: float = 30.0,
+    rate: Optional[float] = None,
+    think_s: float = 0.0,
+    shared_user: bool = False,
+) -> dict[str, Any]:
+    """Generate load for duration_s and return the report."""
+    user_ids = ["load-shared"] * users if shared_user else [f"load-{i}" for i in range(users)]
+    counters_before = get_metrics().counters()
+    start = time.perf_counter()
+    deadline = start + duration_s
+    if rate:
+        samples = _open_loop(target, users, deadline, rate, user_ids)
+    else:
+        samples = _closed_loop(target, users, deadline, think_s, user_ids)
+    wall_s = time.perf_counter() - start
+    counters_after = get_metrics().counters()
+    return build_report(
+        samples,
+        wall_s,
+        {
+            "users": users,
+            "duration_s": duration_s,
+            "mode": "open" if rate else "closed",
+            "rate": rate,
+            "think_s": think_s,
+            "shared_user": shared_user,
+        },
+        {k: v - counters_before.get(k, 0) for k, v in counters_after.items() if v != counters_before.get(k, 0)},
+    )
+
+
+def build_report(samples: list[Sample], wall_s: float, config: dict[str, Any], counters: dict[str, int]) -> dict[str, Any]:
+    ok = [s.latency_s for s in samples if s.error is None]
+    errors = Counter(s.error for s in samples if s.error is not None)
+    latencies = [s.latency_s for s in samples]
+    percentiles = np.percentile(latencies, [50, 90, 95, 99]) if latencies else [0.0] * 4
+    contention = {k.removeprefix("profile_store."): v for k, v in counters.items() if k.startswith("profile_store.")}
+    if contention.get("lock_acquired"):
+        contention["contended_rate"] = round(contention.get("lock_contended", 0) / contention["lock_acquired"], 4)
+    return {
+        "config": config,
+        "requests": len(samples),
+        "succeeded": len(ok),
+        "error_rate": round(sum(errors.values()) / len(samples), 4) if samples else 0.0,
+        "errors": dict(errors.most_common()),
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(len(ok) / wall_s, 3) if wall_s else 0.0,
+        "latency_s": {
+            "p50": round(float(percentiles[0]), 4),
+            "p90": round(float(percentiles[1]), 4),
+            "p95": round(float(percentiles[2]), 4),
+            "p99": round(float(percentiles[3]), 4),
+            "max": round(max(latencies, default=0.0), 4),
+        },
+        "profile_store": contention,
+    }
+
+
+def format_report(report: dict[str, Any]) -> str:
+    c, lat = report["config"], report["latency_s"]
+    mode = f"open loop at {c['rate']}/s" if c["mode"] == "open" else f"closed loop, think {c['think_s']}s"
+    lines = [
+        f"{c['users']} users, {mode}, {report['wall_s']}s",
+        f"requests {report['requests']}  ok {report['succeeded']}  error rate {report['error_rate']:.1%}  "
+        f"throughput {report['throughput_rps']}/s",
+        f"latency p50 {lat['p50']:.3f}s  p90 {lat['p90']:.3f}s  p95 {lat['p95']:.3f}s  p99 {lat['p99']:.3f}s  max {lat['max']:.3f}s",
+    ]
+    if report["errors"]:
+        lines.append("errors: " + ", ".join(f"{k} x{v}" for k, v in report["errors"].items()))
+    store = report["profile_store"]
+    if store:
+        lines.append(
+            f"profile store: {store.get('lock_acquired', 0)} lock acquisitions, "
+            f"{store.get('lock_contended', 0)} contended ({store.get('lock_wait_us', 0) / 1000:.1f} ms waiting), "
+            f"{store.get('cas_conflicts', 0)} CAS conflicts"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the email pipeline.")
+    parser.add_argument("--target", choices=["invoke", "http"], default="invoke")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL for --target http")
+    parser.add_argument("--users", type=int, default=8, help="Concurrent users (closed loop) or workers (open loop)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to generate load")
+    parser.add_argument("--rate", type=float, default=None, help="Open-loop arrival rate in requests/s")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean think time between a user's requests")
+    parser.add_argument("--shared-user", action="store_true", help="All requests use one profile (worst-case store contention)")
+    parser.add_argument("--llm-latency", default="lognormal:600,0.4", help="Stub LLM latency spec for --target invoke")
+    parser.add_argument("--real-llm", action="store_true", help="Use the configured provider instead of the stub")
+    parser.add_argument("--store-dir", type=Path, default=None, help="Profile store for --target invoke (default: a temp dir)")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the report as JSON here")
+    args = parser.parse_args(argv)
+
+    if args.target == "http":
+        # Profile-store contention happens in the server process and is not reported here
+        target = http_target(args.url)
+    else:
+        from email_assistant.src.integrations.stub_client import latency_sampler, set_latency_sampler
+
+        if not args.real_llm:
+            os.environ["PRIMARY_PROVIDER"] = "stub"
+            set_latency_sampler(latency_sampler(args.llm_latency))
+        os.environ["PROFILE_STORE_DIR"] = str(args.store_dir or tempfile.mkdtemp(prefix="email-loadtest-"))
+        target = invoke_target
+
+    report = run_load(
+        target,
+        users=args.users,
+        duration_s=args.duration,
+        rate=args.rate,
+        think_s=args.think_ms / 1000,
+        shared_user=args.shared_user,
+    )
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""Concurrent tone evaluation with a quality, latency and cost report.
+
+Runs every case in a JSONL case file (``{"id", "prompt", "tone"}``, default
+``data/eval_cases.jsonl``) through the pipeline and the tone judge with
+bounded concurrency, then writes a JSON report with:
+
+- per-tone pass rate and mean judge confidence
+- p50/p95 latency per pipeline node (from ``stream`` events) and for the judge
+- models, token usage and cost per node, from the metrics registry
+- retry counts
+- a diff against the previous report, so quality and performance
+  regressions show up side by side
+
+Each case runs as its own user (``eval-<case id>``) whose history is cleared
+first, so earlier runs never change the prompts -- which also keeps runs
+replayable from LLM cassettes. Those users, their turns and their metered
+usage go to a scratch profile store unless ``--store-dir`` points elsewhere.
+Usage::
+
+    python -m email_assistant.src.evaluation.runner --concurrency 8
+    LLM_CASSETTE_MODE=replay python -m email_assistant.src.evaluation.runner
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from email_assistant.src.evaluation.judge import judge_tone
+from email_assistant.src.integrations.cassette import cassette_mode
+from email_assistant.src.integrations.config_loader import load_mcp_config
+from email_assistant.src.memory.profile_store import clear_history
+from email_assistant.src.models.schemas import DraftResult
+from email_assistant.src.observability.metrics import NodeStats, get_metrics
+from email_assistant.src.observability.usage import metered
+from email_assistant.src.workflow.langgraph_flow import stream
+
+_MIN_CONFIDENCE = 0.5
+_JUDGE_NODE = "judge"
+
+
+def default_cases_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "data" / "eval_cases.jsonl"
+
+
+def default_reports_dir() -> Path:
+    return Path(__file__).resolve().parents[3] / "eval_reports"
+
+
+def load_cases(path: Path) -> list[dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    for i, case in enumerate(cases):
+        case.setdefault("id", str(i))
+    return cases
+
+
+def run_case(case: dict[str, Any]) -> dict[str, Any]:
+    """Generate and judge one case. Never raises; failures are recorded on the result."""
+    user_id = f"eval-{case['id']}"
+    result: dict[str, Any] = {
+        "id": case["id"],
+        "tone": case["tone"],
+        "passed": False,
+        "detected_tone": None,
+        "confidence": 0.0,
+        "retries": 0,
+        "errors": [],
+        "node_latency_s": {},
+        "latency_s": 0.0,
+    }
+    start = time.perf_counter()
+    try:
+        clear_history(user_id)
+        state: dict[str, Any] = {}
+        for event in stream(raw_prompt=case["prompt"], user_tone=case["tone"], user_id=user_id):
+            if event.status == "finished":
+                result["node_latency_s"].setdefault(event.node, []).append(event.elapsed_s)
+            elif event.status == "done":
+                state = event.state or {}
+        result["retries"] = state.get("retry_count", 0)
+        result["errors"] = list(state.get("errors") or [])
+        draft = state.get("personalized_draft") or state.get("draft")
+        if not isinstance(draft, DraftResult) or not draft.body:
+            result["errors"].append("Pipeline produced no draft")
+            return result
+        judge_start = time.perf_counter()
+        with metered(user_id):
+            judgment = judge_tone(draft.body, case["tone"])
+        result["node_latency_s"][_JUDGE_NODE] = [time.perf_counter() - judge_start]
+        result["detected_tone"] = judgment.detected_tone
+        result["confidence"] = round(judgment.confidence, 4)
+        result["passed"] = judgment.matches_requested_tone and judgment.confidence >= _MIN_CONFIDENCE
+        if not result["passed"]:
+            result["reasoning"] = judgment.reasoning
+    except Exception as e:
+        result["errors"].append(f"{type(e).__name__}: {e}")
+    finally:
+        result["latency_s"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    p50, p95 = np.percentile(samples, [50, 95]) if samples else (0.0, 0.0)
+    return {"samples": len(samples), "p50_s": round(float(p50), 4), "p95_s": round(float(p95), 4)}
+
+
+def _token_delta(before: dict[str, NodeStats], after: dict[str, NodeStats]) -> dict[str, dict[str, Any]]:
+    tokens: dict[str, dict[str, Any]] = {}
+    for node, stats in sorted(after.items()):
+        prev = before.get(node, NodeStats())
+        usage = {
+            "calls": stats.calls - prev.calls,
+            "input_tokens": stats.input_tokens - prev.input_tokens,
+            "output_tokens": stats.output_tokens - prev.output_tokens,
+            "cached_tokens": stats.cached_tokens - prev.cached_tokens,
+            "cost_usd": round(stats.cost_usd - prev.cost_usd, 6),
+            "models": {m: n - prev.models.get(m, 0) for m, n in stats.models.items() if n != prev.models.get(m, 0)},
+        }
+        if usage["calls"]:
+            tokens[node] = usage
+    total = {key: sum(u[key] for u in tokens.values()) for key in ("calls", "input_tokens", "output_tokens", "cached_tokens")}
+    total["cost_usd"] = round(sum(u["cost_usd"] for u in tokens.values()), 6)
+    tokens["total"] = total
+    return tokens
+
+
+def build_report(results: list[dict[str, Any]], tokens: dict[str, dict[str, int]], run: dict[str, Any]) -> dict[str, Any]:
+    by_tone: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    latencies: dict[str, list[float]] = defaultdict(list)
+    for r in results:
+        by_tone[r["tone"]].append(r)
+        for node, samples in r["node_latency_s"].items():
+            latencies[node].extend(samples)
+
+    def _rates(group: list[dict[str, Any]]) -> dict[str, Any]:
+        passed = sum(r["passed"] for r in group)
+        judged = [r["confidence"] for r in group if r["detected_tone"] is not None]
+        return {
+            "cases": len(group),
+            "passed": passed,
+            "pass_rate": round(passed / len(group), 4) if group else 0.0,
+            "mean_confidence": round(sum(judged) / len(judged), 4) if judged else 0.0,
+        }
+
+    retries = [r["retries"] for r in results]
+    return {
+        "run": run,
+        "summary": _rates(results),
+        "tones": {tone: _rates(group) for tone, group in sorted(by_tone.items())},
+        "nodes": {node: _percentiles(samples) for node, samples in sorted(latencies.items())},
+        "case_latency": _percentiles([r["latency_s"] for r in results]),
+        "tokens": tokens,
+        "retries": {
+            "total": sum(retries),
+            "cases_with_retries": sum(1 for n in retries if n),
+            "max": max(retries, default=0),
+        },
+        "cases": [{k: v for k, v in r.items() if k != "node_latency_s"} for r in results],
+    }
+
+
+def _total_tokens(report: dict[str, Any]) -> Optional[int]:
+    total = report.get("tokens", {}).get("total")
+    return total["input_tokens"] + total["output_tokens"] if total else None
+
+
+def diff_reports(current: dict[str, Any], previous: dict[str, Any]) -> dict[str, Any]:
+    """Changes from previous to current: rates, latency percentiles, tokens, retries, flipped cases."""
+
+    def _delta(a: Optional[float], b: Optional[float]) -> Optional[float]:
+        return None if a is None or b is None else round(a - b, 4)
+
+    prev_cases = {c["id"]: c["passed"] for c in previous.get("cases", [])}
+    cur_cases = {c["id"]: c["passed"] for c in current["cases"]}
+    return {
+        "previous_run": previous.get("run", {}).get("started_at"),
+        "pass_rate": _delta(current["summary"]["pass_rate"], previous.get("summary", {}).get("pass_rate")),
+        "tones": {
+            tone: _delta(stats["pass_rate"], previous.get("tones", {}).get(tone, {}).get("pass_rate"))
+            for tone, stats in current["tones"].items()
+        },
+        "nodes": {
+            node: {
+                key: _delta(stats[key], previous.get("nodes", {}).get(node, {}).get(key))
+                for key in ("p50_s", "p95_s")
+            }
+            for node, stats in current["nodes"].items()
+        },
+        "total_tokens": _delta(_total_tokens(current), _total_tokens(previous)),
+        "cost_usd": _delta(
+            current["tokens"]["total"].get("cost_usd"), previous.get("tokens", {}).get("total", {}).get("cost_usd")
+        ),
+        "retries": _delta(current["retries"]["total"], previous.get("retries", {}).get("total")),
+        "newly_failing": sorted(i for i, ok in cur_cases.items() if not ok and prev_cases.get(i) is True),
+        "newly_passing": sorted(i for i, ok in cur_cases.items() if ok and prev_cases.get(i) is False),
+    }
+
+
+def run_eval(cases: list[dict[str, Any]], concurrency: int = 4) -> dict[str, Any]:
+    """Run all cases and return the report (without a diff)."""
+    config = load_mcp_config()
+    run = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "cases": len(cases),
+        "concurrency": concurrency,
+        "provider": config.get("primary_provider", "openai"),
+        "model": config.get("primary_model", "gpt-4o-mini"),
+        "cassette_mode": cassette_mode(),
+    }
+    before = get_metrics().node_stats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="eval") as pool:
+        results = list(pool.map(run_case, cases))
+    run["wall_s"] = round(time.perf_counter() - start, 3)
+    return build_report(results, _token_delta(before, get_metrics().node_stats()), run)
+
+
+def latest_report(reports_dir: Path) -> Optional[Path]:
+    reports = sorted(reports_dir.glob("eval-*.json"))
+    return reports[-1] if reports else None
+
+
+def _signed(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:+}"
+
+
+def format_report(report: dict[str, Any]) -> str:
+    s = report["summary"]
+    lines = [
+        f"{s['passed']}/{s['cases']} passed ({s['pass_rate']:.0%}), mean confidence {s['mean_confidence']:.2f}, "
+        f"{report['run']['wall_s']}s wall",
+        "",
+        "tone          pass   conf",
+    ]
+    lines += [f"{tone:<13} {t['pass_rate']:>4.0%}   {t['mean_confidence']:.2f}" for tone, t in report["tones"].items()]
+    lines += ["", "node                    p50_s    p95_s   cost_usd  models"]
+    for node, n in report["nodes"].items():
+        usage = report["tokens"].get(node, {})
+        models = ", ".join(usage.get("models", {}))
+        lines.append(f"{node:<22} {n['p50_s']:>7.3f}  {n['p95_s']:>7.3f}  {usage.get('cost_usd', 0.0):>9.5f}  {models}")
+    total = report["tokens"]["total"]
+    lines += [
+        "",
+        f"tokens: {total['input_tokens']} in / {total['output_tokens']} out over {total['calls']} calls, "
+        f"${total.get('cost_usd', 0.0):.4f}; retries: {report['retries']['total']}",
+    ]
+    diff = report.get("diff")
+    if diff:
+        lines += [
+            "",
+            f"vs {diff['previous_run']}: pass rate {_signed(diff['pass_rate'])}, "
+            f"tokens {_signed(diff['total_tokens'])}, cost {_signed(diff.get('cost_usd'))}, "
+            f"retries {_signed(diff['retries'])}",
+        ]
+        if diff["newly_failing"]:
+            lines.append("newly failing: " + ", ".join(diff["newly_failing"]))
+        if diff["newly_passing"]:
+            lines.append("newly passing: " + ", ".join(diff["newly_passing"]))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run the tone evaluation and write a report.")
+    parser.add_argument("--cases", type=Path, default=default_cases_path())
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--reports-dir", type=Path, default=default_reports_dir())
+    parser.add_argument("--previous", type=Path, default=None, help="Report to diff against (default: latest in --reports-dir)")
+    parser.add_argument("--fail-under", type=float, default=0.0, help="Exit 1 if the pass rate is below this")
+    parser.add_argument("--store-dir", type=Path, default=None, help="Profile store for the eval users (default: a temp dir)")
+    args = parser.parse_args(argv)
+
+    os.environ["PROFILE_STORE_DIR"] = str(args.store_dir or tempfile.mkdtemp(prefix="email-eval-"))
+
+    previous_path = args.previous or latest_report(args.reports_dir)
+    report = run_eval(load_cases(args.cases), concurrency=args.concurrency)
+    if previous_path and previous_path.exists():
+        report["diff"] = diff_reports(report, json.loads(previous_path.read_text(encoding="utf-8")))
+    args.reports_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    out = args.reports_dir / f"eval-{stamp}.json"
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(format_report(report))
+    print(f"\nreport: {out}", file=sys.stderr)
+    return 0 if report["summary"]["pass_rate"] >= args.fail_under else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Soak test: run the pipeline for a long time and watch memory per request.
+
+Load is generated in intervals with the load-test harness (stub LLM and a
+scratch profile store by default). After each interval the soak test collects
+garbage and samples traced Python memory (``tracemalloc``) and process RSS.
+The first ``--warmup`` intervals fill caches and are excluded; from then on
+the growth per request is the slope of a least-squares fit of memory against
+requests served. The report lists the allocation sites that grew most since
+the end of warm-up, and the run fails when traced growth per request exceeds
+``--max-bytes-per-request`` (or RSS growth exceeds ``--max-rss-bytes-per-request``,
+if given). Usage::
+
+    python -m email_assistant.src.evaluation.soak --duration 7200 --interval 60 --users 8
+"""
+
+import argparse
+import gc
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from email_assistant.src.evaluation.loadtest import Target, invoke_target, run_load
+
+# Frames kept per allocation; more frames give deeper context but slow every allocation
+_TRACE_FRAMES = 1
+_IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+@dataclass
+class MemorySample:
+    elapsed_s: float
+    requests: int
+    traced_bytes: int
+    rss_bytes: int
+
+
+def rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def growth_per_request(samples: list[MemorySample], field: str) -> float:
+    """Least-squares slope of a memory field against requests served, in bytes per request."""
+    if len(samples) < 2 or samples[-1].requests == samples[0].requests:
+        return 0.0
+    x = np.array([s.requests for s in samples], dtype=float)
+    y = np.array([getattr(s, field) for s in samples], dtype=float)
+    slope, _ = np.polyfit(x, y, 1)
+    return float(slope)
+
+
+def top_growth(baseline: tracemalloc.Snapshot, current: tracemalloc.Snapshot, limit: int = 10) -> list[dict[str, Any]]:
+    filters = [tracemalloc.Filter(False, name) for name in _IGNORED_FILES]
+    stats = current.filter_traces(filters).compare_to(baseline.filter_traces(filters), "lineno")
+    growing = [s for s in stats if s.size_diff > 0][:limit]
+    return [{"size_diff_bytes": s.size_diff, "count_diff": s.count_diff, "site": str(s.traceback[0])} for s in growing]
+
+
+def run_soak(
+    target: Target = invoke_target,
+    duration_s: float = 3600.0,
+    interval_s: float = 60.0,
+    warmup: int = 2,
+    users: int = 8,
+    think_s: float = 0.0,
+    max_bytes_per_request: float = 2048.0,
+    max_rss_bytes_per_request: Optional[float] = None,
+) -> dict[str, Any]:
+    """Run load in intervals for duration_s and return the memory report."""
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(_TRACE_FRAMES)
+    try:
+        start = time.perf_counter()
+        requests = errors = 0
+        samples: list[MemorySample] = []
+        baseline: Optional[tracemalloc.Snapshot] = None
+        intervals = max(warmup + 2, round(duration_s / interval_s))
+        for i in range(intervals):
+            report = run_load(target, users=users, duration_s=interval_s, think_s=think_s)
+            requests += report["requests"]
+            errors += report["requests"] - report["succeeded"]
+            gc.collect()
+            traced, _ = tracemalloc.get_traced_memory()
+            samples.append(MemorySample(time.perf_counter() - start, requests, traced, rss_bytes()))
+            if i == warmup - 1 or (warmup == 0 and i == 0):
+                baseline = tracemalloc.take_snapshot()
+        final = tracemalloc.take_snapshot()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    steady = samples[max(warmup - 1, 0):]
+    traced_growth = growth_per_request(steady, "traced_bytes")
+    rss_growth = growth_per_request(steady, "rss_bytes")
+    failures = []
+    if traced_growth > max_bytes_per_request:
+        failures.append(f"traced memory grows {traced_growth:.0f} B/request (limit {max_bytes_per_request:.0f})")
+    if max_rss_bytes_per_request is not None and rss_growth > max_rss_bytes_per_request:
+        failures.append(f"RSS grows {rss_growth:.0f} B/request (limit {max_rss_bytes_per_request:.0f})")
+    return {
+        "config": {
+            "duration_s": duration_s,
+            "interval_s": interval_s,
+            "warmup_intervals": warmup,
+            "users": users,
+            "max_bytes_per_request": max_bytes_per_request,
+            "max_rss_bytes_per_request": max_rss_bytes_per_request,
+        },
+        "requests": requests,
+        "errors": errors,
+        "traced_bytes_per_request": round(traced_growth, 1),
+        "rss_bytes_per_request": round(rss_growth, 1),
+        "samples": [asdict(s) for s in samples],
+        "top_growth": top_growth(baseline, final) if baseline is not None else [],
+        "passed": not failures,
+        "failures": failures,
+    }
+
+
+def format_report(report: dict[str, Any]) -> str:
+    last = report["samples"][-1]
+    lines = [
+        f"{report['requests']} requests ({report['errors']} errors) in {last['elapsed_s']:.0f}s",
+        f"traced memory {last['traced_bytes'] / 1e6:.1f} MB, RSS {last['rss_bytes'] / 1e6:.1f} MB",
+        f"growth per request after warm-up: traced {report['traced_bytes_per_request']:.0f} B, "
+        f"RSS {report['rss_bytes_per_request']:.0f} B",
+        "",
+        "top growing allocation sites:",
+    ]
+    lines += [f"  {g['size_diff_bytes'] / 1024:>9.1f} KiB  {g['count_diff']:>+7}  {g['site']}" for g in report["top_growth"]]
+    lines.append("")
+    lines.append("PASS" if report["passed"] else "FAIL: " + "; ".join(report["failures"]))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Soak-test the pipeline and detect memory growth.")
+    parser.add_argument("--duration", type=float, default=3600.0, help="Total seconds to run")
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between memory samples")
+    parser.add_argument("--warmup", type=int, default=2, help="Intervals excluded from the growth fit")
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--think-ms", type=float, default=0.0)
+    parser.add_argument("--llm-latency", default="lognormal:50,0.4", help="Stub LLM latency spec")
+    parser.add_argument("--max-bytes-per-request", type=float, default=2048.0)
+    parser.add_argument("--max-rss-bytes-per-request", type=float, default=None)
+    parser.add_argument("--store-dir", type=Path, default=None, help="Profile store (default: a temp dir)")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the report as JSON here")
+    args = parser.parse_args(argv)
+
+    from email_assistant.src.integrations.stub_client import latency_sampler, set_latency_sampler
+
+    os.environ["PRIMARY_PROVIDER"] = "stub"
+    os.environ["PROFILE_STORE_DIR"] = str(args.store_dir or tempfile.mkdtemp(prefix="email-soak-"))
+    set_latency_sampler(latency_sampler(args.llm_latency))
+
+    report = run_soak(
+        duration_s=args.duration,
+        interval_s=args.interval,
+        warmup=args.warmup,
+        users=args.users,
+        think_s=args.think_ms / 1000,
+        max_bytes_per_request=args.max_bytes_per_request,
+        max_rss_bytes_per_request=args.max_rss_bytes_per_request,
+    )
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Record/replay cassettes for LLM calls.
+
+``LLM_CASSETTE_MODE`` selects the behaviour of every model returned by
+llm_factory:
+
+- unset / ``off``: call the provider as usual
+- ``record``: call the provider and save each request/response pair
+- ``replay``: serve saved responses only; no provider client is built and a
+  request with no cassette raises CassetteMissError
+
+Cassettes live in ``LLM_CASSETTE_DIR`` (default ``tests/cassettes``), one JSON
+file per request, named by a hash of the output schema and the normalized
+prompt (role plus whitespace-collapsed text of every message, so provider
+cache hints and incidental whitespace do not change the key). One file per
+request keeps parallel recording and replay free of write conflicts, and
+re-recording is an explicit ``LLM_CASSETTE_MODE=record`` run.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel, ConfigDict
+
+MODES = ("off", "record", "replay")
+_DEFAULT_DIR = Path(__file__).resolve().parents[3] / "tests" / "cassettes"
+_TEXT_SCHEMA = "_text"
+
+
+class CassetteMissError(LookupError):
+    """Replay mode found no cassette for a request."""
+
+
+def cassette_mode() -> str:
+    mode = (os.getenv("LLM_CASSETTE_MODE") or "off").strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"LLM_CASSETTE_MODE must be one of {', '.join(MODES)}, got {mode!r}")
+    return mode
+
+
+def cassette_dir() -> Path:
+    return Path(os.getenv("LLM_CASSETTE_DIR") or _DEFAULT_DIR)
+
+
+def _text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, list):
+        content = "\n".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return " ".join(str(content).split())
+
+
+def _normalize(messages: Any) -> list[dict[str, str]]:
+    if isinstance(messages, str):
+        messages = [HumanMessage(content=messages)]
+    return [{"role": m.type, "text": _text(m)} for m in messages]
+
+
+def _schema_name(schema: Any) -> str:
+    if isinstance(schema, type):
+        return schema.__name__
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+def cassette_key(schema_name: str, messages: list[dict[str, str]]) -> str:
+    payload = json.dumps({"schema": schema_name, "messages": messages}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _path(schema_name: str, key: str) -> Path:
+    return cassette_dir() / schema_name / f"{key}.json"
+
+
+def _load(schema_name: str, messages: list[dict[str, str]]) -> dict[str, Any]:
+    path = _path(schema_name, cassette_key(schema_name, messages))
+    if not path.exists():
+        preview = messages[-1]["text"][:80] if messages else ""
+        raise CassetteMissError(
+            f"No cassette for {schema_name} request {preview!r} ({path.name}); "
+            "re-record with LLM_CASSETTE_MODE=record"
+        )
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _save(schema_name: str, messages: list[dict[str, str]], response: Any, usage: Optional[dict]) -> None:
+    path = _path(schema_name, cassette_key(schema_name, messages))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record = {"schema": schema_name, "messages": messages, "response": response, "usage": usage or {}}
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(record, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class CassetteChatModel(BaseChatModel):
+    """Wraps a chat model (or nothing, in replay mode) with cassette record/replay."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: Optional[BaseChatModel] = None
+    mode: str = "replay"
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    def _require_inner(self) -> BaseChatModel:
+        if self.inner is None:
+            raise CassetteMissError("No provider client in replay mode")
+        return self.inner
+
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        normalized = _normalize(messages)
+        if self.mode == "replay":
+            record = _load(_TEXT_SCHEMA, normalized)
+            message = AIMessage(content=record["response"], usage_metadata=record["usage"] or None)
+        else:
+            message = self._require_inner().invoke(messages, stop=stop, **kwargs)
+            _save(_TEXT_SCHEMA, normalized, message.content, getattr(message, "usage_metadata", None))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def with_structured_output(self, schema: Any, *, include_raw: bool = False, **kwargs: Any) -> Runnable:
+        name = _schema_name(schema)
+
+        def _parse(data: Any) -> Any:
+            return schema.model_validate(data) if isinstance(schema, type) and issubclass(schema, BaseModel) else data
+
+        def _invoke(messages: Any) -> Any:
+            normalized = _normalize(messages)
+            if self.mode == "replay":
+                record = _load(name, normalized)
+                raw = AIMessage(content=json.dumps(record["response"]), usage_metadata=record["usage"] or None)
+                parsed = _parse(record["response"])
+            else:
+                result = self._require_inner().with_structured_output(schema, include_raw=True, **kwargs).invoke(messages)
+                raw, parsed = result.get("raw"), result.get("parsed")
+                if result.get("parsing_error") or parsed is None:
+                    # Failed calls are not recorded, so a replay never bakes in a transient error
+                    return result if include_raw else _parse(parsed)
+                response = parsed.model_dump(mode="json") if isinstance(parsed, BaseModel) else parsed
+                _save(name, normalized, response, getattr(raw, "usage_metadata", None))
+            if include_raw:
+                return {"raw": raw, "parsed": parsed, "parsing_error": None}
+            return parsed
+
+        return RunnableLambda(_invoke)
+
+
+def wrap(client: Optional[BaseChatModel], mode: Optional[str] = None) -> Optional[BaseChatModel]:
+    """Apply the cassette mode to client. In replay mode client may be None."""
+    mode = mode or cassette_mode()
+    if mode == "off":
+        return client
+    return CassetteChatModel(inner=client, mode=mode)
@@ -11,6 +11,7 @@ from email_assistant.src.integrations.config_loader import load_mcp_config
 def get_cohere_llm(
     model: Optional[str] = None,
     temperature: float = 0.7,
+    timeout: Optional[float] = None,
 ) -> ChatCohere:
     """Create Cohere Chat model for fallback. Uses config or env."""
     config = load_mcp_config()
@@ -22,4 +23,5 @@ def get_cohere_llm(
         model=model_name,
         temperature=temperature,
         api_key=api_key,
+        timeout_seconds=timeout,
     )
@@ -1,34 +1,61 @@
 """Load MCP/routing configuration."""
 
 import os
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
 import yaml
 
+# (mtime_ns, parsed contents) of mcp.yaml, re-read only when the file changes
+_file_cache: Optional[tuple[int, dict[str, Any]]] = None
+_file_cache_lock = threading.Lock()
 
-def load_mcp_config() -> dict[str, Any]:
-    """Load config from mcp.yaml. Falls back to env and defaults."""
+# Top-level keys that environment variables override
+_ENV_OVERRIDES = {"primary_model": "PRIMARY_MODEL", "primary_provider": "PRIMARY_PROVIDER"}
+
+
+def _config_path() -> Path:
+    base = Path(__file__).resolve().parent.parent.parent.parent
+    return base / "config" / "mcp.yaml"
+
+
+def _read_config_file() -> dict[str, Any]:
+    global _file_cache
+    config_path = _config_path()
+    try:
+        mtime = config_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    with _file_cache_lock:
+        if _file_cache is None or _file_cache[0] != mtime:
+            with open(config_path) as f:
+                _file_cache = (mtime, yaml.safe_load(f) or {})
+        return _file_cache[1]
+
+
+def env_overrides() -> dict[str, str]:
+    """Top-level config keys set from the environment (PRIMARY_MODEL, PRIMARY_PROVIDER)."""
+    return {key: os.environ[var] for key, var in _ENV_OVERRIDES.items() if os.getenv(var)}
+
+
+def load_mcp_config(apply_env: bool = True) -> dict[str, Any]:
+    """Load config from mcp.yaml. Falls back to env and defaults.
+
+    The file is parsed once and re-read only when its mtime changes; env
+    overrides are applied on every call unless apply_env is False.
+    """
     config: dict[str, Any] = {
         "primary_model": "gpt-4o-mini",
         "primary_provider": "openai",
         "fallback_model": None,
         "fallback_provider": None,
         "max_retries": 2,
+        "intent_local_threshold": 0.75,
     }
 
-    # Try to find mcp.yaml relative to project root
-    base = Path(__file__).resolve().parent.parent.parent.parent
-    config_path = base / "config" / "mcp.yaml"
-    if config_path.exists():
-        with open(config_path) as f:
-            file_config = yaml.safe_load(f) or {}
-        config.update({k: v for k, v in file_config.items() if v is not None})
-
-    # Env overrides
-    if os.getenv("PRIMARY_MODEL"):
-        config["primary_model"] = os.getenv("PRIMARY_MODEL")
-    if os.getenv("PRIMARY_PROVIDER"):
-        config["primary_provider"] = os.getenv("PRIMARY_PROVIDER")
+    config.update({k: v for k, v in _read_config_file().items() if v is not None})
 
+    if apply_env:
+        config.update(env_overrides())
     return config
@@ -1,58 +1,206 @@
-"""LLM factory for primary and fallback models."""
+"""LLM factory for primary and fallback models.
+
+Each pipeline node can override the model in the ``nodes:`` section of
+mcp.yaml (``provider``, ``model``, ``temperature``, ``timeout_s``,
+``fallback_provider``, ``fallback_model``); unset keys fall back to the
+top-level ``primary_*`` / ``fallback_*`` values and the caller's temperature.
+``invoke_structured`` retries a failed call on the fallback model only for
+nodes whose entry names a ``fallback_model``.
+"""
 
 import os
-from typing import Optional, Type
+import time
+from functools import lru_cache
+from typing import Any, Optional, Type, TypeVar
 
 from langchain_core.language_models import BaseChatModel
+from pydantic import BaseModel
 
-from email_assistant.src.integrations.config_loader import load_mcp_config
+from email_assistant.src.integrations.cassette import cassette_mode, wrap
+from email_assistant.src.integrations.config_loader import env_overrides, load_mcp_config
 from email_assistant.src.integrations.openai_client import get_openai_llm
+from email_assistant.src.observability.metrics import get_metrics
+from email_assistant.src.observability.usage import cost_usd, economy_mode, economy_settings, record_call
+from email_assistant.src.prompts.registry import PromptTemplate
+
+_T = TypeVar("_T", bound=BaseModel)
+
+
+_API_KEY_ENV: dict[str, Optional[str]] = {
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+    "cohere": "COHERE_API_KEY",
+    "stub": None,
+}
 
 
-def get_llm(temperature: float = 0.7) -> BaseChatModel:
-    """Return primary LLM based on config."""
-    config = load_mcp_config()
-    provider = config.get("primary_provider", "openai")
-    model = config.get("primary_model", "gpt-4o-mini")
+@lru_cache(maxsize=32)
+def _client(provider: str, model: str, temperature: float, api_key: Optional[str], timeout: Optional[float] = None) -> BaseChatModel:
+    """Build a chat model once per (provider, model, temperature, key, timeout).
 
-    if provider == "openai":
-        return get_openai_llm(model=model, temperature=temperature)
+    Chat models hold their HTTP connection pool, so reusing one instance per
+    process keeps connections warm across requests. The API key is part of the
+    key so a rotated key gets a fresh client.
+    """
     if provider == "anthropic":
         from langchain_anthropic import ChatAnthropic
 
-        api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY required when primary_provider is anthropic")
-        return ChatAnthropic(model=model, temperature=temperature, api_key=api_key)
+        return ChatAnthropic(model=model, temperature=temperature, api_key=api_key, timeout=timeout)
     if provider == "cohere":
         from email_assistant.src.integrations.cohere_client import get_cohere_llm
 
-        return get_cohere_llm(model=model, temperature=temperature)
+        return get_cohere_llm(model=model, temperature=temperature, timeout=timeout)
+    if provider == "stub":
+        from email_assistant.src.integrations.stub_client import get_stub_llm
+
+        return get_stub_llm(model=model, temperature=temperature, timeout=timeout)
+    return get_openai_llm(model=model, temperature=temperature, timeout=timeout)
+
+
+def _get_client(provider: str, model: str, temperature: float, timeout: Optional[float] = None) -> BaseChatModel:
+    """Pooled client for provider, wrapped for LLM_CASSETTE_MODE (see cassette.py)."""
+    mode = cassette_mode()
+    if mode == "replay":
+        # Replay never reaches a provider, so no client or API key is needed
+        return wrap(None, mode)
+    provider = provider if provider in _API_KEY_ENV else "openai"
+    env = _API_KEY_ENV[provider]
+    timeout = float(timeout) if timeout is not None else None
+    return wrap(_client(provider, model, temperature, os.getenv(env) if env else None, timeout), mode)
+
+
+def _node_overrides(node: Optional[str]) -> dict[str, Any]:
+    return ((load_mcp_config().get("nodes") or {}).get(node) or {}) if node else {}
+
+
+def node_settings(node: Optional[str], temperature: float = 0.7) -> dict[str, Any]:
+    """Model settings for node: its ``nodes:`` entry over the top-level config.
+
+    A node's ``model`` belongs to its provider (the entry's ``provider``, else
+    the YAML ``primary_provider``) and is only used while that provider is in
+    effect. ``PRIMARY_PROVIDER`` and ``PRIMARY_MODEL`` win over node entries.
+    """
+    config = load_mcp_config(apply_env=False)
+    env = env_overrides()
+    overrides = _node_overrides(node)
+    node_provider = overrides.get("provider") or config.get("primary_provider", "openai")
+    provider = env.get("primary_provider") or node_provider
+    node_model = overrides.get("model") if provider == node_provider else None
+    settings = {
+        "provider": provider,
+        "model": env.get("primary_model") or node_model or config.get("primary_model", "gpt-4o-mini"),
+        "temperature": temperature,
+        "timeout_s": None,
+        "fallback_provider": config.get("fallback_provider"),
+        "fallback_model": config.get("fallback_model"),
+    }
+    settings.update(
+        {k: v for k, v in overrides.items() if k in settings and k not in ("provider", "model") and v is not None}
+    )
+    return settings
+
+
+def get_llm(temperature: float = 0.7, node: Optional[str] = None) -> BaseChatModel:
+    """Return the LLM for node (primary LLM if node has no override). Instances are pooled per process.
 
-    return get_openai_llm(model=model, temperature=temperature)
+    In a request running in budget economy mode (see usage.py) the configured
+    ``budgets.economy_model`` is returned instead, if there is one.
+    """
+    settings = node_settings(node, temperature)
+    provider, model = settings["provider"], settings["model"]
+    if economy_mode():
+        economy = economy_settings()
+        if economy["economy_model"]:
+            get_metrics().increment("budget.economy_model_calls")
+            provider = economy["economy_provider"] or provider
+            model = economy["economy_model"]
+    return _get_client(provider, model, settings["temperature"], settings["timeout_s"])
 
 
-def get_fallback_llm(temperature: float = 0.7) -> Optional[BaseChatModel]:
-    """Return fallback LLM if configured and API key is available."""
-    config = load_mcp_config()
-    provider = config.get("fallback_provider")
-    model = config.get("fallback_model")
-    if not provider or not model:
+def get_fallback_llm(temperature: float = 0.7, node: Optional[str] = None) -> Optional[BaseChatModel]:
+    """Return the fallback LLM for node if configured and its API key is available."""
+    settings = node_settings(node, temperature)
+    provider = settings["fallback_provider"]
+    model = settings["fallback_model"]
+    if not provider or not model or provider not in _API_KEY_ENV:
+        return None
+    env = _API_KEY_ENV[provider]
+    if env and not os.getenv(env):
         return None
     try:
-        if provider == "openai":
-            return get_openai_llm(model=model, temperature=temperature)
-        if provider == "anthropic":
-            from langchain_anthropic import ChatAnthropic
-
-            api_key = os.getenv("ANTHROPIC_API_KEY")
-            if not api_key:
-                return None
-            return ChatAnthropic(model=model, temperature=temperature, api_key=api_key)
-        if provider == "cohere":
-            from email_assistant.src.integrations.cohere_client import get_cohere_llm
-
-            return get_cohere_llm(model=model, temperature=temperature)
+        return _get_client(provider, model, settings["temperature"], settings["timeout_s"])
     except (ValueError, ImportError):
-        pass
-    return None
+        return None
+
+
+def _supports_cache_hints(llm: Any) -> bool:
+    """Only Anthropic needs (and accepts) explicit cache_control blocks; OpenAI caches prefixes automatically."""
+    return type(getattr(llm, "inner", None) or llm).__name__ == "ChatAnthropic"
+
+
+def _model_name(llm: Any) -> str:
+    model = getattr(llm, "inner", None) or llm
+    return str(getattr(model, "model_name", None) or getattr(model, "model", None) or "unknown")
+
+
+def _invoke_once(llm: BaseChatModel, schema: Type[_T], template: PromptTemplate, node: str, variables: dict[str, Any]) -> _T:
+    messages = template.render(cache_hints=_supports_cache_hints(llm), **variables)
+    runnable = llm.with_structured_output(schema, include_raw=True)
+    start = time.perf_counter()
+    result = runnable.invoke(messages)
+    latency = time.perf_counter() - start
+
+    usage = getattr(result.get("raw"), "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    input_tokens = usage.get("input_tokens", 0)
+    output_tokens = usage.get("output_tokens", 0)
+    cached_tokens = details.get("cache_read", 0) or 0
+    model = _model_name(llm)
+    cost = cost_usd(model, input_tokens, output_tokens, cached_tokens)
+    if cost is None:
+        get_metrics().increment("metering.unpriced_calls")
+    get_metrics().record_llm_call(
+        node,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cached_tokens=cached_tokens,
+        latency_s=latency,
+        model=model,
+        cost_usd=cost or 0.0,
+    )
+    record_call(node, model, input_tokens, output_tokens, cached_tokens, cost or 0.0)
+    if result.get("parsing_error"):
+        raise result["parsing_error"]
+    if result.get("parsed") is None:
+        raise ValueError(f"{node}: LLM returned no structured output")
+    return result["parsed"]
+
+
+def invoke_structured(
+    llm: BaseChatModel,
+    schema: Type[_T],
+    template: PromptTemplate,
+    node: Optional[str] = None,
+    **variables: Any,
+) -> _T:
+    """Render template, call llm for structured output and record usage for the node.
+
+    Token counts, cached input tokens, latency, model and cost are taken from
+    the raw response and recorded under ``node`` (defaults to the template
+    name), and metered against the current user (see usage.py). If the call
+    fails and the node has a fallback model, the call is retried once on it.
+    """
+    node = node or template.name
+    try:
+        return _invoke_once(llm, schema, template, node, variables)
+    except Exception:
+        if not _node_overrides(node).get("fallback_model"):
+            raise
+        temperature = getattr(getattr(llm, "inner", None) or llm, "temperature", None)
+        fallback = get_fallback_llm(temperature if temperature is not None else 0.7, node=node)
+        if fallback is None or fallback is llm:
+            raise
+        get_metrics().increment(f"llm.fallback.{node}")
+        return _invoke_once(fallback, schema, template, node, variables)
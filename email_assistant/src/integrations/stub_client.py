@@ -0,0 +1,178 @@
+"""Offline stub chat model for local runs, load tests and server tests.
+
+Select it with ``primary_provider: stub`` in mcp.yaml (or
+``PRIMARY_PROVIDER=stub``). Structured-output calls return a deterministic
+instance of the requested schema built from the prompt, with fake token usage,
+after an optional simulated latency (``stub_latency_ms`` in mcp.yaml or the
+``STUB_LLM_LATENCY_MS`` env var). No network access or API key is needed.
+
+The latency is either a fixed number of milliseconds or a distribution spec
+(see ``latency_sampler``), e.g. ``lognormal:600,0.4``. In-process callers such
+as the load tester can also install a sampler with ``set_latency_sampler``.
+"""
+
+import os
+import random
+import re
+import time
+import typing
+from typing import Any, Callable, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from email_assistant.src.integrations.config_loader import load_mcp_config
+from email_assistant.src.nlp.text import estimate_tokens
+
+_TONES = ("formal", "casual", "assertive", "friendly", "professional")
+_LABEL_LINE = re.compile(r"^[\w' ()-]+:(\s|$)")
+_latency_override: Optional[Callable[[], float]] = None
+
+
+def _text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, list):
+        return "\n".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return str(content)
+
+
+def _request_line(human: str) -> str:
+    """First line of the user message that is not a "Label: value" line."""
+    for line in human.splitlines():
+        line = line.strip()
+        if line and not _LABEL_LINE.match(line) and not line.startswith("- "):
+            return line
+    return human.strip()[:200]
+
+
+def _fill(schema: type[BaseModel], human: str) -> BaseModel:
+    """Build a schema instance: defaults where declared, plausible values otherwise."""
+    request = _request_line(human)
+    tone = next((t for t in _TONES if re.search(rf"\b{t}\b", human, re.IGNORECASE)), "professional")
+    values: dict[str, Any] = {}
+    for name, field in schema.model_fields.items():
+        if not field.is_required():
+            continue
+        annotation = field.annotation
+        origin = typing.get_origin(annotation)
+        if name == "subject":
+            values[name] = " ".join(request.split()[:6]).rstrip(".") or "Hello"
+        elif name == "body":
+            values[name] = f"Hello,\n\n{request}\n\nBest regards,"
+        elif name == "prompt":
+            values[name] = request
+        elif name == "tone" or name == "detected_tone":
+            values[name] = tone
+        elif name == "intent":
+            values[name] = "other"
+        elif annotation is bool:
+            values[name] = True
+        elif annotation is float:
+            values[name] = 0.9
+        elif annotation is int:
+            values[name] = 0
+        elif origin is list:
+            values[name] = []
+        else:
+            values[name] = request
+    return schema(**values)
+
+
+class StubChatModel(BaseChatModel):
+    """Deterministic, offline chat model."""
+
+    model_name: str = "stub"
+    temperature: float = 0.0
+    # None reads the configured latency on every call, so it can be changed at runtime
+    latency_s: Optional[float] = None
+    # Calls whose simulated latency exceeds this raise TimeoutError after timeout_s
+    timeout_s: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _sleep(self) -> None:
+        if self.latency_s is not None:
+            latency = self.latency_s
+        elif _latency_override is not None:
+            latency = _latency_override()
+        else:
+            latency = _configured_latency_s()
+        if self.timeout_s is not None and latency > self.timeout_s:
+            time.sleep(self.timeout_s)
+            raise TimeoutError(f"Stub LLM call timed out after {self.timeout_s}s")
+        if latency > 0:
+            time.sleep(latency)
+
+    def _usage(self, messages: list[BaseMessage], output: str) -> dict[str, int]:
+        input_tokens = sum(estimate_tokens(_text(m)) for m in messages)
+        output_tokens = estimate_tokens(output)
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._sleep()
+        text = _request_line(_text(messages[-1])) if messages else ""
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def with_structured_output(self, schema: Any, *, include_raw: bool = False, **kwargs: Any) -> Runnable:
+        def _invoke(messages: Any) -> Any:
+            if isinstance(messages, str):
+                messages = [HumanMessage(content=messages)]
+            self._sleep()
+            human = "\n".join(_text(m) for m in messages if m.type != "system")
+            parsed = _fill(schema, human)
+            raw = AIMessage(content=parsed.model_dump_json(), usage_metadata=self._usage(messages, parsed.model_dump_json()))
+            if include_raw:
+                return {"raw": raw, "parsed": parsed, "parsing_error": None}
+            return parsed
+
+        return RunnableLambda(_invoke)
+
+
+def latency_sampler(spec: str) -> Callable[[], float]:
+    """Parse a latency spec into a function returning seconds.
+
+    Specs (all in milliseconds): ``250`` or ``fixed:250``; ``uniform:100,400``;
+    ``exp:300`` (mean); ``lognormal:600,0.4`` (median, sigma of the log).
+    """
+    kind, _, args = str(spec).strip().partition(":")
+    if not args:
+        kind, args = "fixed", kind
+    try:
+        values = [float(a) for a in args.split(",")]
+        if kind == "fixed":
+            (ms,) = values
+            return lambda: ms / 1000
+        if kind == "uniform":
+            low, high = values
+            return lambda: random.uniform(low, high) / 1000
+        if kind == "exp":
+            (mean,) = values
+            return lambda: random.expovariate(1000 / mean) if mean > 0 else 0.0
+        if kind == "lognormal":
+            median, sigma = values
+            return lambda: median * random.lognormvariate(0.0, sigma) / 1000
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid stub latency spec {spec!r}")
+
+
+def set_latency_sampler(sampler: Optional[Callable[[], float]]) -> None:
+    """Use sampler (returning seconds) for every stub call in this process; None restores the config."""
+    global _latency_override
+    _latency_override = sampler
+
+
+def _configured_latency_s() -> float:
+    spec = os.getenv("STUB_LLM_LATENCY_MS") or load_mcp_config().get("stub_latency_ms") or 0
+    return latency_sampler(spec)()
+
+
+def get_stub_llm(model: Optional[str] = None, temperature: float = 0.0, timeout: Optional[float] = None) -> StubChatModel:
+    """Create the stub model. Simulated latency follows the current config."""
+    return StubChatModel(model_name=model or "stub", temperature=temperature, timeout_s=timeout)
@@ -0,0 +1,296 @@
+"""Durable SQLite job queue for bulk drafting.
+
+Producers enqueue EmailContext payloads; workers (possibly in other processes)
+lease one job at a time. A lease is a visibility timeout: while it is live no
+other worker sees the job, and a worker that dies without finishing simply
+lets the lease expire, after which the job is handed out again. Workers extend
+long-running leases with ``heartbeat``.
+
+A failed attempt is retried after an exponential backoff (with jitter) until
+``max_attempts`` is reached, then the job is marked failed. A lease that
+expires on the last attempt fails the job too (error "lease expired"), so a
+job that keeps killing its worker is not handed out forever. Results and
+errors are stored on the job row and can be read back by job id.
+
+Job states::
+
+    queued -> running -> succeeded
+                      -> queued (retry, after backoff) -> ... -> failed
+                      -> running (lease expired, re-leased) -> ... -> failed
+
+Settings come from the ``jobs:`` section of mcp.yaml.
+"""
+
+import json
+import random
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from email_assistant.src.integrations.config_loader import load_mcp_config
+from email_assistant.src.memory.profile_store import data_dir
+from email_assistant.src.models.schemas import EmailContext
+
+_DEFAULTS = {
+    "db_path": None,
+    "lease_s": 120.0,
+    "max_attempts": 3,
+    "backoff_base_s": 2.0,
+    "backoff_max_s": 300.0,
+    "poll_s": 0.5,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_expires_at REAL,
+    leased_by TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+"""
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    id: str
+    status: JobStatus
+    user_id: str
+    context: EmailContext
+    attempts: int
+    max_attempts: int
+    result: Optional[dict[str, Any]]
+    error: Optional[str]
+    created_at: float
+    updated_at: float
+
+    @classmethod
+    def _from_row(cls, row: sqlite3.Row) -> "Job":
+        return cls(
+            id=row["id"],
+            status=JobStatus(row["status"]),
+            user_id=row["user_id"],
+            context=EmailContext.model_validate_json(row["payload"]),
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status.value,
+            "user_id": self.user_id,
+            "context": self.context.model_dump(mode="json"),
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+def queue_settings(**overrides: Any) -> dict[str, Any]:
+    """Defaults, then mcp.yaml ``jobs:`` values, then explicit overrides."""
+    settings = dict(_DEFAULTS)
+    settings.update(load_mcp_config().get("jobs") or {})
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    return settings
+
+
+def default_db_path() -> Path:
+    """``jobs.db_path`` from mcp.yaml, else jobs.sqlite3 next to the profile store."""
+    configured = queue_settings()["db_path"]
+    if configured:
+        return Path(configured)
+    return data_dir() / "jobs.sqlite3"
+
+
+def backoff_s(attempts: int, base_s: float, max_s: float) -> float:
+    """Delay before retry number ``attempts``: exponential, capped, with jitter."""
+    delay = min(max_s, base_s * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobQueue:
+    """One connection to the queue database. Create one per process."""
+
+    def __init__(self, path: Optional[Path] = None, **settings: Any) -> None:
+        self.path = Path(path) if path else default_db_path()
+        self.settings = queue_settings(**settings)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; write transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "JobQueue":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _write(self, sql: str, params: Iterable[Any] = ()) -> sqlite3.Cursor:
+        return self._conn.execute(sql, tuple(params))
+
+    def enqueue(self, context: EmailContext, user_id: str = "default", max_attempts: Optional[int] = None) -> str:
+        return self.enqueue_many([context], user_id=user_id, max_attempts=max_attempts)[0]
+
+    def enqueue_many(
+        self,
+        contexts: Iterable[EmailContext],
+        user_id: str = "default",
+        max_attempts: Optional[int] = None,
+    ) -> list[str]:
+        """Enqueue contexts in one transaction and return their job ids."""
+        now = time.time()
+        attempts = int(max_attempts or self.settings["max_attempts"])
+        rows = [
+            (uuid.uuid4().hex, JobStatus.QUEUED.value, user_id, ctx.model_dump_json(), attempts, now, now, now)
+            for ctx in contexts
+        ]
+        self._write("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "INSERT INTO jobs (id, status, user_id, payload, max_attempts, available_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._write("COMMIT")
+        except BaseException:
+            self._write("ROLLBACK")
+            raise
+        return [row[0] for row in rows]
+
+    def lease(self, worker_id: str, lease_s: Optional[float] = None) -> Optional[Job]:
+        """Claim the oldest ready job (queued, or running with an expired lease and attempts left).
+
+        Running jobs whose lease expired on their last attempt are failed first.
+        """
+        now = time.time()
+        lease_s = float(lease_s or self.settings["lease_s"])
+        self._write("BEGIN IMMEDIATE")
+        try:
+            self._write(
+                "UPDATE jobs SET status = ?, error = ?, leased_by = NULL, lease_expires_at = NULL, updated_at = ?"
+                " WHERE status = ? AND lease_expires_at <= ? AND attempts >= max_attempts",
+                (JobStatus.FAILED.value, "lease expired", now, JobStatus.RUNNING.value, now),
+            )
+            rows = self._write(
+                """
+                UPDATE jobs
+                   SET status = ?, attempts = attempts + 1, leased_by = ?,
+                       lease_expires_at = ?, updated_at = ?
+                 WHERE id = (
+                       SELECT id FROM jobs
+                        WHERE (status = ? AND available_at <= ?)
+                           OR (status = ? AND lease_expires_at <= ?)
+                        ORDER BY available_at
+                        LIMIT 1)
+                RETURNING *
+                """,
+                (
+                    JobStatus.RUNNING.value, worker_id, now + lease_s, now,
+                    JobStatus.QUEUED.value, now, JobStatus.RUNNING.value, now,
+                ),
+            ).fetchall()  # step to completion so the transaction can commit
+            self._write("COMMIT")
+        except BaseException:
+            self._write("ROLLBACK")
+            raise
+        return Job._from_row(rows[0]) if rows else None
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_s: Optional[float] = None) -> bool:
+        """Extend a lease. False if the worker no longer holds it."""
+        now = time.time()
+        lease_s = float(lease_s or self.settings["lease_s"])
+        cur = self._write(
+            "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND status = ? AND leased_by = ?",
+            (now + lease_s, now, job_id, JobStatus.RUNNING.value, worker_id),
+        )
+        return cur.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: dict[str, Any]) -> bool:
+        """Store a result. False (and nothing written) if the lease was lost."""
+        cur = self._write(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, leased_by = NULL, lease_expires_at = NULL,"
+            " updated_at = ? WHERE id = ? AND status = ? AND leased_by = ?",
+            (JobStatus.SUCCEEDED.value, json.dumps(result), time.time(), job_id, JobStatus.RUNNING.value, worker_id),
+        )
+        return cur.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str, permanent: bool = False) -> bool:
+        """Record a failed attempt: requeue after backoff, or fail for good when out of attempts.
+
+        permanent fails the job now, for errors a retry cannot fix.
+        """
+        now = time.time()
+        self._write("BEGIN IMMEDIATE")
+        try:
+            row = self._write(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND leased_by = ?",
+                (job_id, JobStatus.RUNNING.value, worker_id),
+            ).fetchone()
+            if row is None:
+                self._write("COMMIT")
+                return False
+            if permanent or row["attempts"] >= row["max_attempts"]:
+                status, available_at = JobStatus.FAILED, now
+            else:
+                delay = backoff_s(row["attempts"], float(self.settings["backoff_base_s"]), float(self.settings["backoff_max_s"]))
+                status, available_at = JobStatus.QUEUED, now + delay
+            self._write(
+                "UPDATE jobs SET status = ?, error = ?, available_at = ?, leased_by = NULL, lease_expires_at = NULL,"
+                " updated_at = ? WHERE id = ?",
+                (status.value, error, available_at, now, job_id),
+            )
+            self._write("COMMIT")
+        except BaseException:
+            self._write("ROLLBACK")
+            raise
+        return True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job._from_row(row) if row else None
+
+    def counts(self) -> dict[str, int]:
+        """Number of jobs in each state."""
+        counts = {status.value: 0 for status in JobStatus}
+        for row in self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
+
+    def pending(self) -> int:
+        """Jobs not yet in a final state."""
+        counts = self.counts()
+        return counts[JobStatus.QUEUED.value] + counts[JobStatus.RUNNING.value]
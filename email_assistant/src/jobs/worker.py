@@ -0,0 +1,126 @@
+"""Queue workers: lease a job, run the pipeline, write the result back.
+
+``run_workers`` starts N processes, each with its own queue connection and
+its own pipeline (graph, LLM clients), so throughput scales with processes
+rather than contending on one interpreter. SIGINT/SIGTERM stop a worker after
+its current job; a killed worker's job is re-leased once its lease expires.
+"""
+
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from email_assistant.src.jobs.queue import Job, JobQueue
+from email_assistant.src.observability.usage import BudgetExceededError
+
+Runner = Callable[[Job], dict[str, Any]]
+
+
+def run_job(job: Job) -> dict[str, Any]:
+    """Default runner: one pipeline invocation for the job's EmailContext."""
+    from email_assistant.src.workflow.langgraph_flow import invoke, result_payload
+
+    ctx = job.context
+    state = invoke(
+        raw_prompt=ctx.prompt,
+        user_tone=ctx.tone.value,
+        user_recipient=ctx.recipient,
+        user_intent_override=ctx.intent.value if ctx.intent else None,
+        user_id=job.user_id,
+    )
+    payload = result_payload(state)
+    if payload["draft"] is None:
+        # No draft is a failed attempt, so the queue retries it
+        raise RuntimeError("; ".join(payload["errors"]) or "Pipeline produced no draft")
+    return payload
+
+
+def _heartbeat(queue: JobQueue, job_id: str, worker_id: str, lease_s: float, stop: threading.Event) -> None:
+    while not stop.wait(lease_s / 3):
+        if not queue.heartbeat(job_id, worker_id, lease_s):
+            return
+
+
+def work(
+    db_path: Optional[Path] = None,
+    worker_id: Optional[str] = None,
+    runner: Runner = run_job,
+    stop: Optional[threading.Event] = None,
+    max_jobs: Optional[int] = None,
+    exit_when_idle: bool = False,
+    **settings: Any,
+) -> int:
+    """Process jobs until stopped (or idle / max_jobs reached). Returns jobs processed."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    stop = stop or threading.Event()
+    processed = 0
+    with JobQueue(db_path, **settings) as queue:
+        lease_s = float(queue.settings["lease_s"])
+        poll_s = float(queue.settings["poll_s"])
+        while not stop.is_set() and (max_jobs is None or processed < max_jobs):
+            job = queue.lease(worker_id, lease_s)
+            if job is None:
+                if exit_when_idle and queue.pending() == 0:
+                    break
+                stop.wait(poll_s)
+                continue
+            beat_stop = threading.Event()
+            beat = threading.Thread(
+                target=_heartbeat, args=(queue, job.id, worker_id, lease_s, beat_stop), daemon=True
+            )
+            beat.start()
+            try:
+                result = runner(job)
+            except BudgetExceededError as e:
+                # Retrying cannot succeed until the budget period rolls over
+                beat_stop.set()
+                beat.join()
+                queue.fail(job.id, worker_id, f"{type(e).__name__}: {e}", permanent=True)
+            except Exception as e:
+                beat_stop.set()
+                beat.join()
+                queue.fail(job.id, worker_id, f"{type(e).__name__}: {e}")
+            else:
+                beat_stop.set()
+                beat.join()
+                queue.complete(job.id, worker_id, result)
+            processed += 1
+    return processed
+
+
+def _process_main(db_path: Optional[Path], runner: Runner, exit_when_idle: bool, settings: dict[str, Any]) -> None:
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    work(db_path, runner=runner, stop=stop, exit_when_idle=exit_when_idle, **settings)
+
+
+def run_workers(
+    processes: int,
+    db_path: Optional[Path] = None,
+    runner: Runner = run_job,
+    exit_when_idle: bool = False,
+    **settings: Any,
+) -> None:
+    """Run ``processes`` worker processes and wait for them to exit."""
+    procs = [
+        multiprocessing.Process(
+            target=_process_main,
+            args=(db_path, runner, exit_when_idle, settings),
+            name=f"email-worker-{i}",
+        )
+        for i in range(max(1, processes))
+    ]
+    for proc in procs:
+        proc.start()
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        # Children got the same SIGINT; give them time to finish their current job
+        for proc in procs:
+            proc.join()
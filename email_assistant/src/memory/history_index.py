@@ -0,0 +1,342 @@
+"""On-disk BM25 index over a user's full conversation history.
+
+Each user gets a directory with:
+
+- ``turns.jsonl``    -- every ConversationTurn ever recorded (never trimmed)
+- ``postings.jsonl`` -- a generation header, then one line per turn: byte
+  offset into turns.jsonl, document length and term frequencies over
+  prompt + subject + body
+- ``index.npz``      -- inverted index (term -> doc ids and term frequencies,
+  CSR layout) over a prefix of postings.jsonl, replaced atomically
+
+Adding a turn appends one line to each jsonl file. Readers load ``index.npz``
+and parse only the postings appended after the prefix it covers, then only
+the bytes appended since their last refresh, so other processes' writes are
+picked up incrementally. Once ``_SEGMENT_TAIL_DOCS`` turns sit outside the
+persisted index, the reader that notices folds them in and rewrites it, so a
+cold process never parses more than that many postings lines.
+
+``clear`` starts a new generation (a fresh header with a random id). Readers
+compare it on every refresh, so a cached index is never extended with bytes
+from a rewritten file even when the new file has grown past the old read
+position. At most ``_MAX_CACHED_USERS`` users are held in memory; evicted
+users reload from ``index.npz``. Scoring is vectorized with NumPy over
+per-term posting arrays.
+"""
+
+import json
+import math
+import os
+import tempfile
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Iterator, Optional
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from email_assistant.src.models.schemas import ConversationTurn
+from email_assistant.src.nlp.text import tokenize
+
+_K1 = 1.2
+_B = 0.75
+_SEGMENT_TAIL_DOCS = 256
+_MAX_CACHED_USERS = 64
+
+
+@contextmanager
+def _locked(path: Path, shared: bool = False) -> Iterator[None]:
+    with open(path, "ab") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _header() -> bytes:
+    return json.dumps({"generation": uuid.uuid4().hex}).encode("utf-8") + b"\n"
+
+
+def _read_generation(f: IO[bytes]) -> str:
+    """Generation id from the postings header; "" for files written before headers existed."""
+    f.seek(0)
+    try:
+        return str(json.loads(f.readline()).get("generation", ""))
+    except (ValueError, AttributeError):
+        return ""
+
+
+def _empty(dtype: type) -> np.ndarray:
+    return np.zeros(0, dtype=dtype)
+
+
+@dataclass
+class _UserIndex:
+    """In-memory view of one user's index: the persisted segment plus postings read after it."""
+
+    generation: str = ""
+    read_pos: int = 0
+    offsets: list[int] = field(default_factory=list)
+    lengths: list[int] = field(default_factory=list)
+    # Segment: rows ptr[vocab[term]]:ptr[vocab[term] + 1] of seg_docs/seg_tfs
+    segment_docs: int = 0
+    vocab: dict[str, int] = field(default_factory=dict)
+    ptr: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.int64))
+    seg_docs: np.ndarray = field(default_factory=lambda: _empty(np.int64))
+    seg_tfs: np.ndarray = field(default_factory=lambda: _empty(np.float64))
+    # Postings read after the segment
+    tail: dict[str, list[tuple[int, int]]] = field(default_factory=dict)
+    # Lazily built NumPy views, dropped whenever new postings are read
+    arrays: dict[str, tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)
+    length_array: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_segment(cls, data: "np.lib.npyio.NpzFile") -> "_UserIndex":
+        offsets = data["offsets"].tolist()
+        return cls(
+            generation=str(data["generation"]),
+            read_pos=int(data["read_pos"]),
+            offsets=offsets,
+            lengths=data["lengths"].tolist(),
+            segment_docs=len(offsets),
+            vocab={term: row for row, term in enumerate(data["terms"].tolist())},
+            ptr=data["ptr"],
+            seg_docs=data["docs"],
+            seg_tfs=data["tfs"],
+        )
+
+    @property
+    def tail_docs(self) -> int:
+        return len(self.offsets) - self.segment_docs
+
+    def has_term(self, term: str) -> bool:
+        return term in self.vocab or term in self.tail
+
+    def ingest(self, line: bytes) -> None:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return  # torn line from a crash mid-append
+        if "tf" not in entry:
+            return  # generation header
+        doc = len(self.offsets)
+        self.offsets.append(entry["offset"])
+        self.lengths.append(entry["len"])
+        for term, tf in entry["tf"].items():
+            self.tail.setdefault(term, []).append((doc, tf))
+            self.arrays.pop(term, None)
+        self.length_array = None
+
+    def term_arrays(self, term: str) -> tuple[np.ndarray, np.ndarray]:
+        cached = self.arrays.get(term)
+        if cached is None:
+            docs, tfs = [_empty(np.int64)], [_empty(np.float64)]
+            row = self.vocab.get(term)
+            if row is not None:
+                docs.append(self.seg_docs[self.ptr[row] : self.ptr[row + 1]])
+                tfs.append(self.seg_tfs[self.ptr[row] : self.ptr[row + 1]])
+            if term in self.tail:
+                tail_docs, tail_tfs = zip(*self.tail[term])
+                docs.append(np.fromiter(tail_docs, dtype=np.int64))
+                tfs.append(np.fromiter(tail_tfs, dtype=np.float64))
+            cached = (np.concatenate(docs), np.concatenate(tfs))
+            self.arrays[term] = cached
+        return cached
+
+    def fold_tail(self) -> dict[str, np.ndarray]:
+        """Merge the tail into the segment and return the arrays to persist."""
+        terms = list(self.vocab) + [t for t in self.tail if t not in self.vocab]
+        rows = {term: row for row, term in enumerate(terms)}
+        tail = [(rows[term], doc, tf) for term, postings in self.tail.items() for doc, tf in postings]
+        tail_rows, tail_docs, tail_tfs = (np.asarray(col) for col in zip(*tail)) if tail else (_empty(np.int64),) * 3
+        all_rows = np.concatenate([np.repeat(np.arange(len(self.vocab)), np.diff(self.ptr)), tail_rows]).astype(np.int64)
+        all_docs = np.concatenate([self.seg_docs, tail_docs]).astype(np.int64)
+        all_tfs = np.concatenate([self.seg_tfs, tail_tfs]).astype(np.float64)
+        order = np.lexsort((all_docs, all_rows))
+        self.ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(all_rows, minlength=len(terms)), out=self.ptr[1:])
+        self.vocab, self.seg_docs, self.seg_tfs = rows, all_docs[order], all_tfs[order]
+        self.segment_docs, self.tail = len(self.offsets), {}
+        return {
+            "generation": np.array(self.generation),
+            "read_pos": np.array(self.read_pos),
+            "terms": np.array(terms, dtype=str),
+            "ptr": self.ptr,
+            # Narrow dtypes halve the bytes a cold reader loads
+            "docs": self.seg_docs.astype(np.int32),
+            "tfs": self.seg_tfs.astype(np.float32),
+            "offsets": np.asarray(self.offsets, dtype=np.int64),
+            "lengths": np.asarray(self.lengths, dtype=np.int64),
+        }
+
+
+class HistoryIndex:
+    """BM25 retrieval over every turn a user has recorded, stored under root."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._cache: OrderedDict[str, _UserIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _user_dir(self, user_id: str) -> Path:
+        return self.root / quote(user_id, safe="")
+
+    def add(self, user_id: str, turn: ConversationTurn) -> None:
+        """Append a turn and its postings. O(length of the turn)."""
+        user_dir = self._user_dir(user_id)
+        user_dir.mkdir(parents=True, exist_ok=True)
+        terms = tokenize(f"{turn.prompt} {turn.subject} {turn.body}")
+        with _locked(user_dir / "postings.jsonl"):
+            with open(user_dir / "turns.jsonl", "ab") as turns:
+                offset = turns.seek(0, os.SEEK_END)
+                turns.write(json.dumps(turn.model_dump(mode="json")).encode("utf-8") + b"\n")
+            posting = {"offset": offset, "len": len(terms), "tf": dict(Counter(terms))}
+            with open(user_dir / "postings.jsonl", "ab") as postings:
+                if postings.seek(0, os.SEEK_END) == 0:
+                    postings.write(_header())
+                postings.write(json.dumps(posting).encode("utf-8") + b"\n")
+
+    def clear(self, user_id: str) -> None:
+        """Forget a user's entire history."""
+        user_dir = self._user_dir(user_id)
+        if not user_dir.exists():
+            return
+        with _locked(user_dir / "postings.jsonl"):
+            with open(user_dir / "turns.jsonl", "r+b") as f:
+                f.truncate()
+            with open(user_dir / "postings.jsonl", "r+b") as f:
+                f.truncate()
+                f.write(_header())
+            (user_dir / "index.npz").unlink(missing_ok=True)
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def users(self) -> list[str]:
+        """IDs of users with a history directory."""
+        if not self.root.exists():
+            return []
+        return sorted(unquote(p.name) for p in self.root.iterdir() if p.is_dir())
+
+    def iter_turns(self, user_id: str) -> Iterator[dict]:
+        """Stream a user's raw turn records in insertion order."""
+        path = self._user_dir(user_id) / "turns.jsonl"
+        if not path.exists():
+            return
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def _load(self, user_dir: Path, generation: str) -> _UserIndex:
+        """Start from the persisted segment if it belongs to the current generation."""
+        try:
+            with np.load(user_dir / "index.npz", allow_pickle=False) as data:
+                if str(data["generation"]) == generation:
+                    return _UserIndex.from_segment(data)
+        except (OSError, ValueError, KeyError):
+            pass  # missing, or torn by a crash before the rename
+        return _UserIndex(generation=generation)
+
+    def _persist(self, user_dir: Path, index: _UserIndex) -> None:
+        """Fold the tail into the segment and write it atomically. Failures only cost speed."""
+        arrays = index.fold_tail()
+        fd, tmp_name = tempfile.mkstemp(dir=user_dir, prefix=".index.", suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_name, user_dir / "index.npz")
+        except OSError:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+
+    def _refresh(self, user_id: str) -> Optional[_UserIndex]:
+        user_dir = self._user_dir(user_id)
+        try:
+            f = open(user_dir / "postings.jsonl", "rb")
+        except FileNotFoundError:
+            return None
+        with f, self._lock:
+            generation = _read_generation(f)
+            size = f.seek(0, os.SEEK_END)
+            index = self._cache.get(user_id)
+            if index is None or index.generation != generation or size < index.read_pos:
+                index = self._load(user_dir, generation)
+            if size > index.read_pos:
+                f.seek(index.read_pos)
+                chunk = f.read(size - index.read_pos)
+                # Only consume complete lines; a concurrent writer may be mid-append
+                end = chunk.rfind(b"\n") + 1
+                for line in chunk[:end].splitlines():
+                    index.ingest(line)
+                index.read_pos += end
+            if index.tail_docs >= _SEGMENT_TAIL_DOCS:
+                self._persist(user_dir, index)
+            self._cache[user_id] = index
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > _MAX_CACHED_USERS:
+                self._cache.popitem(last=False)
+            return index
+
+    def size(self, user_id: str) -> int:
+        """Number of indexed turns for the user."""
+        index = self._refresh(user_id)
+        return len(index.offsets) if index else 0
+
+    def search(self, user_id: str, query: str, k: int = 3) -> list[ConversationTurn]:
+        """Return up to k turns ranked by BM25 relevance to query, best first."""
+        index = self._refresh(user_id)
+        if index is None or not index.offsets or k <= 0:
+            return []
+        with self._lock:
+            terms = [t for t in set(tokenize(query)) if index.has_term(t)]
+            if not terms:
+                return []
+            n_docs = len(index.offsets)
+            if index.length_array is None:
+                index.length_array = np.asarray(index.lengths, dtype=np.float64)
+            lengths = index.length_array
+            avg_len = float(lengths.mean()) or 1.0
+            scores = np.zeros(n_docs, dtype=np.float64)
+            for term in terms:
+                docs, tfs = index.term_arrays(term)
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                norm = _K1 * (1 - _B + _B * lengths[docs] / avg_len)
+                scores[docs] += idf * tfs * (_K1 + 1) / (tfs + norm)
+            offsets, generation = index.offsets, index.generation
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        turns = []
+        user_dir = self._user_dir(user_id)
+        # Hold off clear() (which takes the lock exclusively) while reading by offset
+        with _locked(user_dir / "postings.jsonl", shared=True):
+            with open(user_dir / "postings.jsonl", "rb") as postings:
+                if _read_generation(postings) != generation:
+                    return []  # cleared since the lookup; the offsets point into another file
+            with open(user_dir / "turns.jsonl", "rb") as f:
+                for doc in top:
+                    f.seek(offsets[doc])
+                    try:
+                        turns.append(ConversationTurn(**json.loads(f.readline())))
+                    except ValueError:
+                        continue  # torn line from a crash mid-append
+        return turns
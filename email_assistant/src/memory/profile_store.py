@@ -1,18 +1,133 @@
-"""User profile store - load/save profiles and append drafts."""
+"""User profile store - load/save profiles and append drafts.
+
+Writes are safe across processes: every write goes to a temp file that is
+atomically renamed over ``user_profiles.json`` while an advisory lock is held,
+and each profile carries a ``version`` that is checked (compare-and-swap)
+before it is replaced. Read-modify-write helpers retry on version conflicts.
+
+Drafts and conversation turns are not written into the snapshot directly.
+They are appended to a per-user JSONL turn log (``turn_logs/<user>.jsonl``),
+which keeps appends O(1). ``compact`` folds the log into the snapshot and
+applies the retention limits; it runs in the background once a log grows past
+``_COMPACT_THRESHOLD_BYTES``. Entries carry a per-log sequence number (the
+``ts`` field), allocated under the log's file lock, and the snapshot records
+the newest folded one (``log_watermark``), so folding is idempotent and
+readers can merge un-compacted entries on the fly. Compaction always leaves
+the newest sequence number in the log, so numbering never restarts below the
+watermark.
+
+Finished requests (``record_turn``) are also added to an unbounded BM25
+history index (see history_index.py) used for relevance-based recall.
+
+The store lives next to this module unless ``PROFILE_STORE_DIR`` is set.
+Lock waits and compare-and-swap conflicts are counted in the metrics registry
+(``profile_store.*``) so contention shows up under load.
+"""
 
 import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import IO, Callable, Iterator, Optional
+from urllib.parse import quote, unquote
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from email_assistant.src.memory.history_index import HistoryIndex
+from email_assistant.src.memory.style_stats import update_stats
 from email_assistant.src.models.schemas import (
     ConversationTurn,
     PriorDraftSummary,
+    StyleStats,
     UserProfile,
 )
+from email_assistant.src.observability.metrics import get_metrics
+
+_MAX_CAS_ATTEMPTS = 10
+_MAX_PRIOR_DRAFTS = 20
+_MAX_CONVERSATION_TURNS = 10
+_COMPACT_THRESHOLD_BYTES = 64 * 1024
+_TAIL_BLOCK_BYTES = 8 * 1024
+_TURN_KINDS = ("conversation", "turn")
+# Lock waits longer than this count as contended
+_CONTENDED_WAIT_S = 0.001
+
+_compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="turn-log-compactor")
+_pending_compactions: set[str] = set()
+_pending_lock = threading.Lock()
+_history_indexes: dict[Path, HistoryIndex] = {}
+
+
+class ProfileVersionConflict(RuntimeError):
+    """Raised when a profile changed on disk since it was loaded."""
 
 
 def _profiles_path() -> Path:
-    return Path(__file__).resolve().parent / "user_profiles.json"
+    root = os.getenv("PROFILE_STORE_DIR")
+    return (Path(root) if root else Path(__file__).resolve().parent) / "user_profiles.json"
+
+
+def data_dir() -> Path:
+    """Directory holding the profile store and other per-deployment local data."""
+    return _profiles_path().parent
+
+
+def _lock_path() -> Path:
+    path = _profiles_path()
+    return path.with_name(path.name + ".lock")
+
+
+def _logs_dir() -> Path:
+    return _profiles_path().parent / "turn_logs"
+
+
+def _log_path(user_id: str) -> Path:
+    return _logs_dir() / f"{quote(user_id, safe='')}.jsonl"
+
+
+def _history_dir() -> Path:
+    return _profiles_path().parent / "history"
+
+
+def _history_index() -> HistoryIndex:
+    root = _history_dir()
+    index = _history_indexes.get(root)
+    if index is None:
+        index = _history_indexes.setdefault(root, HistoryIndex(root))
+    return index
+
+
+@contextmanager
+def _flock(f: IO) -> Iterator[None]:
+    if fcntl is None:
+        yield
+        return
+    start = time.perf_counter()
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    waited = time.perf_counter() - start
+    metrics = get_metrics()
+    metrics.increment("profile_store.lock_acquired")
+    if waited >= _CONTENDED_WAIT_S:
+        metrics.increment("profile_store.lock_contended")
+        metrics.increment("profile_store.lock_wait_us", int(waited * 1_000_000))
+    try:
+        yield
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def _file_lock() -> Iterator[None]:
+    """Hold an exclusive advisory lock on the profile store."""
+    with open(_lock_path(), "a") as lock_file, _flock(lock_file):
+        yield
 
 
 def _load_data() -> dict:
@@ -24,12 +139,55 @@ def _load_data() -> dict:
 
 
 def _save_data(data: dict) -> None:
-    with open(_profiles_path(), "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    """Write the store atomically: temp file in the same directory, then rename."""
+    path = _profiles_path()
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
 
 
-def load_profile(user_id: str) -> Optional[UserProfile]:
-    """Load user profile by ID. Returns None if not found."""
+def _find(profiles: list[dict], user_id: str) -> Optional[int]:
+    for i, p in enumerate(profiles):
+        if p.get("id") == user_id:
+            return i
+    return None
+
+
+def _compare_and_swap(profile: UserProfile, expected_version: int) -> bool:
+    """Replace the stored profile if its version still equals expected_version.
+
+    A profile that does not exist yet counts as version 0. On success the
+    stored copy (and ``profile.version``) is bumped to expected_version + 1.
+    """
+    with _file_lock():
+        data = _load_data()
+        profiles = data.get("profiles", [])
+        idx = _find(profiles, profile.id)
+        current = profiles[idx].get("version", 0) if idx is not None else 0
+        if current != expected_version:
+            return False
+        profile.version = expected_version + 1
+        payload = profile.model_dump(mode="json")
+        if idx is None:
+            profiles.append(payload)
+        else:
+            profiles[idx] = payload
+        data["profiles"] = profiles
+        _save_data(data)
+        return True
+
+
+def _load_snapshot(user_id: str) -> Optional[UserProfile]:
     data = _load_data()
     for p in data.get("profiles", []):
         if p.get("id") == user_id:
@@ -37,30 +195,328 @@ def load_profile(user_id: str) -> Optional[UserProfile]:
     return None
 
 
+def _parse_entries(lines: list[bytes]) -> list[dict]:
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue  # torn line from a crash mid-append
+    return entries
+
+
+def _reverse_entries(f: IO[bytes]) -> Iterator[dict]:
+    """Yield the entries of an open log backwards from its end, newest first."""
+    f.seek(0, os.SEEK_END)
+    pos = f.tell()
+    buf = b""
+    while pos > 0:
+        step = min(_TAIL_BLOCK_BYTES, pos)
+        pos -= step
+        f.seek(pos)
+        buf = f.read(step) + buf
+        lines = buf.split(b"\n")
+        # The first piece may be a partial line until we reach the start of the file
+        buf = lines.pop(0) if pos > 0 else b""
+        yield from reversed(_parse_entries(lines))
+
+
+def _next_seq(user_id: str, f: IO[bytes]) -> int:
+    """Next sequence number for the user's log. The caller must hold the log's lock.
+
+    Continues from the newest entry in the log; an empty log continues from
+    the snapshot's watermark. Unlike a clock, this cannot go backwards across
+    restarts, writer processes or clock steps.
+    """
+    for entry in _reverse_entries(f):
+        return entry.get("ts", 0) + 1
+    snapshot = _load_snapshot(user_id)
+    return (snapshot.log_watermark if snapshot else 0) + 1
+
+
+def _read_log(user_id: str) -> list[dict]:
+    path = _log_path(user_id)
+    if not path.exists():
+        return []
+    with open(path, "rb") as f:
+        return _parse_entries(f.read().splitlines())
+
+
+def _fold(profile: UserProfile, entries: list[dict]) -> bool:
+    """Apply log entries newer than the profile's watermark. Returns True if any applied."""
+    drafts = list(profile.prior_drafts or [])
+    history = list(profile.conversation_history or [])
+    applied = False
+    for entry in entries:
+        ts = entry.get("ts", 0)
+        if ts <= profile.log_watermark:
+            continue
+        if entry.get("kind") == "draft":
+            drafts.append(PriorDraftSummary(**entry["data"]))
+        elif entry.get("kind") == "conversation":
+            history.append(ConversationTurn(**entry["data"]))
+        elif entry.get("kind") == "turn":
+            turn = ConversationTurn(**entry["data"])
+            drafts.append(PriorDraftSummary(subject=turn.subject, intent=turn.intent, tone=turn.tone))
+            history.append(turn)
+            update_stats(profile.style_stats, turn)
+        profile.log_watermark = ts
+        applied = True
+    if applied:
+        profile.prior_drafts = drafts[-_MAX_PRIOR_DRAFTS:]
+        profile.conversation_history = history[-_MAX_CONVERSATION_TURNS:]
+    return applied
+
+
+def _merge_log(user_id: str, profile: Optional[UserProfile]) -> Optional[UserProfile]:
+    """Fold the user's un-compacted log entries into a snapshot copy (None if neither exists)."""
+    entries = _read_log(user_id)
+    if profile is None:
+        if not entries:
+            return None
+        profile = UserProfile(id=user_id)
+    _fold(profile, entries)
+    return profile
+
+
+def load_profile(user_id: str) -> Optional[UserProfile]:
+    """Load user profile by ID, including turns not yet compacted. Returns None if not found."""
+    return _merge_log(user_id, _load_snapshot(user_id))
+
+
 def save_profile(profile: UserProfile) -> None:
-    """Save or update user profile."""
-    data = _load_data()
-    profiles = data.get("profiles", [])
-    updated = False
-    for i, p in enumerate(profiles):
-        if p.get("id") == profile.id:
-            profiles[i] = profile.model_dump(mode="json")
-            updated = True
-            break
-    if not updated:
-        profiles.append(profile.model_dump(mode="json"))
-    data["profiles"] = profiles
-    _save_data(data)
+    """Save or update user profile.
+
+    Raises ProfileVersionConflict if the stored profile was modified after
+    ``profile`` was loaded. Use update_profile for read-modify-write cycles.
+    """
+    if not _compare_and_swap(profile, profile.version):
+        raise ProfileVersionConflict(
+            f"Profile {profile.id!r} changed since version {profile.version} was loaded"
+        )
+
+
+def update_profile(user_id: str, mutate: Callable[[UserProfile], None]) -> UserProfile:
+    """Apply mutate to the latest profile and save it, retrying on conflicts.
+
+    Creates the profile if it does not exist. Returns the saved profile.
+    """
+    for _ in range(_MAX_CAS_ATTEMPTS):
+        profile = load_profile(user_id) or UserProfile(id=user_id)
+        expected = profile.version
+        mutate(profile)
+        if _compare_and_swap(profile, expected):
+            return profile
+        get_metrics().increment("profile_store.cas_conflicts")
+    raise ProfileVersionConflict(
+        f"Gave up updating profile {user_id!r} after {_MAX_CAS_ATTEMPTS} conflicting writes"
+    )
+
+
+def _append_log(user_id: str, kind: str, data: dict) -> None:
+    """Append one entry to the user's turn log and schedule compaction if it is large."""
+    path = _log_path(user_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f, _flock(f):
+        line = json.dumps({"ts": _next_seq(user_id, f), "kind": kind, "data": data}) + "\n"
+        f.write(line.encode("utf-8"))
+        f.flush()
+        size = f.tell()
+    if size >= _COMPACT_THRESHOLD_BYTES:
+        _schedule_compaction(user_id)
+
+
+def _schedule_compaction(user_id: str) -> None:
+    with _pending_lock:
+        if user_id in _pending_compactions:
+            return
+        _pending_compactions.add(user_id)
+
+    def _run() -> None:
+        try:
+            compact(user_id)
+        finally:
+            with _pending_lock:
+                _pending_compactions.discard(user_id)
+
+    _compactor.submit(_run)
+
+
+def compact(user_id: str) -> None:
+    """Fold the user's turn log into the profile snapshot and trim the log.
+
+    Only the newest conversation entries (already folded, so ignored by
+    load_profile) are kept in the log so recent_turns can keep serving reads
+    from the tail.
+    """
+    path = _log_path(user_id)
+    if not path.exists():
+        return
+    with open(path, "r+b") as f, _flock(f):
+        entries = _parse_entries(f.read().splitlines())
+        if not entries:
+            return
+        update_profile(user_id, lambda p: _fold(p, entries))
+        keep = [e for e in entries if e.get("kind") in _TURN_KINDS][-_MAX_CONVERSATION_TURNS:]
+        last_seq = max(e.get("ts", 0) for e in entries)
+        if not keep or keep[-1].get("ts", 0) != last_seq:
+            # Marker so the next append continues numbering above the new watermark
+            keep.append({"ts": last_seq, "kind": "seq"})
+        f.seek(0)
+        f.truncate()
+        f.write(b"".join(json.dumps(e).encode("utf-8") + b"\n" for e in keep))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def compact_all() -> None:
+    """Compact every user's turn log (e.g. from a periodic maintenance job)."""
+    logs_dir = _logs_dir()
+    if not logs_dir.exists():
+        return
+    for path in logs_dir.glob("*.jsonl"):
+        compact(unquote(path.stem))
+
+
+def _tail_entries(path: Path, n: int, kinds: tuple[str, ...]) -> list[dict]:
+    """Read up to n entries of the given kinds backwards from the end of a log, newest first."""
+    found: list[dict] = []
+    with open(path, "rb") as f:
+        for entry in _reverse_entries(f):
+            if entry.get("kind") in kinds:
+                found.append(entry)
+                if len(found) >= n:
+                    break
+    return found
+
+
+def recent_turns(user_id: str, n: int = 3, profile: Optional[UserProfile] = None) -> list[ConversationTurn]:
+    """Return the user's last n conversation turns, oldest first.
+
+    Served from the tail of the turn log; when the log holds fewer than n
+    turns (new or legacy users) they come from profile, or from the store if
+    the caller has no profile loaded.
+    """
+    if n <= 0:
+        return []
+    path = _log_path(user_id)
+    if path.exists():
+        entries = _tail_entries(path, n, _TURN_KINDS)
+        if len(entries) >= n:
+            return [ConversationTurn(**e["data"]) for e in reversed(entries)]
+    profile = profile or load_profile(user_id)
+    if not profile:
+        return []
+    return list(profile.conversation_history[-n:])
+
+
+def profile_from_state(state: dict) -> Optional[UserProfile]:
+    """Return the request-scoped profile snapshot, loading it only if the pipeline did not."""
+    if "profile" in state:
+        return state["profile"]
+    return load_profile(state.get("user_id", "default"))
+
+
+def record_turn(
+    user_id: str,
+    prompt: str,
+    subject: str,
+    body: str,
+    intent: str,
+    tone: str,
+    recipient: Optional[str] = None,
+    retries: int = 0,
+) -> None:
+    """Commit one finished request to memory with a single log append.
+
+    Folds into prior_drafts, conversation_history and style_stats, replacing
+    a paired append_draft + append_conversation.
+    """
+    turn = ConversationTurn(
+        prompt=prompt,
+        subject=subject,
+        body=body,
+        intent=intent,
+        tone=tone,
+        recipient=recipient,
+        retries=retries,
+    )
+    _append_log(user_id, "turn", turn.model_dump(mode="json"))
+    _history_index().add(user_id, turn)
+
+
+def search_history(user_id: str, query: str, k: int = 3) -> Optional[list[ConversationTurn]]:
+    """Return the user's k most relevant past turns for query (BM25, best first).
+
+    Searches the full, untrimmed history. Returns None when the user has no
+    indexed history yet, so callers can fall back to the profile snapshot.
+    """
+    index = _history_index()
+    if index.size(user_id) == 0:
+        return None
+    return index.search(user_id, query, k)
+
+
+def _iter_merged_profiles() -> Iterator[tuple[str, UserProfile]]:
+    """(user_id, merged profile) for every user in the snapshot or with a turn log.
+
+    One pass over the store: the snapshot is parsed once and each turn log read once.
+    """
+    snapshots = {p["id"]: p for p in _load_data().get("profiles", []) if p.get("id")}
+    user_ids = list(snapshots)
+    logs_dir = _logs_dir()
+    if logs_dir.exists():
+        user_ids += [unquote(path.stem) for path in logs_dir.glob("*.jsonl")]
+    for user_id in dict.fromkeys(user_ids):
+        snapshot = snapshots.get(user_id)
+        profile = _merge_log(user_id, UserProfile(**snapshot) if snapshot else None)
+        if profile is not None:
+            yield user_id, profile
+
+
+def _record_key(record: dict) -> str:
+    return json.dumps(record, sort_keys=True)
+
+
+def iter_turn_records() -> Iterator[tuple[str, dict]]:
+    """Stream (user_id, turn dict) for every recorded turn across all users.
+
+    Merges the full-history index (every ``record_turn`` turn) with each user's
+    merged ``conversation_history`` (snapshot plus un-compacted log), which also
+    holds turns the index never saw: ``append_conversation`` turns and history
+    recorded before the index existed. Index records carry no log sequence, so
+    history turns already yielded from the index are skipped by content.
+    Unindexed turns older than the history retention window are not kept anywhere.
+    """
+    index = _history_index()
+    profiles = dict(_iter_merged_profiles())
+    for user_id in dict.fromkeys(index.users() + list(profiles)):
+        seen: dict[str, int] = {}
+        for record in index.iter_turns(user_id):
+            key = _record_key(record)
+            seen[key] = seen.get(key, 0) + 1
+            yield user_id, record
+        profile = profiles.get(user_id)
+        for turn in profile.conversation_history if profile else ():
+            record = turn.model_dump(mode="json")
+            key = _record_key(record)
+            if seen.get(key):
+                seen[key] -= 1
+                continue
+            yield user_id, record
+
+
+def iter_draft_summaries() -> Iterator[tuple[str, dict]]:
+    """Stream (user_id, prior draft dict) from every user's merged profile."""
+    for user_id, profile in _iter_merged_profiles():
+        for draft in profile.prior_drafts:
+            yield user_id, draft.model_dump(mode="json")
 
 
 def append_draft(user_id: str, subject: str, intent: str, tone: str) -> None:
     """Append a draft summary to the user's prior_drafts. Creates profile if needed."""
-    profile = load_profile(user_id)
-    if not profile:
-        profile = UserProfile(id=user_id)
     summary = PriorDraftSummary(subject=subject, intent=intent, tone=tone)
-    profile.prior_drafts = (profile.prior_drafts or [])[-19:] + [summary]  # Keep last 20
-    save_profile(profile)
+    _append_log(user_id, "draft", summary.model_dump(mode="json"))
 
 
 def append_conversation(
@@ -72,10 +528,6 @@ def append_conversation(
     tone: str,
 ) -> None:
     """Append a full conversation turn (prompt + draft) to conversation_history."""
-    profile = load_profile(user_id)
-    if not profile:
-        profile = UserProfile(id=user_id)
-
     turn = ConversationTurn(
         prompt=prompt,
         subject=subject,
@@ -83,18 +535,22 @@ def append_conversation(
         intent=intent,
         tone=tone,
     )
-
-    history = (profile.conversation_history or [])[-9:]  # keep last 10
-    history.append(turn)
-    profile.conversation_history = history
-    save_profile(profile)
+    _append_log(user_id, "conversation", turn.model_dump(mode="json"))
 
 
 def clear_history(user_id: str) -> None:
     """Clear prior drafts and conversation history for a user."""
-    profile = load_profile(user_id)
-    if not profile:
+    if load_profile(user_id) is None:
         return
-    profile.prior_drafts = []
-    profile.conversation_history = []
-    save_profile(profile)
+    path = _log_path(user_id)
+    if path.exists():
+        with open(path, "r+b") as f, _flock(f):
+            f.truncate()
+    _history_index().clear(user_id)
+
+    def _mutate(profile: UserProfile) -> None:
+        profile.prior_drafts = []
+        profile.conversation_history = []
+        profile.style_stats = StyleStats()
+
+    update_profile(user_id, _mutate)
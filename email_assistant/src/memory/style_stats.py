@@ -0,0 +1,49 @@
+"""Incremental style statistics and the local predictions built on them."""
+
+import re
+from typing import Optional
+
+from email_assistant.src.models.schemas import ConversationTurn, StyleStats, ToneType
+
+# Distinct recipients tracked per user; the rarest is evicted beyond this
+_MAX_RECIPIENTS = 50
+# A tone is predicted only with enough history and a clear majority
+_MIN_TURNS_FOR_TONE = 5
+_MIN_TONE_SHARE = 0.6
+
+
+def update_stats(stats: StyleStats, turn: ConversationTurn) -> None:
+    """Fold one turn into the running aggregates in O(1)."""
+    stats.turns += 1
+    stats.tone_counts[turn.tone] = stats.tone_counts.get(turn.tone, 0) + 1
+    stats.intent_counts[turn.intent] = stats.intent_counts.get(turn.intent, 0) + 1
+    words = len(turn.body.split())
+    stats.mean_body_words += (words - stats.mean_body_words) / stats.turns
+    if turn.recipient:
+        key = turn.recipient.strip()
+        counts = stats.recipient_counts
+        counts[key] = counts.get(key, 0) + 1
+        if len(counts) > _MAX_RECIPIENTS:
+            rarest = min((k for k in counts if k != key), key=counts.__getitem__)
+            del counts[rarest]
+
+
+def predict_tone(stats: StyleStats) -> Optional[ToneType]:
+    """Return the user's habitual tone if it is a clear majority, else None."""
+    if stats.turns < _MIN_TURNS_FOR_TONE or not stats.tone_counts:
+        return None
+    tone, count = max(stats.tone_counts.items(), key=lambda kv: kv[1])
+    if count / stats.turns < _MIN_TONE_SHARE:
+        return None
+    try:
+        return ToneType(tone)
+    except ValueError:
+        return None
+
+
+def match_recipient(stats: StyleStats, prompt: str) -> Optional[str]:
+    """Return a recurring recipient named in the prompt, most frequent first."""
+    for recipient, _ in sorted(stats.recipient_counts.items(), key=lambda kv: -kv[1]):
+        if re.search(rf"\b{re.escape(recipient)}\b", prompt, re.IGNORECASE):
+            return recipient
+    return None
@@ -1,7 +1,7 @@
 """Pydantic models for the AI Email Assistant."""
 
 from enum import Enum
-from typing import Optional
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field
 
@@ -88,6 +88,18 @@ class ConversationTurn(BaseModel):
     body: str = Field(..., description="Generated email body")
     intent: str = Field(..., description="Intent at time of generation")
     tone: str = Field(..., description="Tone at time of generation")
+    recipient: Optional[str] = Field(None, description="Recipient at time of generation")
+    retries: int = Field(default=0, description="Review-triggered retries before this draft was final")
+
+
+class StyleStats(BaseModel):
+    """Running per-user aggregates, updated once per recorded turn."""
+
+    turns: int = Field(default=0, description="Number of turns folded into these stats")
+    tone_counts: dict[str, int] = Field(default_factory=dict)
+    intent_counts: dict[str, int] = Field(default_factory=dict)
+    mean_body_words: float = Field(default=0.0, description="Running mean of body length in words")
+    recipient_counts: dict[str, int] = Field(default_factory=dict)
 
 
 class UserProfile(BaseModel):
@@ -97,11 +109,17 @@ class UserProfile(BaseModel):
     name: Optional[str] = Field(None, description="User name")
     company: Optional[str] = Field(None, description="Company name")
     style_preferences: StylePreferences = Field(default_factory=StylePreferences)
+    style_stats: StyleStats = Field(default_factory=StyleStats)
     prior_drafts: list[PriorDraftSummary] = Field(default_factory=list)
     conversation_history: list[ConversationTurn] = Field(
         default_factory=list,
         description="Recent email-generation interactions for contextual memory",
     )
+    version: int = Field(default=0, description="Store revision used for compare-and-swap writes")
+    log_watermark: int = Field(
+        default=0,
+        description="Sequence number of the newest turn-log entry folded into this snapshot",
+    )
 
 
 class ReviewResult(BaseModel):
@@ -110,3 +128,42 @@ class ReviewResult(BaseModel):
     passed: bool = Field(..., description="Whether validation passed")
     suggestions: list[str] = Field(default_factory=list, description="Suggested edits")
     issues: list[str] = Field(default_factory=list, description="Detected issues")
+
+
+class CampaignRecipient(BaseModel):
+    """One row of a mail-merge recipient table."""
+
+    name: str = Field(..., min_length=1, description="Recipient name, fills {{name}}")
+    email: Optional[str] = Field(None, description="Recipient email, fills {{email}}")
+    company: Optional[str] = Field(None, description="Recipient company, fills {{company}}")
+    fields: dict[str, str] = Field(default_factory=dict, description="Custom columns, fill {{column}}")
+    touch_up: bool = Field(default=False, description="Adapt this copy with one LLM call after rendering")
+
+    def slot_values(self) -> dict[str, str]:
+        values = {"name": self.name}
+        if self.email:
+            values["email"] = self.email
+        if self.company:
+            values["company"] = self.company
+        values.update(self.fields)
+        return values
+
+
+class GenerateRequest(BaseModel):
+    """One pipeline request from the HTTP API or a batch file."""
+
+    prompt: str = Field(..., min_length=1, description="What the email should say")
+    tone: str = Field(default="professional", description="ToneType value or 'auto'")
+    recipient: Optional[str] = Field(None, description="Recipient name or email")
+    intent: Optional[str] = Field(None, description="IntentType value overriding detection")
+    user_id: str = Field(default="default", description="Profile used for personalization and memory")
+
+    def invoke_kwargs(self) -> dict[str, Any]:
+        """Keyword arguments for langgraph_flow.invoke/stream."""
+        return {
+            "raw_prompt": self.prompt,
+            "user_tone": self.tone,
+            "user_recipient": self.recipient,
+            "user_intent_override": self.intent,
+            "user_id": self.user_id,
+        }
@@ -0,0 +1 @@
+# Local text processing: tokenization, retrieval, classifiers
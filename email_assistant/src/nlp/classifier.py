@@ -0,0 +1,142 @@
+"""Small n-gram text classifier: vocabulary features + NumPy softmax regression.
+
+Features are word unigrams/bigrams and character trigrams (within words),
+looked up in a vocabulary fixed at training time, with sublinear TF and L2
+normalization. The model is multinomial logistic regression trained by
+full-batch gradient descent over a sparse (COO) design matrix, so training
+memory and time scale with the number of n-grams in the examples rather than
+examples x vocabulary. Prediction featurizes one text and does a single
+sparse dot product, which takes tens of microseconds.
+"""
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from email_assistant.src.nlp.text import tokenize
+
+_MIN_DF = 1
+_MAX_FEATURES = 20_000
+
+
+def _ngrams(text: str) -> Iterable[str]:
+    words = tokenize(text)
+    for w in words:
+        yield "w:" + w
+        padded = f"<{w}>"
+        for i in range(len(padded) - 2):
+            yield "c:" + padded[i : i + 3]
+    for a, b in zip(words, words[1:]):
+        yield f"b:{a} {b}"
+
+
+def _sparse_dot(rows: np.ndarray, cols: np.ndarray, vals: np.ndarray, dense: np.ndarray, n_out: int) -> np.ndarray:
+    """COO matrix (rows, cols, vals) times dense, summed per row into n_out rows. O(nnz x classes)."""
+    weighted = vals[:, None] * dense[cols]
+    return np.stack([np.bincount(rows, weights=weighted[:, j], minlength=n_out) for j in range(dense.shape[1])], axis=1)
+
+
+class TextClassifier:
+    """Multinomial logistic regression over n-gram features."""
+
+    def __init__(self, vocab: dict[str, int], classes: list[str], weights: np.ndarray, bias: np.ndarray) -> None:
+        self.vocab = vocab
+        self.classes = classes
+        self.weights = weights  # (n_features, n_classes)
+        self.bias = bias  # (n_classes,)
+
+    # -- features -----------------------------------------------------------
+
+    def _features(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+        """Sparse (indices, values) feature vector for one text."""
+        counts = Counter(self.vocab[g] for g in _ngrams(text) if g in self.vocab)
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        val = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        return idx, val / np.linalg.norm(val)
+
+    # -- inference ----------------------------------------------------------
+
+    def predict_proba(self, text: str) -> dict[str, float]:
+        """Probability per class label."""
+        idx, val = self._features(text)
+        logits = val @ self.weights[idx] + self.bias
+        logits -= logits.max()
+        probs = np.exp(logits)
+        probs /= probs.sum()
+        return {label: float(p) for label, p in zip(self.classes, probs)}
+
+    def predict(self, text: str) -> tuple[str, float]:
+        """Most likely label and its probability."""
+        probs = self.predict_proba(text)
+        label = max(probs, key=probs.__getitem__)
+        return label, probs[label]
+
+    # -- training -----------------------------------------------------------
+
+    @classmethod
+    def train(
+        cls,
+        texts: list[str],
+        labels: list[str],
+        epochs: int = 300,
+        learning_rate: float = 2.0,
+        l2: float = 1e-4,
+        classes: Optional[list[str]] = None,
+    ) -> "TextClassifier":
+        """Fit on (text, label) pairs. classes fixes the label set and order."""
+        if not texts:
+            raise ValueError("Cannot train a classifier without examples")
+        df = Counter(g for text in texts for g in set(_ngrams(text)))
+        kept = [g for g, n in df.most_common(_MAX_FEATURES) if n >= _MIN_DF]
+        vocab = {g: i for i, g in enumerate(sorted(kept))}
+        classes = classes or sorted(set(labels))
+        class_index = {c: i for i, c in enumerate(classes)}
+
+        model = cls(vocab, classes, np.zeros((len(vocab), len(classes)), dtype=np.float32), np.zeros(len(classes), dtype=np.float32))
+        features = [model._features(text) for text in texts]
+        rows = np.repeat(np.arange(len(texts)), [len(idx) for idx, _ in features])
+        cols = np.concatenate([idx for idx, _ in features])
+        vals = np.concatenate([val for _, val in features])
+        y = np.zeros((len(texts), len(classes)), dtype=np.float32)
+        y[np.arange(len(texts)), [class_index[label] for label in labels]] = 1.0
+
+        w, b = model.weights, model.bias
+        n = len(texts)
+        for _ in range(epochs):
+            logits = _sparse_dot(rows, cols, vals, w, n) + b
+            logits -= logits.max(axis=1, keepdims=True)
+            p = np.exp(logits)
+            p /= p.sum(axis=1, keepdims=True)
+            grad = (p - y) / n
+            w -= learning_rate * (_sparse_dot(cols, rows, vals, grad, len(vocab)) + l2 * w)
+            b -= learning_rate * grad.sum(axis=0)
+        return model
+
+    # -- persistence --------------------------------------------------------
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        vocab = sorted(self.vocab, key=self.vocab.__getitem__)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                weights=self.weights,
+                bias=self.bias,
+                meta=np.frombuffer(json.dumps({"vocab": vocab, "classes": self.classes}).encode("utf-8"), dtype=np.uint8),
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "TextClassifier":
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            return cls(
+                vocab={g: i for i, g in enumerate(meta["vocab"])},
+                classes=meta["classes"],
+                weights=data["weights"],
+                bias=data["bias"],
+            )
@@ -0,0 +1,81 @@
+"""Local intent classifier used before falling back to the LLM.
+
+Trained from the seed prompts in ``data/intent_examples.jsonl`` plus the
+intents users have already accepted: the prompt of every recorded turn and
+the subject of every prior draft. Uses the same n-gram features and softmax
+regression as the tone classifier. A pre-trained model ships in
+``data/models/intent_classifier.npz`` and is loaded once per process; if it
+is missing, a model is trained from the seed prompts alone (milliseconds).
+History is only read when retraining, never on the request path.
+
+Retrain the packaged model (e.g. from a periodic job) with::
+
+    python -m email_assistant.src.nlp.intent_classifier
+"""
+
+import argparse
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from email_assistant.src.models.schemas import IntentType
+from email_assistant.src.nlp.classifier import TextClassifier
+
+# Most recent history examples used for training, across all users
+_MAX_HISTORY_EXAMPLES = 5_000
+
+
+def model_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "data" / "models" / "intent_classifier.npz"
+
+
+def _seed_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "data" / "intent_examples.jsonl"
+
+
+def _seed_examples() -> list[tuple[str, str]]:
+    path = _seed_path()
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [(item["text"], item["intent"]) for item in map(json.loads, filter(str.strip, f))]
+
+
+def _history_examples() -> list[tuple[str, str]]:
+    from email_assistant.src.memory.profile_store import iter_draft_summaries, iter_turn_records
+
+    intents = {i.value for i in IntentType}
+    examples = [(r["prompt"], r["intent"]) for _, r in iter_turn_records() if r.get("intent") in intents and r.get("prompt")]
+    examples += [(d["subject"], d["intent"]) for _, d in iter_draft_summaries() if d.get("intent") in intents and d.get("subject")]
+    return examples[-_MAX_HISTORY_EXAMPLES:]
+
+
+def train_intent_classifier(include_history: bool = True) -> TextClassifier:
+    examples = _seed_examples() + (_history_examples() if include_history else [])
+    texts, labels = zip(*examples)
+    return TextClassifier.train(list(texts), list(labels), classes=[i.value for i in IntentType])
+
+
+@lru_cache(maxsize=1)
+def get_intent_classifier() -> TextClassifier:
+    """Packaged model if present, else one trained on the seed prompts. Loaded once per process."""
+    path = model_path()
+    if path.exists():
+        return TextClassifier.load(path)
+    return train_intent_classifier(include_history=False)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train and save the packaged intent classifier.")
+    parser.add_argument("--no-history", action="store_true", help="Train on the seed prompts only")
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args(argv)
+    model = train_intent_classifier(include_history=not args.no_history)
+    out = args.out or model_path()
+    model.save(out)
+    print(f"Saved intent classifier ({len(model.vocab)} features) to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Single-pass substitution engine for personalization and phrase rules.
+
+All rules for a profile -- sender/company placeholders and the user's
+``avoid_phrases`` -- are compiled into one regex whose alternatives are
+factored into a character trie, so a body is scanned once no matter how many
+rules there are, and matching cost per position is bounded by the longest
+phrase rather than the number of phrases.
+
+Avoid phrases are matched case-insensitively on word boundaries, with any run
+of whitespace matching a space. A phrase written as ``"old => new"`` is
+rewritten to ``new``; any other phrase is left in place and reported as a
+flag.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from email_assistant.src.models.schemas import UserProfile
+
+SENDER_PLACEHOLDERS = (
+    "[Your Name]", "[Name]", "[Sender Name]", "[Sender]",
+    "[Your Full Name]", "[Full Name]", "[Insert Name]",
+)
+COMPANY_PLACEHOLDERS = ("[Company]", "[Company Name]", "[Your Company]")
+REWRITE_SEPARATOR = "=>"
+
+
+def _normalize(phrase: str) -> str:
+    return " ".join(phrase.lower().split())
+
+
+def _trie_pattern(phrases: list[str], flexible_space: bool = False) -> str:
+    """Regex matching any of phrases, factored by common prefix. Longer matches win.
+
+    With flexible_space, a space in a phrase matches any run of whitespace.
+    """
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def _build(node: dict) -> str:
+        ends = "" in node
+        branches = [
+            (r"\s+" if ch == " " and flexible_space else re.escape(ch)) + _build(child)
+            for ch, child in sorted(node.items())
+            if ch
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends:
+            # Prefer the longer continuation; fall back to ending here
+            return "(?:" + body + ")?"
+        return body
+
+    return _build(trie)
+
+
+@dataclass
+class SubstitutionResult:
+    """Rewritten body and the avoided phrases that were left in place."""
+
+    body: str
+    flags: list[str]
+
+
+class SubstitutionEngine:
+    """Compiled rule set for one profile."""
+
+    def __init__(
+        self,
+        signature: Optional[str],
+        company: Optional[str],
+        avoid_phrases: tuple[str, ...] = (),
+    ) -> None:
+        self._replacements: dict[str, str] = {}
+        if company:
+            self._replacements.update(dict.fromkeys(COMPANY_PLACEHOLDERS, company))
+        # Sender placeholders are always removed, even without a signature
+        self._replacements.update(dict.fromkeys(SENDER_PLACEHOLDERS, signature or ""))
+
+        self._rewrites: dict[str, Optional[str]] = {}
+        for rule in avoid_phrases:
+            old, sep, new = rule.partition(REWRITE_SEPARATOR)
+            key = _normalize(old)
+            if key:
+                self._rewrites[key] = new.strip() if sep else None
+
+        parts = [f"(?P<placeholder>{_trie_pattern(list(self._replacements))})"]
+        if self._rewrites:
+            parts.append(f"(?P<phrase>(?<!\\w)(?i:{_trie_pattern(list(self._rewrites), flexible_space=True)})(?!\\w))")
+        self._pattern = re.compile("|".join(parts))
+
+    def apply(self, body: str) -> SubstitutionResult:
+        flags: list[str] = []
+
+        def _replace(match: re.Match) -> str:
+            text = match.group()
+            if match.lastgroup == "placeholder":
+                return self._replacements[text]
+            new = self._rewrites[_normalize(text)]
+            if new is None:
+                flags.append(text)
+                return text
+            return new
+
+        return SubstitutionResult(body=self._pattern.sub(_replace, body), flags=flags)
+
+
+def signature_for(profile: UserProfile) -> Optional[str]:
+    prefs = profile.style_preferences
+    return prefs.signature if prefs and prefs.signature else profile.name
+
+
+@lru_cache(maxsize=256)
+def _compile(signature: Optional[str], company: Optional[str], avoid_phrases: tuple[str, ...]) -> SubstitutionEngine:
+    return SubstitutionEngine(signature, company, avoid_phrases)
+
+
+def get_engine(profile: UserProfile) -> SubstitutionEngine:
+    """Engine for profile, compiled once per distinct set of rules.
+
+    Keyed on the rule inputs rather than the profile id so that an edited
+    profile (a new version) gets a new engine and unchanged profiles share one.
+    """
+    prefs = profile.style_preferences
+    avoid = tuple(prefs.avoid_phrases) if prefs else ()
+    return _compile(signature_for(profile), profile.company, avoid)
@@ -0,0 +1,22 @@
+"""Text normalization helpers shared by the local retrieval and classification code."""
+
+import re
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be but by for from has have i if in is it its me my of on or our so
+    that the their them they this to us was we were will with you your
+    """.split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens with stopwords and single characters removed."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap LLM token estimate (~4 characters per token)."""
+    return max(1, len(text) // 4)
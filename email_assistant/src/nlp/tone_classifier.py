@@ -0,0 +1,76 @@
+"""Local tone classifier used as a first-pass tone check before LLM judging.
+
+Trained from the tone example library (tone_examples.jsonl + tone_samples/)
+plus accepted drafts from users' history. A pre-trained model ships in
+``data/models/tone_classifier.npz`` and is loaded once per process; if it is
+missing, a model is trained from the example library alone. History is only
+read when retraining, never on the request path.
+
+Retrain the packaged model with::
+
+    python -m email_assistant.src.nlp.tone_classifier
+"""
+
+import argparse
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from email_assistant.src.models.schemas import ToneType
+from email_assistant.src.nlp.classifier import TextClassifier
+from email_assistant.src.nlp.tone_library import get_tone_library
+
+# Most recent accepted drafts used for training, across all users
+_MAX_HISTORY_EXAMPLES = 5_000
+
+
+def model_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "data" / "models" / "tone_classifier.npz"
+
+
+def _training_data(include_history: bool) -> tuple[list[str], list[str]]:
+    texts = [ex.text for ex in get_tone_library().examples]
+    labels = [ex.tone.value for ex in get_tone_library().examples]
+    if include_history:
+        from email_assistant.src.memory.profile_store import iter_turn_records
+
+        tones = {t.value for t in ToneType}
+        history = [(r["body"], r["tone"]) for _, r in iter_turn_records() if r.get("tone") in tones and r.get("body")]
+        for body, tone in history[-_MAX_HISTORY_EXAMPLES:]:
+            texts.append(body)
+            labels.append(tone)
+    return texts, labels
+
+
+def train_tone_classifier(include_history: bool = True) -> TextClassifier:
+    texts, labels = _training_data(include_history)
+    return TextClassifier.train(texts, labels, classes=[t.value for t in ToneType])
+
+
+@lru_cache(maxsize=1)
+def get_tone_classifier() -> TextClassifier:
+    """Packaged model if present, else one trained on the example library. Loaded once per process."""
+    path = model_path()
+    if path.exists():
+        return TextClassifier.load(path)
+    return train_tone_classifier(include_history=False)
+
+
+def classify_tone(text: str) -> dict[str, float]:
+    """Probability per ToneType value for text."""
+    return get_tone_classifier().predict_proba(text)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train and save the packaged tone classifier.")
+    parser.add_argument("--no-history", action="store_true", help="Train on the example library only")
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args(argv)
+    model = train_tone_classifier(include_history=not args.no_history)
+    out = args.out or model_path()
+    model.save(out)
+    print(f"Saved tone classifier ({len(model.vocab)} features) to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Tone x intent example library with TF-IDF similarity search.
+
+All examples are read once (``get_tone_library``) from
+``data/tone_examples.jsonl`` plus the per-tone files in ``data/tone_samples/``
+and vectorized into an L2-normalized TF-IDF matrix. Selecting examples for a
+request is a single matrix-vector product over the rows for that tone; no
+files are touched per request.
+"""
+
+import json
+import math
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from email_assistant.src.models.schemas import IntentType, ToneType
+from email_assistant.src.nlp.text import tokenize
+
+# Added to the cosine score of examples whose intent matches the request, so
+# same-intent examples rank first and similarity orders within each group.
+_INTENT_MATCH_BONUS = 1.0
+
+
+def _data_dir() -> Path:
+    return Path(__file__).resolve().parents[2] / "data"
+
+
+@dataclass(frozen=True)
+class ToneExample:
+    """One example email for a tone, optionally tied to an intent."""
+
+    tone: ToneType
+    intent: Optional[IntentType]
+    text: str
+
+
+class ToneLibrary:
+    """Precomputed TF-IDF index over tone examples."""
+
+    def __init__(self, examples: list[ToneExample]) -> None:
+        self.examples = examples
+        docs = [Counter(tokenize(ex.text)) for ex in examples]
+        df = Counter(term for doc in docs for term in doc)
+        self._vocab = {term: i for i, term in enumerate(sorted(df))}
+        n = len(examples)
+        self._idf = np.array(
+            [math.log((1 + n) / (1 + df[term])) + 1 for term in sorted(df)], dtype=np.float32
+        )
+        matrix = np.zeros((n, len(self._vocab)), dtype=np.float32)
+        for row, doc in enumerate(docs):
+            for term, count in doc.items():
+                matrix[row, self._vocab[term]] = count
+        self._matrix = self._normalize(matrix * self._idf)
+        self._tones = np.array([ex.tone.value for ex in examples])
+        self._intents = np.array([ex.intent.value if ex.intent else "" for ex in examples])
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def _vectorize(self, text: str) -> np.ndarray:
+        vec = np.zeros(len(self._vocab), dtype=np.float32)
+        for term, count in Counter(tokenize(text)).items():
+            idx = self._vocab.get(term)
+            if idx is not None:
+                vec[idx] = count
+        return self._normalize(vec * self._idf)
+
+    def select(self, tone: ToneType, intent: Optional[IntentType], query: str, k: int = 2) -> list[str]:
+        """Return up to k example texts for tone, same-intent and most similar to query first."""
+        rows = np.flatnonzero(self._tones == tone.value)
+        if rows.size == 0:
+            return []
+        scores = self._matrix[rows] @ self._vectorize(query)
+        if intent is not None:
+            scores = scores + _INTENT_MATCH_BONUS * (self._intents[rows] == intent.value)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [self.examples[rows[i]].text for i in order]
+
+
+def _load_examples(data_dir: Path) -> list[ToneExample]:
+    examples = []
+    library_path = data_dir / "tone_examples.jsonl"
+    if library_path.exists():
+        with open(library_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                intent = item.get("intent")
+                examples.append(
+                    ToneExample(
+                        tone=ToneType(item["tone"]),
+                        intent=IntentType(intent) if intent else None,
+                        text=item["text"].strip(),
+                    )
+                )
+    for tone in ToneType:
+        sample_path = data_dir / "tone_samples" / f"{tone.value}.txt"
+        if sample_path.exists():
+            examples.append(ToneExample(tone=tone, intent=None, text=sample_path.read_text(encoding="utf-8").strip()))
+    return examples
+
+
+@lru_cache(maxsize=1)
+def get_tone_library() -> ToneLibrary:
+    """Load and index the example library once per process."""
+    return ToneLibrary(_load_examples(_data_dir()))
@@ -0,0 +1 @@
+# Metrics collected while the pipeline runs
@@ -0,0 +1,150 @@
+"""In-process metrics for LLM calls, keyed by pipeline node.
+
+Agents record one entry per LLM call (tokens, cached tokens, latency); the
+registry is thread-safe so concurrent requests can share it.
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+# Latency samples kept per node for percentile reporting
+_MAX_SAMPLES = 10_000
+
+
+@dataclass
+class NodeStats:
+    """Aggregated LLM usage for one pipeline node."""
+
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: float = 0.0
+    latencies_s: deque = field(default_factory=lambda: deque(maxlen=_MAX_SAMPLES))
+    # Calls per model, so per-node model overrides show up in reports
+    models: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def cached_ratio(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+
+class MetricsRegistry:
+    """Thread-safe collection of per-node LLM stats and named counters."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._nodes: dict[str, NodeStats] = {}
+        self._counters: dict[str, int] = {}
+
+    def record_llm_call(
+        self,
+        node: str,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cached_tokens: int = 0,
+        latency_s: float = 0.0,
+        model: Optional[str] = None,
+        cost_usd: float = 0.0,
+    ) -> None:
+        with self._lock:
+            stats = self._nodes.setdefault(node, NodeStats())
+            stats.calls += 1
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.cached_tokens += cached_tokens
+            stats.cost_usd += cost_usd
+            stats.latencies_s.append(latency_s)
+            if model:
+                stats.models[model] = stats.models.get(model, 0) + 1
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def node_stats(self) -> dict[str, NodeStats]:
+        with self._lock:
+            return {
+                node: NodeStats(
+                    calls=s.calls,
+                    input_tokens=s.input_tokens,
+                    output_tokens=s.output_tokens,
+                    cached_tokens=s.cached_tokens,
+                    cost_usd=s.cost_usd,
+                    latencies_s=deque(s.latencies_s, maxlen=_MAX_SAMPLES),
+                    models=dict(s.models),
+                )
+                for node, s in self._nodes.items()
+            }
+
+    def counters(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._nodes.clear()
+            self._counters.clear()
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Process-wide metrics registry."""
+    return _registry
+
+
+def cache_report() -> dict[str, dict[str, Any]]:
+    """Per-node prompt-cache effectiveness: input tokens, cached tokens and their ratio."""
+    return {
+        node: {
+            "calls": s.calls,
+            "input_tokens": s.input_tokens,
+            "cached_tokens": s.cached_tokens,
+            "cached_ratio": round(s.cached_ratio, 4),
+        }
+        for node, s in sorted(_registry.node_stats().items())
+    }
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile of samples (0.0 when empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def node_report() -> dict[str, dict[str, Any]]:
+    """Per-node models, latency percentiles, tokens and cost, to compare model tiers."""
+    report = {}
+    for node, s in sorted(_registry.node_stats().items()):
+        latencies = list(s.latencies_s)
+        report[node] = {
+            "calls": s.calls,
+            "models": dict(s.models),
+            "p50_s": round(_percentile(latencies, 50), 4),
+            "p95_s": round(_percentile(latencies, 95), 4),
+            "input_tokens": s.input_tokens,
+            "output_tokens": s.output_tokens,
+            "cost_usd": round(s.cost_usd, 6),
+            "cost_per_call_usd": round(s.cost_usd / s.calls, 6) if s.calls else 0.0,
+        }
+    return report
+
+
+def intent_report() -> dict[str, Any]:
+    """Local-vs-LLM intent decision rates and how often the LLM overruled the local guess."""
+    counters = _registry.counters()
+    local, llm = counters.get("intent.local", 0), counters.get("intent.llm", 0)
+    disagreements = counters.get("intent.disagreement", 0)
+    total = local + llm
+    return {
+        "decisions": total,
+        "local_rate": round(local / total, 4) if total else 0.0,
+        "llm_rate": round(llm / total, 4) if total else 0.0,
+        "disagreement_rate": round(disagreements / llm, 4) if llm else 0.0,
+    }
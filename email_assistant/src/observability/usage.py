@@ -0,0 +1,253 @@
+"""Per-user token and cost metering with daily and monthly budgets.
+
+Pipeline entry points run inside ``metered(user_id)``, which checks the
+user's budget and makes the user current for the request. Every LLM call made
+through ``invoke_structured`` in that scope is recorded in a small SQLite
+store (``usage.sqlite3`` next to the profile store), aggregated per UTC day,
+user, node and model, with its cost from the ``pricing:`` table in mcp.yaml
+(USD per million tokens; cached input tokens are billed at ``cached_input``).
+
+Budgets come from the ``budgets:`` section (null means unlimited, per-user
+values under ``users:`` override the defaults). Once a user has spent
+``near_fraction`` of a budget the request runs in economy mode: the
+``economy_model`` is used where configured and the LLM review pass is
+skipped. At or over a budget, ``metered`` raises BudgetExceededError before
+any LLM call is made.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Literal, Optional
+
+from email_assistant.src.integrations.config_loader import load_mcp_config
+from email_assistant.src.memory.profile_store import data_dir
+from email_assistant.src.observability.metrics import get_metrics
+
+Mode = Literal["normal", "economy"]
+Period = Literal["day", "month"]
+
+_BUDGET_DEFAULTS: dict[str, Any] = {
+    "daily_usd": None,
+    "monthly_usd": None,
+    "near_fraction": 0.8,
+    "economy_provider": None,
+    "economy_model": None,
+    "skip_review_when_near": True,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    user_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    node TEXT NOT NULL,
+    model TEXT NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day, node, model)
+) WITHOUT ROWID;
+"""
+
+
+class BudgetExceededError(RuntimeError):
+    """The user has reached a daily or monthly spending budget."""
+
+
+@dataclass(frozen=True)
+class _Scope:
+    user_id: str
+    mode: Mode
+
+
+_scope: ContextVar[Optional[_Scope]] = ContextVar("usage_scope", default=None)
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _period_bounds(period: Period, today: date) -> tuple[str, str]:
+    if period == "day":
+        return today.isoformat(), today.isoformat()
+    # Days are ISO strings, so "-31" bounds every month lexicographically
+    month = today.isoformat()[:7]
+    return f"{month}-01", f"{month}-31"
+
+
+def cost_usd(model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    """Cost of one call from the mcp.yaml pricing table, or None if the model is not priced."""
+    price = (load_mcp_config().get("pricing") or {}).get(model)
+    if not price:
+        return None
+    cached = min(cached_tokens, input_tokens)
+    input_price = float(price.get("input", 0))
+    cached_price = float(price.get("cached_input", input_price))
+    return (
+        (input_tokens - cached) * input_price + cached * cached_price + output_tokens * float(price.get("output", 0))
+    ) / 1_000_000
+
+
+def budget_settings(user_id: str) -> dict[str, Any]:
+    """Defaults, then mcp.yaml ``budgets:``, then the user's entry under ``budgets.users``."""
+    budgets = dict(load_mcp_config().get("budgets") or {})
+    users = budgets.pop("users", None) or {}
+    settings = dict(_BUDGET_DEFAULTS)
+    settings.update({k: v for k, v in budgets.items() if k in _BUDGET_DEFAULTS})
+    settings.update({k: v for k, v in (users.get(user_id) or {}).items() if k in _BUDGET_DEFAULTS})
+    return settings
+
+
+class UsageMeter:
+    """SQLite-backed usage totals. One connection per meter, shared by threads."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def record(
+        self,
+        user_id: str,
+        node: str,
+        model: str,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cached_tokens: int = 0,
+        cost_usd: float = 0.0,
+        day: Optional[date] = None,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO usage (user_id, day, node, model, calls, input_tokens, output_tokens, cached_tokens, cost_usd)
+                VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?)
+                ON CONFLICT (user_id, day, node, model) DO UPDATE SET
+                    calls = calls + 1,
+                    input_tokens = input_tokens + excluded.input_tokens,
+                    output_tokens = output_tokens + excluded.output_tokens,
+                    cached_tokens = cached_tokens + excluded.cached_tokens,
+                    cost_usd = cost_usd + excluded.cost_usd
+                """,
+                (user_id, (day or _today()).isoformat(), node, model, input_tokens, output_tokens, cached_tokens, cost_usd),
+            )
+
+    def spent(self, user_id: str, period: Period = "day", today: Optional[date] = None) -> float:
+        """USD spent by user_id in the current UTC day or month."""
+        start, end = _period_bounds(period, today or _today())
+        with self._lock:
+            (total,) = self._conn.execute(
+                "SELECT COALESCE(SUM(cost_usd), 0) FROM usage WHERE user_id = ? AND day BETWEEN ? AND ?",
+                (user_id, start, end),
+            ).fetchone()
+        return float(total)
+
+    def report(self, user_id: Optional[str] = None, period: Period = "day", today: Optional[date] = None) -> list[dict[str, Any]]:
+        """Totals per user, node and model for the current UTC day or month, most expensive first."""
+        start, end = _period_bounds(period, today or _today())
+        where = "day BETWEEN ? AND ?" + (" AND user_id = ?" if user_id else "")
+        params = (start, end, user_id) if user_id else (start, end)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT user_id, node, model, SUM(calls), SUM(input_tokens), SUM(output_tokens),
+                       SUM(cached_tokens), SUM(cost_usd)
+                FROM usage WHERE {where}
+                GROUP BY user_id, node, model
+                ORDER BY SUM(cost_usd) DESC, user_id, node, model
+                """,
+                params,
+            ).fetchall()
+        keys = ("user_id", "node", "model", "calls", "input_tokens", "output_tokens", "cached_tokens", "cost_usd")
+        return [dict(zip(keys, row)) for row in rows]
+
+
+_meters: dict[tuple[int, Path], UsageMeter] = {}
+_meters_lock = threading.Lock()
+
+
+def default_db_path() -> Path:
+    return data_dir() / "usage.sqlite3"
+
+
+def get_meter(path: Optional[Path] = None) -> UsageMeter:
+    """Process-wide meter for path (default: usage.sqlite3 next to the profile store)."""
+    key = (os.getpid(), Path(path or default_db_path()))
+    with _meters_lock:
+        meter = _meters.get(key)
+        if meter is None:
+            meter = _meters[key] = UsageMeter(key[1])
+        return meter
+
+
+def budget_mode(user_id: str, meter: Optional[UsageMeter] = None) -> Mode:
+    """Return "economy" once a budget is nearly spent. Raises BudgetExceededError once one is spent."""
+    settings = budget_settings(user_id)
+    limits = [(p, settings[k]) for p, k in (("day", "daily_usd"), ("month", "monthly_usd")) if settings[k] is not None]
+    if not limits:
+        return "normal"
+    meter = meter or get_meter()
+    mode: Mode = "normal"
+    for period, limit in limits:
+        spent = meter.spent(user_id, period)
+        if spent >= float(limit):
+            get_metrics().increment("budget.rejected")
+            label = "daily" if period == "day" else "monthly"
+            raise BudgetExceededError(f"{label} budget of ${float(limit):.2f} reached for user {user_id!r} (spent ${spent:.4f})")
+        if spent >= float(limit) * float(settings["near_fraction"]):
+            mode = "economy"
+    if mode == "economy":
+        get_metrics().increment("budget.economy_requests")
+    return mode
+
+
+@contextmanager
+def metered(user_id: str, mode: Optional[Mode] = None) -> Iterator[Mode]:
+    """Check user_id's budget and attribute LLM calls in this context to them. Yields the mode.
+
+    Pass the mode from an earlier check to re-enter the same request's scope
+    (e.g. around each step of a stream) without checking the budget again.
+    """
+    mode = mode or budget_mode(user_id)
+    token = _scope.set(_Scope(user_id, mode))
+    try:
+        yield mode
+    finally:
+        _scope.reset(token)
+
+
+def current_user() -> Optional[str]:
+    scope = _scope.get()
+    return scope.user_id if scope else None
+
+
+def economy_mode() -> bool:
+    scope = _scope.get()
+    return scope is not None and scope.mode == "economy"
+
+
+def economy_settings() -> dict[str, Any]:
+    """Budget settings for the current user (defaults outside a metered context)."""
+    return budget_settings(current_user() or "")
+
+
+def record_call(node: str, model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0, cost_usd: float = 0.0) -> None:
+    """Record one LLM call for the current user. Calls outside ``metered`` are not attributed."""
+    user_id = current_user()
+    if user_id is not None:
+        get_meter().record(user_id, node, model, input_tokens, output_tokens, cached_tokens, cost_usd)
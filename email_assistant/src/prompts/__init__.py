@@ -0,0 +1 @@
+# Prompt template registry
@@ -0,0 +1,144 @@
+"""Prompt templates split into a cacheable prefix and per-request data.
+
+Each template has a ``system`` part (fixed instructions, followed by slowly
+changing context such as tone examples) and a ``user`` part with the
+per-request data. Rendering keeps that order, so consecutive calls share the
+longest possible prefix and provider-side prompt caching can reuse it.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+_REGISTRY: dict[str, "PromptTemplate"] = {}
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A named prompt: cacheable system prefix plus per-request user message."""
+
+    name: str
+    system: str
+    user: str
+
+    def render(self, cache_hints: bool = False, **variables: Any) -> list[BaseMessage]:
+        """Format both parts. With cache_hints, mark the system prefix for caching.
+
+        Cache hints use Anthropic-style ``cache_control`` content blocks and
+        should only be enabled for providers that accept them.
+        """
+        system_text = self.system.format(**variables)
+        if cache_hints:
+            system = SystemMessage(
+                content=[{"type": "text", "text": system_text, "cache_control": {"type": "ephemeral"}}]
+            )
+        else:
+            system = SystemMessage(content=system_text)
+        return [system, HumanMessage(content=self.user.format(**variables))]
+
+
+def register_template(template: PromptTemplate) -> PromptTemplate:
+    """Add a template to the registry. Names must be unique."""
+    if template.name in _REGISTRY:
+        raise ValueError(f"Prompt template {template.name!r} is already registered")
+    _REGISTRY[template.name] = template
+    return template
+
+
+def get_template(name: str) -> PromptTemplate:
+    """Look up a registered template by name (the pipeline node name)."""
+    return _REGISTRY[name]
+
+
+def registered_templates() -> dict[str, PromptTemplate]:
+    return dict(_REGISTRY)
+
+
+# Built-in templates, one per LLM-backed pipeline node
+
+register_template(PromptTemplate(
+    name="input_parser",
+    system="""Parse and normalize email requests. Extract recipient (if mentioned), tone, and any constraints (length, language).
+
+Return structured data. For tone, use one of: formal, casual, assertive, friendly, professional.
+Use the user's stated tone if they provided one and the prompt doesn't override it.""",
+    user="""User's stated tone preference: {user_tone}
+User's stated recipient (if any): {user_recipient}
+
+Raw prompt:
+{raw_prompt}""",
+))
+
+register_template(PromptTemplate(
+    name="intent_detection",
+    system="""Classify the intent of an email request into exactly one of: outreach, follow_up, apology, info_request, internal_update, other.
+
+Respond with the intent value only.""",
+    user="""Request: {prompt}""",
+))
+
+register_template(PromptTemplate(
+    name="draft_writer",
+    system="""Write a complete email based on the user's request.
+Output a subject line and full body. Use proper email format (greeting, body, closing).
+Do NOT include any placeholder text like [Your Name], [Name], [Sender Name], [Company], etc.
+
+{tone_context}""",
+    user="""{prompt}{recipient}{length_hint}
+{sender_info}
+
+{conversation_snippets}""",
+))
+
+register_template(PromptTemplate(
+    name="review",
+    system="""Review email drafts for:
+1. Grammar and spelling
+2. Tone alignment with the expected tone below
+3. Contextual coherence and clarity
+
+The draft is given as numbered sections: [0] is the subject, [1]... are body
+paragraphs. Parts already reviewed may be summarized instead of shown; do not
+report issues in them.
+
+Return: passed (bool), issues and suggestions (lists of strings) for problems
+spanning the whole email, and findings: one entry per numbered section shown,
+with its index, ok (bool), issues and suggestions.
+Be lenient - only fail for clear grammar errors or major tone mismatch.
+
+Expected tone: {expected_tone}""",
+    user="""{sections}{unchanged}""",
+))
+
+register_template(PromptTemplate(
+    name="campaign_touch_up",
+    system="""Lightly adapt an approved mail-merge email for one recipient.
+Use the recipient details where they make the email more relevant. Keep the
+structure, tone, length, greeting and signoff. Do not add placeholders.""",
+    user="""Recipient details:
+{details}
+
+Subject: {subject}
+
+{body}""",
+))
+
+register_template(PromptTemplate(
+    name="tone_judge",
+    system="""You are an expert email tone evaluator. Analyze the email and determine
+whether it matches the requested tone.
+
+Evaluate on these criteria:
+- formal: No contractions, proper salutations, respectful language
+- casual: Contractions okay, conversational, informal
+- assertive: Direct, confident, no hedging, action-oriented
+- friendly: Warm, personable, approachable
+- professional: Balanced, polite but efficient
+
+Return your judgment with matches_requested_tone (bool), detected_tone, confidence (0-1), and reasoning.""",
+    user="""Requested tone: {requested_tone}
+
+Email:
+{body}""",
+))
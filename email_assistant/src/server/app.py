@@ -0,0 +1,332 @@
+"""Headless HTTP API for the email pipeline (ASGI, Starlette).
+
+Endpoints::
+
+    POST /v1/generate   one request -> final draft and review
+    POST /v1/batch      {"requests": [...]} -> one result per request, in order
+    POST /v1/stream     one request -> NDJSON node events, then the result
+    GET  /healthz       liveness: 200 while the process is up
+    GET  /readyz        readiness: 200 once warmed up, 503 while warming or draining
+
+Requests are admitted into a bounded queue served by a fixed pool of workers,
+each running the synchronous pipeline on its own thread. A full queue answers
+429 with ``Retry-After``; a draining server answers 503; a user over their
+spending budget gets 402. On shutdown the
+server stops admitting, waits up to ``drain_timeout_s`` for queued and running
+jobs, then stops.
+
+At startup the server runs the warm-up routine (workflow/warmup.py) in the
+background: requests admitted meanwhile wait for it, and ``/readyz`` answers
+503 until it has finished, then reports each step's duration.
+
+Settings come from the ``server:`` section of mcp.yaml (``workers``,
+``queue_size``, ``drain_timeout_s``, ``warmup``, ``warmup_connect``). Run with::
+
+    python -m email_assistant.src.server.app --port 8000
+
+Set ``PRIMARY_PROVIDER=stub`` to serve without an LLM API key.
+"""
+
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from email_assistant.src.integrations.config_loader import load_mcp_config
+from email_assistant.src.models.schemas import GenerateRequest
+from email_assistant.src.observability.usage import BudgetExceededError
+from email_assistant.src.workflow.langgraph_flow import invoke, result_payload, stream
+from email_assistant.src.workflow.warmup import warm_up as run_warm_up
+
+_DEFAULTS = {"workers": 4, "queue_size": 64, "drain_timeout_s": 30.0, "warmup": True, "warmup_connect": True}
+_MAX_BATCH = 100
+_RETRY_AFTER_S = "1"
+
+
+class BatchRequest(BaseModel):
+    requests: list[GenerateRequest] = Field(..., min_length=1, max_length=_MAX_BATCH)
+
+
+class Saturated(Exception):
+    """The queue has no room for the job(s)."""
+
+
+class Unavailable(Exception):
+    """The service is not accepting work (starting up or draining)."""
+
+
+@dataclass
+class _Job:
+    fn: Callable[[], Any]
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class PipelineService:
+    """Bounded job queue in front of a fixed pool of pipeline workers."""
+
+    def __init__(self, workers: int, queue_size: int, drain_timeout_s: float) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self.drain_timeout_s = drain_timeout_s
+        self.ready = False
+        self.warmup_report: Optional[dict[str, Any]] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._warm: Optional[asyncio.Event] = None
+
+    async def start(self, warm_up: Optional[Callable[[], dict[str, Any]]] = None) -> None:
+        """Start the workers. With warm_up, jobs wait until it has run in the background."""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pipeline-worker")
+        self._warm = asyncio.Event()
+        if warm_up is None:
+            self._warm.set()
+        else:
+            self._tasks.append(asyncio.create_task(self._warm_up(warm_up)))
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.ready = True
+
+    @property
+    def warming(self) -> bool:
+        return self._warm is not None and not self._warm.is_set()
+
+    async def _warm_up(self, fn: Callable[[], dict[str, Any]]) -> None:
+        try:
+            self.warmup_report = await asyncio.get_running_loop().run_in_executor(self._executor, fn)
+        except Exception as e:
+            self.warmup_report = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        finally:
+            self._warm.set()
+
+    async def stop(self) -> None:
+        """Stop admitting, let queued and running jobs finish (bounded), then shut down."""
+        self.ready = False
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout_s)
+        except asyncio.TimeoutError:
+            pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            if not job.future.done():
+                job.future.set_exception(Unavailable("Server shut down before the job ran"))
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def submit(self, fns: list[Callable[[], Any]]) -> list[asyncio.Future]:
+        """Enqueue all jobs or none. Raises Unavailable or Saturated."""
+        if not self.ready or self._queue is None:
+            raise Unavailable("Server is not accepting requests")
+        if self.queue_size - self._queue.qsize() < len(fns):
+            raise Saturated(f"Queue full ({self._queue.qsize()}/{self.queue_size})")
+        jobs = [_Job(fn) for fn in fns]
+        for job in jobs:
+            self._queue.put_nowait(job)
+        return [job.future for job in jobs]
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        await self._warm.wait()
+        while True:
+            job = await self._queue.get()
+            try:
+                if not job.future.cancelled():
+                    result = await loop.run_in_executor(self._executor, job.fn)
+                    if not job.future.done():
+                        job.future.set_result(result)
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+
+def _error(status: int, message: str) -> JSONResponse:
+    headers = {"Retry-After": _RETRY_AFTER_S} if status in (429, 503) else None
+    return JSONResponse({"error": message}, status_code=status, headers=headers)
+
+
+class _BadRequest(Exception):
+    pass
+
+
+async def _parse(request: Request, model: type[BaseModel]) -> BaseModel:
+    try:
+        return model.model_validate(await request.json())
+    except (ValueError, ValidationError) as e:
+        raise _BadRequest(str(e)) from e
+
+
+def _json_errors(handler: Callable) -> Callable:
+    async def wrapped(request: Request) -> Response:
+        try:
+            return await handler(request)
+        except _BadRequest as e:
+            return _error(400, str(e))
+        except Saturated as e:
+            return _error(429, str(e))
+        except Unavailable as e:
+            return _error(503, str(e))
+        except BudgetExceededError as e:
+            return _error(402, str(e))
+        except Exception as e:
+            return _error(500, f"Pipeline failed: {e}")
+
+    return wrapped
+
+
+def _run_pipeline(req: GenerateRequest) -> dict[str, Any]:
+    return result_payload(invoke(**req.invoke_kwargs()))
+
+
+async def generate(request: Request) -> Response:
+    req = await _parse(request, GenerateRequest)
+    (future,) = request.app.state.service.submit([lambda: _run_pipeline(req)])
+    return JSONResponse(await future)
+
+
+async def batch(request: Request) -> Response:
+    body = await _parse(request, BatchRequest)
+    futures = request.app.state.service.submit([lambda r=r: _run_pipeline(r) for r in body.requests])
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    return JSONResponse(
+        {"results": [{"error": str(r)} if isinstance(r, BaseException) else r for r in results]}
+    )
+
+
+async def stream_events(request: Request) -> Response:
+    req = await _parse(request, GenerateRequest)
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def _run() -> None:
+        try:
+            for event in stream(**req.invoke_kwargs()):
+                if event.status == "done":
+                    line = {"event": "result", **result_payload(event.state or {})}
+                else:
+                    line = {"event": event.status, "node": event.node, "elapsed_s": round(event.elapsed_s, 4)}
+                loop.call_soon_threadsafe(events.put_nowait, line)
+        except Exception as e:
+            loop.call_soon_threadsafe(events.put_nowait, {"event": "error", "error": str(e)})
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, done)
+
+    (future,) = request.app.state.service.submit([_run])
+
+    async def _lines() -> AsyncIterator[bytes]:
+        while True:
+            item = await events.get()
+            if item is done:
+                break
+            yield (json.dumps(item) + "\n").encode("utf-8")
+        await future
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
+async def healthz(request: Request) -> Response:
+    return JSONResponse({"status": "ok"})
+
+
+async def readyz(request: Request) -> Response:
+    service: PipelineService = request.app.state.service
+    if not service.ready:
+        return _error(503, "not ready")
+    if service.warming:
+        return _error(503, "warming up")
+    return JSONResponse(
+        {"status": "ready", "queued": service.queued, "queue_size": service.queue_size, "warmup": service.warmup_report}
+    )
+
+
+def server_settings(**overrides: Any) -> dict[str, Any]:
+    """Defaults, then mcp.yaml ``server:`` values, then explicit overrides."""
+    settings = dict(_DEFAULTS)
+    settings.update(load_mcp_config().get("server") or {})
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    return settings
+
+
+def create_app(
+    workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    drain_timeout_s: Optional[float] = None,
+    warmup: Optional[bool] = None,
+) -> Starlette:
+    """Build the ASGI app. Unset arguments come from server_settings()."""
+    settings = server_settings(
+        workers=workers, queue_size=queue_size, drain_timeout_s=drain_timeout_s, warmup=warmup
+    )
+    service = PipelineService(
+        workers=int(settings["workers"]),
+        queue_size=int(settings["queue_size"]),
+        drain_timeout_s=float(settings["drain_timeout_s"]),
+    )
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        def warm_up() -> dict[str, Any]:
+            return run_warm_up(connect=bool(settings["warmup_connect"])).to_dict()
+
+        await service.start(warm_up if settings["warmup"] else None)
+        try:
+            yield
+        finally:
+            await service.stop()
+
+    app = Starlette(
+        routes=[
+            Route("/v1/generate", _json_errors(generate), methods=["POST"]),
+            Route("/v1/batch", _json_errors(batch), methods=["POST"]),
+            Route("/v1/stream", _json_errors(stream_events), methods=["POST"]),
+            Route("/healthz", healthz, methods=["GET"]),
+            Route("/readyz", readyz, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.service = service
+    return app
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the email pipeline over HTTP.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent pipeline runs")
+    parser.add_argument("--queue-size", type=int, default=None, help="Admitted requests beyond those running")
+    parser.add_argument("--drain-timeout", type=float, default=None, help="Seconds to finish work on shutdown")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the startup warm-up")
+    args = parser.parse_args(argv)
+    app = create_app(
+        workers=args.workers,
+        queue_size=args.queue_size,
+        drain_timeout_s=args.drain_timeout,
+        warmup=False if args.no_warmup else None,
+    )
+    settings = server_settings(drain_timeout_s=args.drain_timeout)
+    uvicorn.run(app, host=args.host, port=args.port, timeout_graceful_shutdown=int(settings["drain_timeout_s"]) + 5)
+
+
+if __name__ == "__main__":
+    main()
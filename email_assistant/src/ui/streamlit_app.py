@@ -13,9 +13,131 @@ from dotenv import load_dotenv
 
 load_dotenv(_REPO_ROOT / ".env")
 
-from email_assistant.src.memory.profile_store import clear_history, load_profile, save_profile
+from typing import Any, Optional
+
+from email_assistant.src.memory.profile_store import clear_history, load_profile, update_profile
 from email_assistant.src.models.schemas import DraftResult, IntentType, ToneType, UserProfile
-from email_assistant.src.workflow.langgraph_flow import invoke
+from email_assistant.src.workflow.langgraph_flow import invoke_variants, save_variant, stream
+from email_assistant.src.workflow.warmup import format_report, warm_up
+
+_TONE_OPTIONS = ["auto"] + [t.value for t in ToneType]
+
+
+@st.cache_resource
+def _load_resources() -> dict[str, Any]:
+    """Run the warm-up (graph, config, LLM clients and connections) once per server process.
+
+    Steps that fail, such as a missing API key, are reported rather than raised;
+    agents report the error per request.
+    """
+    return {"warmup": warm_up()}
+
+
+def _session_profile(user_id: str) -> Optional[UserProfile]:
+    """Profile cached for this browser session; dropped by _invalidate_profile."""
+    cache = st.session_state.setdefault("profile_cache", {})
+    if user_id not in cache:
+        cache[user_id] = load_profile(user_id)
+    return cache[user_id]
+
+
+def _invalidate_profile(user_id: str) -> None:
+    st.session_state.setdefault("profile_cache", {}).pop(user_id, None)
+
+
+@st.fragment
+def _settings_sidebar() -> None:
+    """Request settings. Widget values live in session_state under their keys."""
+    st.header("Settings")
+    st.selectbox(
+        "Tone",
+        options=_TONE_OPTIONS,
+        index=_TONE_OPTIONS.index("professional"),
+        key="tone",
+        help="Select the desired tone for the email. 'auto' uses your usual tone from history.",
+    )
+    st.selectbox(
+        "Intent override (optional)",
+        options=[""] + [t.value for t in IntentType],
+        key="intent_override",
+        help="Override automatic intent detection.",
+    )
+    st.text_input(
+        "Recipient (optional)",
+        placeholder="e.g., John Smith, john@example.com",
+        key="recipient",
+        help="Recipient name or email.",
+    )
+    user_id = st.text_input(
+        "User ID",
+        value=st.session_state.profile_id,
+        help="For personalization and draft history.",
+    )
+    if (user_id or "default") != st.session_state.profile_id:
+        st.session_state.profile_id = user_id or "default"
+        st.rerun()
+
+
+@st.fragment
+def _profile_sidebar() -> None:
+    user_id = st.session_state.profile_id
+    with st.expander("Profile & Memory"):
+        profile = _session_profile(user_id)
+        p_name = st.text_input("Your name", value=profile.name if profile else "", key=f"profile_name_{user_id}")
+        p_company = st.text_input("Company", value=profile.company if profile else "", key=f"profile_company_{user_id}")
+        if st.button("Save profile", key="save_profile"):
+            def _apply(p: UserProfile) -> None:
+                p.name = p_name or None
+                p.company = p_company or None
+
+            update_profile(user_id, _apply)
+            _invalidate_profile(user_id)
+            st.success("Profile saved.")
+
+        if st.button("Clear conversation history", key="clear_history_btn"):
+            clear_history(user_id)
+            _invalidate_profile(user_id)
+            st.success("Conversation history cleared for this User ID.")
+
+
+def _run_with_status(**kwargs: Any) -> dict[str, Any]:
+    """Run the pipeline, showing the running node and per-node timings in a status panel."""
+    final_state: dict[str, Any] = {}
+    with st.status("Generating email...", expanded=True) as status:
+        for event in stream(**kwargs):
+            if event.status == "started":
+                status.update(label=f"Running {event.node}...")
+            elif event.status == "finished":
+                st.write(f"✓ {event.node} — {event.elapsed_s:.2f}s")
+            else:
+                final_state = event.state or {}
+        status.update(label="Email generated", state="complete", expanded=False)
+    return final_state
+
+
+def _use_variant(index: int) -> None:
+    """Button callback: save the picked variant to memory and load it into the preview."""
+    state = st.session_state.variants_state
+    draft = state["variants"][index]
+    save_variant(state, draft)
+    _invalidate_profile(state.get("user_id", "default"))
+    st.session_state.draft_subject = draft.subject
+    st.session_state.draft_body = draft.body
+    st.session_state.variants_state = None
+
+
+def _render_variants() -> None:
+    state = st.session_state.get("variants_state")
+    if not state or not state.get("variants"):
+        return
+    st.divider()
+    st.subheader("Compare Tones")
+    for i, (col, draft) in enumerate(zip(st.columns(len(state["variants"])), state["variants"])):
+        with col:
+            st.markdown(f"**{draft.tone.value.title() if draft.tone else 'Draft'}**")
+            st.markdown(f"*{draft.subject}*")
+            st.text(draft.body)
+            st.button("Use this", key=f"use_variant_{i}", on_click=_use_variant, args=(i,))
 
 
 def main() -> None:
@@ -26,6 +148,7 @@ def main() -> None:
     )
     st.title("AI-Powered Email Assistant")
     st.caption("Generate, personalize, and validate email drafts in seconds.")
+    resources = _load_resources()
 
     # Session state
     if "draft_subject" not in st.session_state:
@@ -35,46 +158,12 @@ def main() -> None:
     if "profile_id" not in st.session_state:
         st.session_state.profile_id = "default"
 
-    # Sidebar
+    # Sidebar: fragments rerun on their own when their widgets change
     with st.sidebar:
-        st.header("Settings")
-        tone = st.selectbox(
-            "Tone",
-            options=[t.value for t in ToneType],
-            index=[t.value for t in ToneType].index("professional"),
-            help="Select the desired tone for the email.",
-        )
-        intent_override = st.selectbox(
-            "Intent override (optional)",
-            options=[""] + [t.value for t in IntentType],
-            help="Override automatic intent detection.",
-        )
-        recipient = st.text_input(
-            "Recipient (optional)",
-            placeholder="e.g., John Smith, john@example.com",
-            help="Recipient name or email.",
-        )
-        user_id = st.text_input(
-            "User ID",
-            value=st.session_state.profile_id,
-            help="For personalization and draft history.",
-        )
-        st.session_state.profile_id = user_id or "default"
-
-        with st.expander("Profile & Memory"):
-            profile = load_profile(st.session_state.profile_id)
-            p_name = st.text_input("Your name", value=profile.name if profile else "", key="profile_name")
-            p_company = st.text_input("Company", value=profile.company if profile else "", key="profile_company")
-            if st.button("Save profile", key="save_profile"):
-                p = profile or UserProfile(id=st.session_state.profile_id)
-                p.name = p_name or None
-                p.company = p_company or None
-                save_profile(p)
-                st.success("Profile saved.")
-
-            if st.button("Clear conversation history", key="clear_history_btn"):
-                clear_history(st.session_state.profile_id)
-                st.success("Conversation history cleared for this User ID.")
+        _settings_sidebar()
+        _profile_sidebar()
+        with st.expander("Startup warm-up"):
+            st.code(format_report(resources["warmup"]), language=None)
 
     # Main content
     prompt = st.text_area(
@@ -83,36 +172,63 @@ def main() -> None:
         height=120,
     )
 
+    compare = st.toggle("Compare tones", help="Draft the same request in several tones side by side.")
+    compare_tones: list[str] = []
+    if compare:
+        compare_tones = st.multiselect(
+            "Tones to compare",
+            options=[t.value for t in ToneType],
+            default=["professional", "friendly", "casual"],
+        )
+
     generate_clicked = st.button("Generate Email", type="primary")
 
-    if generate_clicked and prompt.strip():
-        with st.spinner("Generating email..."):
-            try:
-                result = invoke(
-                    raw_prompt=prompt.strip(),
-                    user_tone=tone,
-                    user_recipient=recipient or None,
-                    user_intent_override=intent_override or None,
-                    user_id=st.session_state.profile_id,
-                )
-                draft = result.get("personalized_draft") or result.get("draft")
-                if isinstance(draft, DraftResult):
-                    st.session_state.draft_subject = draft.subject
-                    st.session_state.draft_body = draft.body
-                elif isinstance(draft, dict):
-                    st.session_state.draft_subject = draft.get("subject", "")
-                    st.session_state.draft_body = draft.get("body", "")
-                else:
-                    st.session_state.draft_subject = "(No subject)"
-                    st.session_state.draft_body = str(draft) if draft else "No draft generated."
-                errors = result.get("errors", [])
-                if errors:
-                    for err in errors:
-                        st.warning(err)
-            except Exception as e:
-                st.error(f"Error: {e}")
-                st.session_state.draft_subject = ""
-                st.session_state.draft_body = ""
+    if generate_clicked and prompt.strip() and compare:
+        if compare_tones:
+            with st.spinner(f"Drafting {len(compare_tones)} variants..."):
+                try:
+                    st.session_state.variants_state = invoke_variants(
+                        raw_prompt=prompt.strip(),
+                        tones=compare_tones,
+                        user_recipient=st.session_state.recipient or None,
+                        user_intent_override=st.session_state.intent_override or None,
+                        user_id=st.session_state.profile_id,
+                    )
+                except Exception as e:
+                    st.error(f"Error: {e}")
+        else:
+            st.warning("Select at least one tone to compare.")
+    elif generate_clicked and prompt.strip():
+        try:
+            result = _run_with_status(
+                raw_prompt=prompt.strip(),
+                user_tone=st.session_state.tone,
+                user_recipient=st.session_state.recipient or None,
+                user_intent_override=st.session_state.intent_override or None,
+                user_id=st.session_state.profile_id,
+            )
+            # The router recorded this turn, so the cached profile is stale
+            _invalidate_profile(st.session_state.profile_id)
+            draft = result.get("personalized_draft") or result.get("draft")
+            if isinstance(draft, DraftResult):
+                st.session_state.draft_subject = draft.subject
+                st.session_state.draft_body = draft.body
+            elif isinstance(draft, dict):
+                st.session_state.draft_subject = draft.get("subject", "")
+                st.session_state.draft_body = draft.get("body", "")
+            else:
+                st.session_state.draft_subject = "(No subject)"
+                st.session_state.draft_body = str(draft) if draft else "No draft generated."
+            errors = result.get("errors", [])
+            if errors:
+                for err in errors:
+                    st.warning(err)
+        except Exception as e:
+            st.error(f"Error: {e}")
+            st.session_state.draft_subject = ""
+            st.session_state.draft_body = ""
+
+    _render_variants()
 
     st.divider()
     st.subheader("Email Preview")
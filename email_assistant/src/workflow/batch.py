@@ -0,0 +1,203 @@
+"""Run JSONL request streams through the pipeline with bounded concurrency.
+
+Each input line is a GenerateRequest object (plus an optional ``id``); each
+output line is ``{"index", "id", "draft", "review", "retries", "errors"}`` or
+``{"index", "id", "error"}``. ``index`` is the 0-based input line number.
+
+Input is read lazily and at most ``window`` items are in flight, so memory
+stays flat however long the input is. In ordered mode, finished results wait
+in a buffer (bounded by the window) until every earlier line is written.
+
+A checkpoint file records which lines are done as a watermark (every index
+below it is done) plus the sparse set of done indices above it, together with
+the output file's size at that moment. Resuming truncates the output back to
+that size and skips every recorded index, so finished items are never
+regenerated and no result is written twice.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, Optional
+
+from pydantic import ValidationError
+
+from email_assistant.src.models.schemas import GenerateRequest
+
+# Completion-order runs may run ahead of the oldest unfinished line by at most
+# this many windows, which bounds the checkpoint's sparse set.
+_MAX_LEAD_WINDOWS = 4
+_CHECKPOINT_EVERY_S = 2.0
+
+
+@dataclass
+class Checkpoint:
+    """Done-set for a batch run: a watermark plus sparse indices above it."""
+
+    watermark: int = 0
+    done: set[int] = field(default_factory=set)
+    output_bytes: int = 0
+
+    def is_done(self, index: int) -> bool:
+        return index < self.watermark or index in self.done
+
+    def mark(self, index: int) -> None:
+        self.done.add(index)
+        while self.watermark in self.done:
+            self.done.remove(self.watermark)
+            self.watermark += 1
+
+    @classmethod
+    def load(cls, path: Path) -> "Checkpoint":
+        if not path.exists():
+            return cls()
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return cls(watermark=data["watermark"], done=set(data["done"]), output_bytes=data["output_bytes"])
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        data = {"watermark": self.watermark, "done": sorted(self.done), "output_bytes": self.output_bytes}
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+@dataclass
+class BatchStats:
+    submitted: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+
+def _parse_line(line: str) -> tuple[Optional[Any], Optional[GenerateRequest], Optional[str]]:
+    """(id, request, error) for one input line."""
+    try:
+        item = json.loads(line)
+    except ValueError as e:
+        return None, None, f"Invalid JSON: {e}"
+    if not isinstance(item, dict):
+        return None, None, "Each line must be a JSON object"
+    item_id = item.pop("id", None)
+    try:
+        return item_id, GenerateRequest.model_validate(item), None
+    except ValidationError as e:
+        return item_id, None, str(e)
+
+
+def _default_runner(request: GenerateRequest) -> dict[str, Any]:
+    from email_assistant.src.workflow.langgraph_flow import invoke, result_payload
+
+    return result_payload(invoke(**request.invoke_kwargs()))
+
+
+def run_batch(
+    lines: Iterable[str],
+    output: IO[str],
+    concurrency: int = 4,
+    ordered: bool = False,
+    checkpoint_path: Optional[Path] = None,
+    runner: Callable[[GenerateRequest], dict[str, Any]] = _default_runner,
+    on_result: Optional[Callable[[dict[str, Any]], None]] = None,
+) -> BatchStats:
+    """Run every line through runner, writing one JSON result per line to output.
+
+    With checkpoint_path, output must be a file opened for appending at the
+    checkpoint's ``output_bytes`` (see ``open_output``).
+    """
+    checkpoint = Checkpoint.load(checkpoint_path) if checkpoint_path else Checkpoint()
+    stats = BatchStats()
+    window = max(1, concurrency) * 2
+    write_lock = threading.Lock()
+    pending_ordered: dict[int, str] = {}
+    next_to_write = checkpoint.watermark if ordered else 0
+    last_save = time.monotonic()
+
+    def _save_checkpoint(force: bool = False) -> None:
+        nonlocal last_save
+        if checkpoint_path is None or not (force or time.monotonic() - last_save >= _CHECKPOINT_EVERY_S):
+            return
+        output.flush()
+        os.fsync(output.fileno())
+        checkpoint.output_bytes = output.tell()
+        checkpoint.save(checkpoint_path)
+        last_save = time.monotonic()
+
+    def _finish(index: int, record: Optional[dict[str, Any]]) -> None:
+        """Write a result (None for a blank line, which produces no output) and mark it done."""
+        nonlocal next_to_write
+        line = json.dumps(record) + "\n" if record is not None else ""
+        with write_lock:
+            if ordered:
+                pending_ordered[index] = line
+                while next_to_write in pending_ordered:
+                    output.write(pending_ordered.pop(next_to_write))
+                    checkpoint.mark(next_to_write)
+                    next_to_write += 1
+            else:
+                output.write(line)
+                checkpoint.mark(index)
+            _save_checkpoint()
+        if on_result and record is not None:
+            on_result(record)
+
+    def _lead_ok(index: int) -> bool:
+        return index < checkpoint.watermark + window * _MAX_LEAD_WINDOWS
+
+    in_flight: dict[Future, tuple[int, Any]] = {}
+
+    def _collect(block: bool) -> None:
+        if not in_flight:
+            return
+        done, _ = wait(list(in_flight), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            index, item_id = in_flight.pop(future)
+            try:
+                record = {"index": index, "id": item_id, **future.result()}
+                stats.succeeded += 1
+            except Exception as e:
+                record = {"index": index, "id": item_id, "error": str(e)}
+                stats.failed += 1
+            _finish(index, record)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch-worker") as pool:
+        for index, line in enumerate(lines):
+            if checkpoint.is_done(index):
+                stats.skipped += 1
+                continue
+            if not line.strip():
+                _finish(index, None)
+                continue
+            while len(in_flight) >= window or (in_flight and not _lead_ok(index)):
+                _collect(block=True)
+            item_id, request, error = _parse_line(line)
+            if error is not None:
+                stats.failed += 1
+                _finish(index, {"index": index, "id": item_id, "error": error})
+                continue
+            stats.submitted += 1
+            in_flight[pool.submit(runner, request)] = (index, item_id)
+            _collect(block=False)
+        while in_flight:
+            _collect(block=True)
+
+    with write_lock:
+        _save_checkpoint(force=True)
+    return stats
+
+
+def open_output(path: Path, checkpoint_path: Optional[Path]) -> IO[str]:
+    """Open path for appending, first truncating it to the checkpoint's recorded size."""
+    if checkpoint_path is None or not checkpoint_path.exists():
+        return open(path, "w", encoding="utf-8")
+    checkpoint = Checkpoint.load(checkpoint_path)
+    f = open(path, "a+", encoding="utf-8")
+    f.truncate(checkpoint.output_bytes)
+    f.seek(checkpoint.output_bytes)
+    return f
@@ -0,0 +1,208 @@
+"""Mail-merge campaigns: one reviewed template, many locally rendered copies.
+
+The full pipeline runs once, on the campaign prompt plus instructions to write
+``{{slot}}`` placeholders (``{{name}}``, ``{{company}}``, ``{{email}}`` and any
+custom recipient column). Each recipient's copy is then rendered locally --
+slots filled in one regex pass, then the personalization stage for the
+sender's signature and phrase rules -- so the LLM cost of a campaign does not
+grow with the number of recipients. Rows flagged ``touch_up`` get one extra
+LLM call to adapt their rendered copy.
+"""
+
+import csv
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from pydantic import BaseModel, Field
+
+from email_assistant.src.agents.personalization_agent import PersonalizationAgent
+from email_assistant.src.integrations.llm_factory import get_llm, invoke_structured
+from email_assistant.src.memory.profile_store import load_profile
+from email_assistant.src.models.schemas import CampaignRecipient, DraftResult, ReviewResult, UserProfile
+from email_assistant.src.observability.metrics import get_metrics
+from email_assistant.src.observability.usage import metered
+from email_assistant.src.prompts.registry import get_template
+
+SLOT = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+_KNOWN_COLUMNS = {"name", "email", "company", "touch_up"}
+_TRUE = {"1", "true", "yes", "y", "x"}
+
+
+class _TouchUpOutput(BaseModel):
+    subject: str = Field(..., description="Email subject line")
+    body: str = Field(..., description="Email body text")
+
+
+@dataclass
+class CampaignDraft:
+    recipient: CampaignRecipient
+    draft: Optional[DraftResult] = None
+    style_flags: list[str] = field(default_factory=list)
+    touched_up: bool = False
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "recipient": self.recipient.model_dump(mode="json"),
+            "draft": self.draft.model_dump(mode="json") if self.draft else None,
+            "style_flags": self.style_flags,
+            "touched_up": self.touched_up,
+            "error": self.error,
+        }
+
+
+@dataclass
+class CampaignResult:
+    template: DraftResult
+    review: Optional[ReviewResult]
+    drafts: list[CampaignDraft]
+
+
+def _recipient_from_row(row: dict[str, Any]) -> CampaignRecipient:
+    touch_up = row.get("touch_up")
+    if isinstance(touch_up, str):
+        touch_up = touch_up.strip().lower() in _TRUE
+    custom = {k: str(v) for k, v in row.items() if k not in _KNOWN_COLUMNS and k != "fields" and v not in (None, "")}
+    custom.update({k: str(v) for k, v in (row.get("fields") or {}).items()})
+    return CampaignRecipient(
+        name=row.get("name") or "",
+        email=row.get("email") or None,
+        company=row.get("company") or None,
+        fields=custom,
+        touch_up=bool(touch_up),
+    )
+
+
+def load_recipients(path: Path) -> list[CampaignRecipient]:
+    """Read a recipient table: CSV with a header row, or JSONL (by file extension).
+
+    Columns other than name, email, company and touch_up become custom fields.
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            rows: Iterable[dict[str, Any]] = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        return [_recipient_from_row(row) for row in rows]
+
+
+def template_prompt(prompt: str, slots: Iterable[str]) -> str:
+    """The campaign prompt plus instructions to write a mail-merge template."""
+    placeholders = ", ".join("{{" + slot + "}}" for slot in slots)
+    return (
+        f"{prompt}\n\n"
+        "This email is a mail-merge template that will be sent to many recipients. "
+        f"Write it once, using these placeholders verbatim wherever the recipient's details belong: {placeholders}. "
+        "Greet the recipient as {{name}}. Do not invent any other placeholders."
+    )
+
+
+def campaign_slots(recipients: list[CampaignRecipient]) -> list[str]:
+    """Slots every recipient can fill, name first."""
+    if not recipients:
+        return ["name"]
+    common = set(recipients[0].slot_values())
+    for recipient in recipients[1:]:
+        common &= set(recipient.slot_values())
+    return ["name"] + sorted(common - {"name"})
+
+
+def fill_slots(text: str, values: dict[str, str]) -> tuple[str, list[str]]:
+    """Replace every ``{{slot}}`` in text; return the text and any slots with no value."""
+    missing: list[str] = []
+
+    def _replace(match: re.Match) -> str:
+        slot = match.group(1)
+        if slot in values:
+            return values[slot]
+        missing.append(slot)
+        return match.group()
+
+    return SLOT.sub(_replace, text), missing
+
+
+def render(template: DraftResult, recipient: CampaignRecipient, profile: Optional[UserProfile]) -> CampaignDraft:
+    """Fill the template for one recipient and run it through personalization."""
+    values = recipient.slot_values()
+    subject, missing_subject = fill_slots(template.subject, values)
+    body, missing_body = fill_slots(template.body, values)
+    missing = sorted(set(missing_subject + missing_body))
+    if missing:
+        return CampaignDraft(recipient=recipient, error=f"No value for slot(s): {', '.join(missing)}")
+    draft = DraftResult(subject=subject, body=body, intent=template.intent, tone=template.tone)
+    out = PersonalizationAgent().run({"draft": draft, "profile": profile})
+    return CampaignDraft(recipient=recipient, draft=out["personalized_draft"], style_flags=out["style_flags"])
+
+
+def touch_up(item: CampaignDraft, profile: Optional[UserProfile], user_id: str = "default") -> CampaignDraft:
+    """Adapt a rendered copy with one LLM call, metered against user_id.
+
+    On failure, including an exhausted budget, the rendered copy is kept.
+    """
+    details = "\n".join(f"- {k}: {v}" for k, v in item.recipient.slot_values().items())
+    try:
+        with metered(user_id):
+            out = invoke_structured(
+                get_llm(temperature=0.4, node="campaign_touch_up"),
+                _TouchUpOutput,
+                get_template("campaign_touch_up"),
+                details=details,
+                subject=item.draft.subject,
+                body=item.draft.body,
+            )
+    except Exception as e:
+        item.error = f"Touch-up failed, kept rendered copy: {e}"
+        return item
+    draft = DraftResult(subject=out.subject, body=out.body, intent=item.draft.intent, tone=item.draft.tone)
+    personalized = PersonalizationAgent().run({"draft": draft, "profile": profile})
+    item.draft = personalized["personalized_draft"]
+    item.style_flags = personalized["style_flags"]
+    item.touched_up = True
+    return item
+
+
+def run_campaign(
+    prompt: str,
+    recipients: list[CampaignRecipient],
+    tone: str = "professional",
+    intent: Optional[str] = None,
+    user_id: str = "default",
+    concurrency: int = 4,
+) -> CampaignResult:
+    """Draft and review one template, then render a copy per recipient.
+
+    The template run is not recorded in the user's history: its prompt is the
+    synthetic mail-merge instruction, not something the user wrote. Raises
+    RuntimeError if the pipeline reports any error or produces no template.
+    """
+    from email_assistant.src.workflow.langgraph_flow import invoke
+
+    state = invoke(
+        raw_prompt=template_prompt(prompt, campaign_slots(recipients)),
+        user_tone=tone,
+        user_intent_override=intent,
+        user_id=user_id,
+        remember=False,
+    )
+    template = state.get("personalized_draft") or state.get("draft")
+    errors = state.get("errors") or []
+    if errors or not isinstance(template, DraftResult) or not template.body.strip():
+        raise RuntimeError("; ".join(errors) or "Pipeline produced no template")
+
+    profile = load_profile(user_id)
+    drafts = [render(template, recipient, profile) for recipient in recipients]
+    pending = [d for d in drafts if d.recipient.touch_up and d.draft is not None]
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            list(pool.map(lambda d: touch_up(d, profile, user_id), pending))
+
+    metrics = get_metrics()
+    metrics.increment("campaign.rendered", sum(1 for d in drafts if d.draft is not None))
+    metrics.increment("campaign.touched_up", sum(1 for d in drafts if d.touched_up))
+    metrics.increment("campaign.render_errors", sum(1 for d in drafts if d.draft is None))
+    return CampaignResult(template=template, review=state.get("review_result"), drafts=drafts)
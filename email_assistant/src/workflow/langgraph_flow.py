@@ -1,9 +1,15 @@
 """LangGraph workflow for the AI Email Assistant."""
 
-from typing import Any, Literal, TypedDict
+import operator
+import time
+import uuid
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from typing import Annotated, Any, Iterator, Literal, TypedDict
 
 from langgraph.graph import END, StateGraph
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Send
 
 from email_assistant.src.agents.input_parser_agent import InputParserAgent
 from email_assistant.src.agents.intent_detection_agent import IntentDetectionAgent
@@ -13,7 +19,9 @@ from email_assistant.src.agents.personalization_agent import PersonalizationAgen
 from email_assistant.src.agents.review_agent import ReviewAgent
 from email_assistant.src.agents.router_agent import RouterAgent
 from email_assistant.src.integrations.config_loader import load_mcp_config
-from email_assistant.src.models.schemas import ReviewResult
+from email_assistant.src.memory.profile_store import load_profile, record_turn
+from email_assistant.src.models.schemas import DraftResult, ReviewResult, ToneType
+from email_assistant.src.observability.usage import budget_mode, metered
 
 
 class EmailAssistantState(TypedDict, total=False):
@@ -24,15 +32,35 @@ class EmailAssistantState(TypedDict, total=False):
     user_recipient: str | None
     user_intent_override: str | None
     user_id: str
+    profile: Any
     parsed_input: Any
     intent: Any
     tone_context: str
     draft: Any
     personalized_draft: Any
+    style_flags: list[str]
     review_result: Any
+    review_cache: dict[str, dict]
     errors: list[str]
     retry_count: int
     retry_reason: str
+    remember: bool
+
+
+class VariantsState(TypedDict, total=False):
+    """State for the compare-tones graph: shared parse/intent, one draft per tone."""
+
+    raw_prompt: str
+    user_tone: str
+    user_recipient: str | None
+    user_intent_override: str | None
+    user_id: str
+    profile: Any
+    parsed_input: Any
+    intent: Any
+    errors: list[str]
+    tones: list[str]
+    variants: Annotated[list[DraftResult], operator.add]
 
 
 # Instantiate agents once
@@ -110,7 +138,43 @@ def create_graph() -> StateGraph:
     return workflow
 
 
+def _fan_out_tones(state: VariantsState) -> list[Send]:
+    """One variant task per requested tone, each with the shared parse and intent."""
+    parsed = state.get("parsed_input")
+    sends = []
+    for tone in state.get("tones", []):
+        branch = dict(state)
+        branch["parsed_input"] = parsed.model_copy(update={"tone": ToneType(tone)}) if parsed else None
+        sends.append(Send("variant", branch))
+    return sends
+
+
+def _variant_node(state: dict[str, Any]) -> dict[str, Any]:
+    """Tone styling, drafting and personalization for one tone."""
+    branch = dict(state)
+    branch.update(_tone_stylist.run(branch))
+    branch.update(_draft_writer.run(branch))
+    branch.update(_personalization.run(branch))
+    draft = branch.get("personalized_draft") or branch.get("draft")
+    return {"variants": [draft] if isinstance(draft, DraftResult) else []}
+
+
+def create_variants_graph() -> StateGraph:
+    """Parse and classify once, then draft every requested tone in parallel."""
+    workflow = StateGraph(VariantsState)
+    workflow.add_node("input_parser", _input_parser_node)
+    workflow.add_node("intent_detection", _intent_detection_node)
+    workflow.add_node("variant", _variant_node)
+
+    workflow.set_entry_point("input_parser")
+    workflow.add_edge("input_parser", "intent_detection")
+    workflow.add_conditional_edges("intent_detection", _fan_out_tones, ["variant"])
+    workflow.add_edge("variant", END)
+    return workflow
+
+
 _compiled_graph = None
+_compiled_variants_graph = None
 
 
 def get_graph():
@@ -121,23 +185,182 @@ def get_graph():
     return _compiled_graph
 
 
-def invoke(
+@contextmanager
+def _request_thread(graph: Any) -> Iterator[dict[str, Any]]:
+    """Checkpoint config with a thread of its own, deleted when the run ends.
+
+    A fresh thread per request keeps concurrent runs from sharing checkpoints,
+    and deleting it keeps the in-memory checkpointer from growing.
+    """
+    thread_id = uuid.uuid4().hex
+    try:
+        yield {"configurable": {"thread_id": thread_id}}
+    finally:
+        graph.checkpointer.delete_thread(thread_id)
+
+
+def _initial_state(
     raw_prompt: str,
-    user_tone: str = "professional",
-    user_recipient: str | None = None,
-    user_intent_override: str | None = None,
-    user_id: str = "default",
-) -> dict[str, Any]:
-    """Run the email assistant pipeline and return final state."""
-    initial: EmailAssistantState = {
+    user_tone: str,
+    user_recipient: str | None,
+    user_intent_override: str | None,
+    user_id: str,
+    remember: bool = True,
+) -> EmailAssistantState:
+    return {
         "raw_prompt": raw_prompt,
         "user_tone": user_tone,
         "user_recipient": user_recipient,
         "user_intent_override": user_intent_override,
         "user_id": user_id,
+        "profile": load_profile(user_id),
         "retry_count": 0,
+        "review_cache": {},
+        "remember": remember,
     }
-    graph = get_graph()
-    config: dict[str, Any] = {"configurable": {"thread_id": "default"}}
-    final_state = graph.invoke(initial, config)
+
+
+def invoke(
+    raw_prompt: str,
+    user_tone: str = "professional",
+    user_recipient: str | None = None,
+    user_intent_override: str | None = None,
+    user_id: str = "default",
+    remember: bool = True,
+) -> dict[str, Any]:
+    """Run the email assistant pipeline and return final state.
+
+    The user's profile is loaded once here and shared by every agent through
+    the graph state, so all nodes see the same version for the whole request.
+    LLM usage is metered against user_id; raises BudgetExceededError if the
+    user is over budget. With remember=False the final draft is not recorded
+    as a turn (history, style stats, classifier training data).
+    """
+    with metered(user_id):
+        initial = _initial_state(raw_prompt, user_tone, user_recipient, user_intent_override, user_id, remember)
+        graph = get_graph()
+        with _request_thread(graph) as config:
+            final_state = graph.invoke(initial, config)
     return dict(final_state)
+
+
+def result_payload(state: dict[str, Any]) -> dict[str, Any]:
+    """JSON-safe summary of a final pipeline state: draft, review, retries, errors."""
+    draft = state.get("personalized_draft") or state.get("draft")
+    review = state.get("review_result")
+    return {
+        "draft": draft.model_dump(mode="json") if isinstance(draft, DraftResult) else None,
+        "review": review.model_dump(mode="json") if isinstance(review, ReviewResult) else None,
+        "retries": state.get("retry_count", 0),
+        "errors": state.get("errors") or [],
+    }
+
+
+@dataclass
+class NodeEvent:
+    """Progress event from ``stream``.
+
+    status is "started" or "finished" for a graph node, and "done" once with
+    the final state when the run completes. elapsed_s is set on "finished".
+    """
+
+    status: Literal["started", "finished", "done"]
+    node: str = ""
+    elapsed_s: float = 0.0
+    state: dict[str, Any] | None = None
+
+
+def stream(
+    raw_prompt: str,
+    user_tone: str = "professional",
+    user_recipient: str | None = None,
+    user_intent_override: str | None = None,
+    user_id: str = "default",
+) -> Iterator[NodeEvent]:
+    """Run the pipeline like ``invoke``, yielding an event as each node starts and finishes.
+
+    The budget is checked once up front; usage is attributed to user_id only
+    while the graph advances, never across a yield, so calls the consumer
+    makes between events are not billed to this user.
+    """
+    budget = budget_mode(user_id)
+    initial = _initial_state(raw_prompt, user_tone, user_recipient, user_intent_override, user_id)
+    graph = get_graph()
+    started: dict[str, float] = {}
+    final_state: dict[str, Any] = dict(initial)
+    with _request_thread(graph) as config, closing(graph.stream(initial, config, stream_mode=["tasks", "values"])) as steps:
+        while True:
+            with metered(user_id, budget):
+                step = next(steps, None)
+            if step is None:
+                break
+            mode, payload = step
+            if mode == "values":
+                final_state = dict(payload)
+            elif "result" in payload:
+                elapsed = time.perf_counter() - started.pop(payload["id"], time.perf_counter())
+                yield NodeEvent(status="finished", node=payload["name"], elapsed_s=elapsed)
+            else:
+                started[payload["id"]] = time.perf_counter()
+                yield NodeEvent(status="started", node=payload["name"])
+    yield NodeEvent(status="done", state=final_state)
+
+
+def get_variants_graph():
+    """Compiled compare-tones graph. Variants are not checkpointed."""
+    global _compiled_variants_graph
+    if _compiled_variants_graph is None:
+        _compiled_variants_graph = create_variants_graph().compile()
+    return _compiled_variants_graph
+
+
+def invoke_variants(
+    raw_prompt: str,
+    tones: list[str],
+    user_recipient: str | None = None,
+    user_intent_override: str | None = None,
+    user_id: str = "default",
+) -> dict[str, Any]:
+    """Draft raw_prompt in each of tones concurrently. Nothing is saved to memory.
+
+    The final state's ``variants`` holds one DraftResult per tone, in the order
+    of tones. Pass the chosen one to ``save_variant``. Raises ValueError, before
+    any agent runs, if tones is empty or names a tone that is not a ToneType value.
+    """
+    tones = list(dict.fromkeys(tones))
+    valid = [t.value for t in ToneType]
+    unknown = [t for t in tones if t not in valid]
+    if not tones or unknown:
+        raise ValueError(f"Unknown tone(s) {unknown}; expected one or more of {valid}" if unknown else "No tones to compare")
+    with metered(user_id):
+        initial: VariantsState = {
+            "raw_prompt": raw_prompt,
+            "user_tone": tones[0],
+            "user_recipient": user_recipient,
+            "user_intent_override": user_intent_override,
+            "user_id": user_id,
+            "profile": load_profile(user_id),
+            "tones": tones,
+            "variants": [],
+        }
+        final_state = dict(get_variants_graph().invoke(initial))
+    order = {tone: i for i, tone in enumerate(tones)}
+    # A variant that failed to draft (e.g. empty prompt) has no tone and sorts last
+    final_state["variants"] = sorted(
+        final_state.get("variants", []), key=lambda d: order.get(d.tone.value if d.tone else None, len(order))
+    )
+    return final_state
+
+
+def save_variant(state: dict[str, Any], draft: DraftResult) -> None:
+    """Commit the variant the user picked, as a single turn like a normal run."""
+    parsed = state.get("parsed_input")
+    record_turn(
+        user_id=state.get("user_id", "default"),
+        prompt=str(state.get("raw_prompt") or ""),
+        subject=draft.subject,
+        body=draft.body,
+        intent=draft.intent.value if draft.intent else "other",
+        tone=draft.tone.value if draft.tone else "professional",
+        recipient=parsed.recipient if parsed else None,
+    )
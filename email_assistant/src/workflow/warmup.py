@@ -0,0 +1,165 @@
+"""Startup warm-up: pay the first-request costs before the first request.
+
+A cold process otherwise spends its first request parsing mcp.yaml,
+compiling the LangGraph graphs, importing provider SDKs, building LLM
+clients, opening TLS connections and loading the local classifiers, tone
+library and profile store. ``warm_up`` does all of that up front and times
+each step, so the first real request runs at steady-state latency. A failed
+step is recorded on the report and never raised: a missing API key should
+not stop the app from booting.
+
+The HTTP server runs it in the background at startup (``/readyz`` answers 503
+until it finishes), the Streamlit app once per server process, and
+``email-assistant warmup`` on demand.
+"""
+
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Iterable
+
+# Temperatures the agents ask for, so warm-up builds the same pooled clients
+_NODE_TEMPERATURES = {"input_parser": 0.1, "intent_detection": 0.0, "draft_writer": 0.7, "review": 0.0}
+
+
+@dataclass
+class WarmupStep:
+    name: str
+    duration_s: float
+    ok: bool = True
+    detail: str = ""
+
+
+@dataclass
+class WarmupReport:
+    steps: list[WarmupStep] = field(default_factory=list)
+    total_s: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(step.ok for step in self.steps)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"ok": self.ok, "total_s": round(self.total_s, 4), "steps": [asdict(s) for s in self.steps]}
+
+
+def _run_step(report: WarmupReport, name: str, fn: Callable[[], str]) -> None:
+    start = time.perf_counter()
+    try:
+        detail, ok = fn(), True
+    except Exception as e:
+        detail, ok = f"{type(e).__name__}: {e}", False
+    report.steps.append(WarmupStep(name, round(time.perf_counter() - start, 4), ok, detail or ""))
+
+
+def _config() -> str:
+    from email_assistant.src.integrations.config_loader import load_mcp_config
+
+    config = load_mcp_config()
+    return f"{config.get('primary_provider')}/{config.get('primary_model')}"
+
+
+def _graphs() -> str:
+    from email_assistant.src.workflow.langgraph_flow import get_graph, get_variants_graph
+
+    get_graph()
+    get_variants_graph()
+    return ""
+
+
+def _local_models() -> str:
+    from email_assistant.src.nlp.intent_classifier import get_intent_classifier
+    from email_assistant.src.nlp.tone_classifier import get_tone_classifier
+    from email_assistant.src.nlp.tone_library import get_tone_library
+
+    get_tone_classifier()
+    get_intent_classifier()
+    get_tone_library()
+    return ""
+
+
+def _stores(user_ids: Iterable[str]) -> Callable[[], str]:
+    def _load() -> str:
+        from email_assistant.src.memory.profile_store import load_profile
+        from email_assistant.src.observability.usage import get_meter
+
+        found = sum(load_profile(user_id) is not None for user_id in user_ids)
+        get_meter()
+        return f"{found} profile(s) loaded"
+
+    return _load
+
+
+def _clients(clients: list[Any]) -> Callable[[], str]:
+    def _build() -> str:
+        from email_assistant.src.integrations.config_loader import load_mcp_config
+        from email_assistant.src.integrations.llm_factory import get_fallback_llm, get_llm
+
+        nodes = load_mcp_config().get("nodes") or {}
+        seen: set[int] = set()
+        for node, temperature in _NODE_TEMPERATURES.items():
+            llms = [get_llm(temperature=temperature, node=node)]
+            if (nodes.get(node) or {}).get("fallback_model"):
+                # Only nodes with their own fallback_model ever call it (see invoke_structured)
+                llms.append(get_fallback_llm(temperature, node=node))
+            for llm in llms:
+                if llm is not None and id(llm) not in seen:
+                    seen.add(id(llm))
+                    clients.append(llm)
+        return f"{len(clients)} client(s)"
+
+    return _build
+
+
+def open_connection(llm: Any) -> bool:
+    """Make one cheap authenticated request (list models) so the client's pool holds a live TLS connection.
+
+    Returns False for clients with no such endpoint (stub, cassette replay).
+    """
+    inner = getattr(llm, "inner", llm)
+    if inner is None:
+        return False
+    for attr in ("root_client", "_client", "client"):
+        models = getattr(getattr(inner, attr, None), "models", None)
+        if models is not None and callable(getattr(models, "list", None)):
+            models.list()
+            return True
+    return False
+
+
+def _connections(clients: list[Any]) -> Callable[[], str]:
+    def _open() -> str:
+        opened, errors = 0, []
+        for llm in clients:
+            try:
+                opened += open_connection(llm)
+            except Exception as e:
+                errors.append(f"{type(llm).__name__}: {type(e).__name__}")
+        if errors:
+            raise ConnectionError(f"{opened} opened; failed: {', '.join(errors)}")
+        return f"{opened} connection(s) opened"
+
+    return _open
+
+
+def warm_up(connect: bool = True, user_ids: Iterable[str] = ("default",)) -> WarmupReport:
+    """Run every warm-up step and return their timings. Never raises."""
+    report = WarmupReport()
+    clients: list[Any] = []
+    start = time.perf_counter()
+    _run_step(report, "config", _config)
+    _run_step(report, "graphs", _graphs)
+    _run_step(report, "local_models", _local_models)
+    _run_step(report, "stores", _stores(list(user_ids)))
+    _run_step(report, "llm_clients", _clients(clients))
+    if connect:
+        _run_step(report, "connections", _connections(clients))
+    report.total_s = time.perf_counter() - start
+    return report
+
+
+def format_report(report: WarmupReport) -> str:
+    lines = [f"{'step':<14} {'seconds':>8}  detail"]
+    for step in report.steps:
+        lines.append(f"{step.name:<14} {step.duration_s:>8.3f}  {'' if step.ok else 'FAILED '}{step.detail}")
+    lines.append(f"{'total':<14} {report.total_s:>8.3f}")
+    return "\n".join(lines)
@@ -0,0 +1,74 @@
+"""Unit tests for the columnar analytics export and queries."""
+
+from pathlib import Path
+
+import pytest
+
+from email_assistant.src.analytics.export import export_records, export_store
+from email_assistant.src.analytics.query import group_count, group_mean, length_histogram, load_table, retry_rate
+from email_assistant.src.memory.profile_store import append_conversation, compact, iter_turn_records, record_turn, save_profile
+from email_assistant.src.models.schemas import ConversationTurn, UserProfile
+
+
+def _rec(intent: str, tone: str, words: int, retries: int = 0) -> dict:
+    return {"intent": intent, "tone": tone, "subject": "Hi", "body": " ".join(["w"] * words), "retries": retries}
+
+
+@pytest.fixture
+def table(tmp_path: Path):
+    records = [
+        ("alice", _rec("outreach", "formal", 10)),
+        ("alice", _rec("outreach", "casual", 20, retries=1)),
+        ("bob", _rec("apology", "formal", 30)),
+        ("bob", _rec("outreach", "formal", 40, retries=2)),
+    ]
+    assert export_records(iter(records), tmp_path) == 4
+    return load_table(tmp_path)
+
+
+class TestQueries:
+    def test_group_count_single_and_multi(self, table):
+        assert group_count(table, "intent") == {"outreach": 3, "apology": 1}
+        assert group_count(table, ("user", "tone")) == {
+            ("alice", "formal"): 1,
+            ("alice", "casual"): 1,
+            ("bob", "formal"): 2,
+        }
+
+    def test_group_mean(self, table):
+        assert group_mean(table, "body_words", "user") == {"alice": 15.0, "bob": 35.0}
+
+    def test_retry_rate(self, table):
+        assert retry_rate(table, "tone") == {"formal": pytest.approx(1 / 3), "casual": 1.0}
+
+    def test_length_histogram(self, table):
+        counts, edges = length_histogram(table, bins=[0, 25, 50])
+        assert counts == [2, 2]
+
+    def test_rejects_numeric_group_key(self, table):
+        with pytest.raises(ValueError):
+            group_count(table, "body_words")
+
+
+def test_export_store_streams_history_and_legacy_snapshot(tmp_profiles_json: Path, tmp_path: Path):
+    legacy = ConversationTurn(prompt="p", subject="s", body="old body", intent="other", tone="casual")
+    save_profile(UserProfile(id="legacy", conversation_history=[legacy]))
+    record_turn("u1", "p", "s", "new body here", "apology", "formal", retries=1)
+    out = tmp_path / "export"
+    assert export_store(out) == 2
+    table = load_table(out)
+    assert group_count(table, "user") == {"u1": 1, "legacy": 1}
+    assert retry_rate(table, "user") == {"u1": 1.0, "legacy": 0.0}
+
+
+def test_turn_records_merge_log_only_and_snapshot_turns(tmp_profiles_json: Path):
+    legacy = ConversationTurn(prompt="legacy", subject="s", body="b", intent="other", tone="casual")
+    save_profile(UserProfile(id="u1", conversation_history=[legacy]))
+    record_turn("u1", "indexed", "s", "b", "apology", "formal")
+    record_turn("u1", "indexed", "s", "b", "apology", "formal")
+    append_conversation("u1", "log only", "s", "b", "other", "casual")
+    prompts = [r["prompt"] for _, r in iter_turn_records()]
+    assert sorted(prompts) == ["indexed", "indexed", "legacy", "log only"]
+    # Compaction moves turns into the snapshot; each is still yielded exactly once
+    compact("u1")
+    assert sorted(r["prompt"] for _, r in iter_turn_records()) == sorted(prompts)
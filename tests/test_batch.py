@@ -0,0 +1,93 @@
+"""Tests for the resumable JSONL batch runner and CLI."""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from email_assistant.src import cli
+from email_assistant.src.models.schemas import GenerateRequest
+from email_assistant.src.workflow.batch import Checkpoint, open_output, run_batch
+
+
+def _lines(n: int) -> list[str]:
+    return [json.dumps({"id": f"r{i}", "prompt": f"request {i}"}) + "\n" for i in range(n)]
+
+
+def _runner(request: GenerateRequest) -> dict:
+    i = int(request.prompt.split()[-1])
+    time.sleep(0.001 * (i % 3))  # finish out of order
+    return {"draft": {"subject": request.prompt}}
+
+
+class TestCheckpoint:
+    def test_watermark_absorbs_contiguous_indices(self):
+        ckpt = Checkpoint()
+        for i in (1, 2, 0, 4):
+            ckpt.mark(i)
+        assert ckpt.watermark == 3
+        assert ckpt.done == {4}
+        assert ckpt.is_done(2) and ckpt.is_done(4) and not ckpt.is_done(3)
+
+
+class TestRunBatch:
+    def test_ordered_output_matches_input(self, tmp_path: Path):
+        out = tmp_path / "out.jsonl"
+        with open(out, "w") as f:
+            stats = run_batch(_lines(50) + ["\n", "not json\n"], f, concurrency=8, ordered=True, runner=_runner)
+        records = [json.loads(line) for line in out.read_text().splitlines()]
+        assert [r["index"] for r in records] == list(range(50)) + [51]
+        assert records[0]["id"] == "r0"
+        assert "Invalid JSON" in records[-1]["error"]
+        assert (stats.succeeded, stats.failed) == (50, 1)
+
+    def test_completion_order_writes_every_line_once(self, tmp_path: Path):
+        out = tmp_path / "out.jsonl"
+        with open(out, "w") as f:
+            stats = run_batch(_lines(40), f, concurrency=4, runner=_runner)
+        indices = sorted(json.loads(line)["index"] for line in out.read_text().splitlines())
+        assert indices == list(range(40))
+        assert stats.submitted == stats.succeeded == 40
+
+    def test_runner_errors_become_error_records(self, tmp_path: Path):
+        def failing(request: GenerateRequest) -> dict:
+            raise RuntimeError("boom")
+
+        out = tmp_path / "out.jsonl"
+        with open(out, "w") as f:
+            stats = run_batch(_lines(3), f, runner=failing)
+        assert stats.failed == 3
+        assert all(json.loads(line)["error"] == "boom" for line in out.read_text().splitlines())
+
+    def test_resume_skips_finished_items_and_drops_partial_output(self, tmp_path: Path):
+        out, ckpt = tmp_path / "out.jsonl", tmp_path / "run.ckpt"
+        with open_output(out, ckpt) as f:
+            run_batch(_lines(30), f, concurrency=4, ordered=True, checkpoint_path=ckpt, runner=_runner)
+        # A crash after the last checkpoint can leave results the checkpoint doesn't cover
+        with open(out, "a") as f:
+            f.write('{"index": 30, "id": "r30", "partial"')
+
+        calls: list[str] = []
+        lock = threading.Lock()
+
+        def counting(request: GenerateRequest) -> dict:
+            with lock:
+                calls.append(request.prompt)
+            return _runner(request)
+
+        with open_output(out, ckpt) as f:
+            stats = run_batch(_lines(60), f, concurrency=4, ordered=True, checkpoint_path=ckpt, runner=counting)
+        records = [json.loads(line) for line in out.read_text().splitlines()]
+        assert [r["index"] for r in records] == list(range(60))
+        assert stats.skipped == 30 and len(calls) == 30
+        assert Checkpoint.load(ckpt).watermark == 60
+
+
+class TestCli:
+    def test_checkpoint_requires_output(self, tmp_path: Path, capsys):
+        src = tmp_path / "in.jsonl"
+        src.write_text("".join(_lines(1)))
+        assert cli.main(["batch", str(src), "--checkpoint", str(tmp_path / "c")]) == 2
+        assert "--checkpoint requires --output" in capsys.readouterr().err
@@ -0,0 +1,99 @@
+"""Tests for mail-merge campaign rendering."""
+
+from pathlib import Path
+
+import pytest
+
+from email_assistant.src.models.schemas import CampaignRecipient, DraftResult, IntentType, ToneType, UserProfile
+from email_assistant.src.workflow import campaign, langgraph_flow
+from email_assistant.src.workflow.campaign import campaign_slots, fill_slots, load_recipients, render, run_campaign
+
+_TEMPLATE = DraftResult(
+    subject="An invite for {{company}}",
+    body="Hi {{name}},\n\nAs {{role}} at {{company}}, you may like our webinar.\n\nBest regards,\nAlice",
+    intent=IntentType.OUTREACH,
+    tone=ToneType.FRIENDLY,
+)
+
+
+class TestRecipients:
+    def test_csv_and_jsonl_tables(self, tmp_path: Path):
+        csv_path = tmp_path / "people.csv"
+        csv_path.write_text("name,company,role,touch_up\nAda,Acme,CTO,\nBob,Globex,VP,yes\n")
+        jsonl_path = tmp_path / "people.jsonl"
+        jsonl_path.write_text('{"name": "Ada", "company": "Acme", "role": "CTO"}\n{"name": "Bob", "touch_up": true}\n')
+
+        ada, bob = load_recipients(csv_path)
+        assert ada.fields == {"role": "CTO"} and not ada.touch_up and bob.touch_up
+        ada, bob = load_recipients(jsonl_path)
+        assert ada.slot_values() == {"name": "Ada", "company": "Acme", "role": "CTO"} and bob.touch_up
+
+    def test_template_only_uses_slots_every_recipient_has(self):
+        recipients = [
+            CampaignRecipient(name="Ada", company="Acme", fields={"role": "CTO"}),
+            CampaignRecipient(name="Bob", company="Globex"),
+        ]
+        assert campaign_slots(recipients) == ["name", "company"]
+
+
+class TestRender:
+    def test_fill_slots_reports_missing(self):
+        text, missing = fill_slots("Hi {{ name }}, re {{deal}}", {"name": "Ada"})
+        assert text == "Hi Ada, re {{deal}}" and missing == ["deal"]
+
+    def test_render_personalizes_each_copy(self):
+        profile = UserProfile(id="u", name="Alice")
+        recipient = CampaignRecipient(name="Ada", company="Acme", fields={"role": "CTO"})
+        item = render(_TEMPLATE, recipient, profile)
+        assert item.error is None
+        assert item.draft.subject == "An invite for Acme"
+        assert item.draft.body.startswith("Hi Ada,\n\nAs CTO at Acme")
+        assert item.draft.body.endswith("Alice") and item.draft.body.count("Alice") == 1
+
+    def test_render_error_for_missing_value(self):
+        item = render(_TEMPLATE, CampaignRecipient(name="Bob", company="Globex"), None)
+        assert item.draft is None and "role" in item.error
+
+
+class TestRunCampaign:
+    def test_one_pipeline_run_and_touch_up_only_for_flagged_rows(
+        self, tmp_profiles_json: Path, monkeypatch: pytest.MonkeyPatch
+    ):
+        runs: list[str] = []
+        touch_ups: list[dict] = []
+
+        def fake_invoke(raw_prompt: str, **kwargs):
+            assert kwargs["remember"] is False
+            runs.append(raw_prompt)
+            return {"personalized_draft": _TEMPLATE, "errors": []}
+
+        def fake_structured(llm, schema, template, **variables):
+            touch_ups.append(variables)
+            return schema(subject=variables["subject"], body=variables["body"].replace("webinar", "CTO roundtable"))
+
+        monkeypatch.setattr(langgraph_flow, "invoke", fake_invoke)
+        monkeypatch.setattr(campaign, "get_llm", lambda **kw: object())
+        monkeypatch.setattr(campaign, "invoke_structured", fake_structured)
+
+        recipients = [
+            CampaignRecipient(name=f"R{i}", company="Acme", fields={"role": "CTO"}, touch_up=i == 3)
+            for i in range(10)
+        ]
+        result = run_campaign("Invite them to our webinar", recipients)
+
+        assert len(runs) == 1 and "{{name}}" in runs[0] and "{{role}}" in runs[0]
+        assert len(touch_ups) == 1
+        assert [d.touched_up for d in result.drafts] == [i == 3 for i in range(10)]
+        assert "roundtable" in result.drafts[3].draft.body
+        assert result.drafts[0].draft.body.startswith("Hi R0,")
+
+    def test_failed_template_raises(self, tmp_profiles_json: Path, monkeypatch: pytest.MonkeyPatch):
+        error_draft = DraftResult(subject="(Error)", body="Failed to generate draft: down")
+        monkeypatch.setattr(langgraph_flow, "invoke", lambda **kw: {"draft": error_draft, "errors": ["down"]})
+        with pytest.raises(RuntimeError, match="down"):
+            run_campaign("Invite", [CampaignRecipient(name="Ada")])
+
+    def test_pipeline_errors_reject_the_template(self, tmp_profiles_json: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(langgraph_flow, "invoke", lambda **kw: {"personalized_draft": _TEMPLATE, "errors": ["Prompt cannot be empty"]})
+        with pytest.raises(RuntimeError, match="empty"):
+            run_campaign("Invite", [CampaignRecipient(name="Ada")])
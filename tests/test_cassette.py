@@ -0,0 +1,68 @@
+"""Tests for LLM cassette record/replay."""
+
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+from email_assistant.src.integrations import cassette
+from email_assistant.src.integrations.cassette import CassetteMissError, cassette_key
+from email_assistant.src.integrations.llm_factory import get_llm, invoke_structured
+from email_assistant.src.integrations.stub_client import StubChatModel
+from email_assistant.src.prompts.registry import get_template
+from email_assistant.src.workflow.langgraph_flow import invoke
+
+
+class _Answer(BaseModel):
+    subject: str
+    body: str
+
+
+@pytest.fixture
+def cassettes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("LLM_CASSETTE_DIR", str(tmp_path / "cassettes"))
+    monkeypatch.setenv("PRIMARY_PROVIDER", "stub")
+    return tmp_path / "cassettes"
+
+
+class TestCassettes:
+    def test_key_ignores_whitespace_and_cache_blocks(self):
+        plain = cassette._normalize([SystemMessage(content="Be  brief."), HumanMessage(content="Hi\n there")])
+        blocks = cassette._normalize(
+            [SystemMessage(content=[{"type": "text", "text": "Be brief.", "cache_control": {"type": "ephemeral"}}]),
+             HumanMessage(content="Hi there")]
+        )
+        assert cassette_key("_Answer", plain) == cassette_key("_Answer", blocks)
+        assert cassette_key("_Answer", plain) != cassette_key("Other", plain)
+
+    def test_record_then_replay_without_provider(self, cassettes: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("LLM_CASSETTE_MODE", "record")
+        variables = dict(tone_context="", prompt="Ask Sam for the Q3 numbers", recipient="", length_hint="",
+                         sender_info="", conversation_snippets="")
+        recorded = invoke_structured(get_llm(), _Answer, get_template("draft_writer"), **variables)
+        assert len(list(cassettes.rglob("*.json"))) == 1
+
+        monkeypatch.setenv("LLM_CASSETTE_MODE", "replay")
+        monkeypatch.setattr(StubChatModel, "with_structured_output", lambda *a, **k: pytest.fail("provider called"))
+        replayed = invoke_structured(get_llm(), _Answer, get_template("draft_writer"), **variables)
+        assert replayed == recorded
+
+        with pytest.raises(CassetteMissError, match="LLM_CASSETTE_MODE=record"):
+            invoke_structured(get_llm(), _Answer, get_template("draft_writer"), **{**variables, "prompt": "new"})
+
+    def test_pipeline_replays_offline(self, cassettes: Path, tmp_profiles_json: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("LLM_CASSETTE_MODE", "record")
+        recorded = invoke(raw_prompt="Thank Priya for the demo", user_tone="friendly", user_id="cassette")
+        monkeypatch.setenv("LLM_CASSETTE_MODE", "replay")
+        monkeypatch.setenv("PRIMARY_PROVIDER", "openai")
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        # A fresh user, so no history from the recorded run changes the prompts
+        replayed = invoke(raw_prompt="Thank Priya for the demo", user_tone="friendly", user_id="cassette2")
+        assert replayed["draft"] == recorded["draft"]
+        assert not replayed.get("errors")
+
+    def test_invalid_mode(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("LLM_CASSETTE_MODE", "sometimes")
+        with pytest.raises(ValueError):
+            cassette.cassette_mode()
@@ -0,0 +1,77 @@
+"""Tests for the concurrent evaluation runner and its report."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from email_assistant.src.evaluation import runner
+from email_assistant.src.evaluation.runner import diff_reports, format_report, load_cases, run_eval
+
+_CASES = [
+    {"id": "formal-1", "prompt": "Inform the board about the audit", "tone": "formal"},
+    {"id": "casual-1", "prompt": "Ask the team about lunch on Friday", "tone": "casual"},
+    {"id": "casual-2", "prompt": "Tell Sam the build is green", "tone": "casual"},
+]
+
+
+class TestEvalRunner:
+    def test_report_covers_quality_latency_and_cost(self, tmp_profiles_json: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("PRIMARY_PROVIDER", "stub")
+        report = run_eval(_CASES, concurrency=3)
+
+        assert report["summary"]["cases"] == 3
+        assert set(report["tones"]) == {"formal", "casual"}
+        assert report["tones"]["casual"]["cases"] == 2
+        assert {"draft_writer", "review", "judge"} <= set(report["nodes"])
+        assert report["nodes"]["draft_writer"]["p95_s"] >= report["nodes"]["draft_writer"]["p50_s"]
+        assert report["tokens"]["total"]["calls"] > 0
+        assert report["retries"]["total"] == 0
+        assert "node_latency_s" not in report["cases"][0]
+
+    def test_failed_case_is_recorded_not_raised(self, tmp_profiles_json: Path, monkeypatch: pytest.MonkeyPatch):
+        def broken_stream(**kwargs):
+            raise RuntimeError("graph exploded")
+            yield  # pragma: no cover
+
+        monkeypatch.setattr(runner, "stream", broken_stream)
+        report = run_eval(_CASES[:1])
+        assert report["summary"]["passed"] == 0
+        assert "graph exploded" in report["cases"][0]["errors"][0]
+
+    def test_main_uses_a_scratch_profile_store(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("PRIMARY_PROVIDER", "stub")
+        monkeypatch.setenv("PROFILE_STORE_DIR", str(tmp_path / "production"))
+        cases = tmp_path / "cases.jsonl"
+        cases.write_text('{"id": "c1", "prompt": "Tell Sam the build is green", "tone": "casual"}\n')
+        runner.main(["--cases", str(cases), "--reports-dir", str(tmp_path / "reports")])
+        store = Path(os.environ["PROFILE_STORE_DIR"])
+        assert store != tmp_path / "production" and (store / "turn_logs").is_dir()
+        assert not (tmp_path / "production").exists()
+
+    def test_diff_against_previous(self):
+        def _report(passed: dict[str, bool], p95: float, tokens: int) -> dict:
+            return {
+                "run": {"started_at": "t", "wall_s": 1.0},
+                "summary": {"cases": 2, "passed": sum(passed.values()), "pass_rate": sum(passed.values()) / 2, "mean_confidence": 0.9},
+                "tones": {"casual": {"pass_rate": sum(passed.values()) / 2, "mean_confidence": 0.9}},
+                "nodes": {"review": {"p50_s": 0.1, "p95_s": p95}},
+                "tokens": {"total": {"calls": 2, "input_tokens": tokens, "output_tokens": 0, "cached_tokens": 0}},
+                "retries": {"total": 0},
+                "cases": [{"id": i, "passed": ok} for i, ok in passed.items()],
+            }
+
+        previous = _report({"a": True, "b": False}, p95=0.2, tokens=100)
+        current = _report({"a": False, "b": True}, p95=0.5, tokens=80)
+        diff = diff_reports(current, previous)
+        assert diff["newly_failing"] == ["a"] and diff["newly_passing"] == ["b"]
+        assert diff["nodes"]["review"]["p95_s"] == 0.3
+        assert diff["total_tokens"] == -20
+        current["diff"] = diff
+        assert "newly failing: a" in format_report(current)
+
+    def test_packaged_case_file(self):
+        cases = load_cases(runner.default_cases_path())
+        assert len(cases) >= 25
+        assert len({c["id"] for c in cases}) == len(cases)
+        assert {c["tone"] for c in cases} == {"formal", "casual", "assertive", "friendly", "professional"}
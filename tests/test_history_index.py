@@ -0,0 +1,131 @@
+"""Unit tests for the BM25 conversation history index."""
+
+from pathlib import Path
+
+import pytest
+
+from email_assistant.src.memory import history_index
+from email_assistant.src.memory.history_index import HistoryIndex
+from email_assistant.src.memory.profile_store import clear_history, record_turn, search_history
+from email_assistant.src.models.schemas import ConversationTurn
+
+
+def _turn(prompt: str, body: str = "body") -> ConversationTurn:
+    return ConversationTurn(prompt=prompt, subject=prompt.title(), body=body, intent="other", tone="casual")
+
+
+class TestHistoryIndex:
+    def test_ranks_relevant_turn_first(self, tmp_path: Path):
+        index = HistoryIndex(tmp_path)
+        index.add("u1", _turn("lunch on friday"))
+        index.add("u1", _turn("vendor invoice overdue", body="The vendor invoice is still unpaid."))
+        index.add("u1", _turn("team offsite agenda"))
+        results = index.search("u1", "chase the vendor about the invoice", k=2)
+        assert results[0].prompt == "vendor invoice overdue"
+        assert len(results) == 1  # only one turn shares any terms
+
+    def test_no_match_returns_empty(self, tmp_path: Path):
+        index = HistoryIndex(tmp_path)
+        index.add("u1", _turn("lunch on friday"))
+        assert index.search("u1", "quarterly results", k=3) == []
+        assert index.search("missing", "lunch", k=3) == []
+
+    def test_picks_up_appends_from_another_instance(self, tmp_path: Path):
+        reader = HistoryIndex(tmp_path)
+        writer = HistoryIndex(tmp_path)
+        writer.add("u1", _turn("lunch on friday"))
+        assert reader.size("u1") == 1
+        writer.add("u1", _turn("contract renewal pricing"))
+        assert reader.search("u1", "renewal", k=1)[0].prompt == "contract renewal pricing"
+        assert reader.size("u1") == 2
+
+    def test_clear(self, tmp_path: Path):
+        index = HistoryIndex(tmp_path)
+        index.add("u1", _turn("lunch on friday"))
+        index.clear("u1")
+        assert index.size("u1") == 0
+
+    def test_rewrite_by_another_instance_is_detected(self, tmp_path: Path):
+        reader = HistoryIndex(tmp_path)
+        writer = HistoryIndex(tmp_path)
+        writer.add("u1", _turn("lunch on friday"))
+        assert reader.size("u1") == 1
+        writer.clear("u1")
+        # The new file grows past the reader's old position
+        for prompt in ("contract renewal pricing", "vendor invoice overdue", "team offsite agenda"):
+            writer.add("u1", _turn(prompt))
+        assert reader.size("u1") == 3
+        assert reader.search("u1", "lunch", k=1) == []
+        assert reader.search("u1", "invoice", k=1)[0].prompt == "vendor invoice overdue"
+
+
+    def test_clear_between_lookup_and_read_drops_hits(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        reader = HistoryIndex(tmp_path)
+        reader.add("u1", _turn("vendor invoice overdue"))
+        stale = reader._refresh("u1")
+        writer = HistoryIndex(tmp_path)
+        writer.clear("u1")
+        writer.add("u1", _turn("lunch"))
+        monkeypatch.setattr(reader, "_refresh", lambda user_id: stale)
+        assert reader.search("u1", "invoice", k=1) == []
+
+class TestPersistedIndex:
+    def test_cold_reader_parses_only_the_tail(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(history_index, "_SEGMENT_TAIL_DOCS", 4)
+        writer = HistoryIndex(tmp_path)
+        for i in range(10):
+            writer.add("u1", _turn(f"weekly status {i}", body=f"update number{i}"))
+            writer.size("u1")  # folds the tail into index.npz every 4 turns
+        writer.add("u1", _turn("vendor invoice overdue"))
+        assert (tmp_path / "u1" / "index.npz").exists()
+
+        ingested = []
+        original = history_index._UserIndex.ingest
+        monkeypatch.setattr(history_index._UserIndex, "ingest", lambda self, line: ingested.append(line) or original(self, line))
+        cold = HistoryIndex(tmp_path)
+        assert cold.size("u1") == 11
+        assert len(ingested) < 4
+        assert cold.search("u1", "number3", k=1)[0].prompt == "weekly status 3"
+        assert cold.search("u1", "invoice", k=1)[0].prompt == "vendor invoice overdue"
+        assert [t.prompt for t in cold.search("u1", "weekly status", k=11)] == [
+            t.prompt for t in writer.search("u1", "weekly status", k=11)
+        ]
+
+    def test_index_from_before_clear_is_ignored(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(history_index, "_SEGMENT_TAIL_DOCS", 1)
+        index = HistoryIndex(tmp_path)
+        index.add("u1", _turn("lunch on friday"))
+        index.size("u1")
+        stale = (tmp_path / "u1" / "index.npz").read_bytes()
+        index.clear("u1")
+        index.add("u1", _turn("team offsite agenda"))
+        (tmp_path / "u1" / "index.npz").write_bytes(stale)
+        cold = HistoryIndex(tmp_path)
+        assert cold.search("u1", "lunch", k=1) == []
+        assert cold.search("u1", "offsite", k=1)[0].prompt == "team offsite agenda"
+
+    def test_cache_is_bounded(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(history_index, "_MAX_CACHED_USERS", 2)
+        index = HistoryIndex(tmp_path)
+        for user_id in ("u1", "u2", "u3"):
+            index.add(user_id, _turn("lunch on friday"))
+            assert index.size(user_id) == 1
+        assert list(index._cache) == ["u2", "u3"]
+        assert index.search("u1", "lunch", k=1)[0].prompt == "lunch on friday"
+
+
+class TestSearchHistory:
+    def test_keeps_turns_beyond_retention(self, tmp_profiles_json: Path):
+        record_turn("u1", "apologize for the outage", "Sorry", "We apologize.", "apology", "formal")
+        for i in range(15):
+            record_turn("u1", f"weekly status {i}", "Status", "All good.", "internal_update", "casual")
+        results = search_history("u1", "outage apology", k=3)
+        assert results[0].prompt == "apologize for the outage"
+
+    def test_none_without_indexed_history(self, tmp_profiles_json: Path):
+        assert search_history("u1", "anything") is None
+
+    def test_clear_history_clears_index(self, tmp_profiles_json: Path):
+        record_turn("u1", "apologize for the outage", "Sorry", "We apologize.", "apology", "formal")
+        clear_history("u1")
+        assert search_history("u1", "outage") is None
@@ -0,0 +1,72 @@
+"""Unit tests for InputParserAgent local defaults and StyleStats predictions."""
+
+import pytest
+
+from email_assistant.src.agents import input_parser_agent
+from email_assistant.src.agents.input_parser_agent import InputParserAgent
+from email_assistant.src.memory.style_stats import match_recipient, predict_tone, update_stats
+from email_assistant.src.models.schemas import ConversationTurn, StyleStats, ToneType, UserProfile
+
+
+def _stats(tones: list[str], recipient: str | None = None) -> StyleStats:
+    stats = StyleStats()
+    for tone in tones:
+        update_stats(stats, ConversationTurn(prompt="p", subject="s", body="one two three four", intent="other", tone=tone, recipient=recipient))
+    return stats
+
+
+class _FailingLLM:
+    def with_structured_output(self, schema, **kwargs):
+        return self
+
+    def invoke(self, prompt):
+        raise RuntimeError("no LLM in tests")
+
+
+class TestStyleStats:
+    def test_running_aggregates(self):
+        stats = _stats(["casual", "casual", "formal"], recipient="Priya")
+        assert stats.turns == 3
+        assert stats.tone_counts == {"casual": 2, "formal": 1}
+        assert stats.mean_body_words == pytest.approx(4.0)
+        assert stats.recipient_counts == {"Priya": 3}
+
+    def test_predict_tone_needs_clear_majority(self):
+        assert predict_tone(_stats(["casual"] * 4)) is None
+        assert predict_tone(_stats(["casual"] * 4 + ["formal"])) == ToneType.CASUAL
+        assert predict_tone(_stats(["casual"] * 3 + ["formal"] * 3)) is None
+
+    def test_match_recipient_in_prompt(self):
+        stats = _stats(["casual"], recipient="Priya")
+        assert match_recipient(stats, "ask priya about the onboarding doc") == "Priya"
+        assert match_recipient(stats, "ask the team about lunch") is None
+
+
+class TestInputParserLocalDefaults:
+    def setup_method(self):
+        self.agent = InputParserAgent()
+        self.profile = UserProfile(id="u1", style_stats=_stats(["casual"] * 6, recipient="Priya"))
+
+    def test_skips_llm_when_fields_predicted(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(input_parser_agent, "get_llm", lambda **kw: pytest.fail("LLM called"))
+        result = self.agent.run({"raw_prompt": "Ask Priya where the onboarding doc lives", "user_tone": "auto", "profile": self.profile})
+        parsed = result["parsed_input"]
+        assert parsed.tone == ToneType.CASUAL
+        assert parsed.recipient == "Priya"
+
+    def test_skips_llm_for_explicit_tone_and_recipient(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(input_parser_agent, "get_llm", lambda **kw: pytest.fail("LLM called"))
+        result = self.agent.run({"raw_prompt": "Ask where the onboarding doc lives", "user_tone": "formal", "user_recipient": "Sam"})
+        assert result["parsed_input"].tone == ToneType.FORMAL
+
+    def test_default_tone_does_not_skip_llm(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(input_parser_agent, "get_llm", lambda **kw: _FailingLLM())
+        result = self.agent.run({"raw_prompt": "Ask where the onboarding doc lives", "user_tone": "professional", "user_recipient": "Sam"})
+        assert any("Parse fallback" in e for e in result["errors"])
+        assert result["parsed_input"].recipient == "Sam"
+
+    def test_calls_llm_for_constraint_cues(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(input_parser_agent, "get_llm", lambda **kw: _FailingLLM())
+        result = self.agent.run({"raw_prompt": "Ask Priya about the doc in under 50 words", "user_tone": "auto", "profile": self.profile})
+        assert any("Parse fallback" in e for e in result["errors"])
+        assert result["parsed_input"].tone == ToneType.CASUAL
@@ -0,0 +1,78 @@
+"""Unit tests for IntentDetectionAgent's local classifier and LLM fallback."""
+
+import pytest
+
+from email_assistant.src.agents import intent_detection_agent
+from email_assistant.src.agents.intent_detection_agent import IntentDetectionAgent
+from email_assistant.src.memory import profile_store
+from email_assistant.src.memory.profile_store import append_draft, iter_draft_summaries, save_profile
+from email_assistant.src.models.schemas import IntentType, ParsedInput, ToneType, UserProfile
+from email_assistant.src.nlp import intent_classifier
+from email_assistant.src.nlp.classifier import TextClassifier
+from email_assistant.src.nlp.intent_classifier import get_intent_classifier
+from email_assistant.src.observability.metrics import get_metrics, intent_report
+
+
+class TestIntentDetection:
+    def setup_method(self):
+        self.agent = IntentDetectionAgent()
+        get_metrics().reset()
+
+    def _run(self, prompt: str) -> IntentType:
+        return self.agent.run({"parsed_input": ParsedInput(prompt=prompt, tone=ToneType.PROFESSIONAL)})["intent"]
+
+    def test_obvious_prompts_answered_locally(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(intent_detection_agent, "get_llm", lambda **kw: pytest.fail("LLM called"))
+        assert self._run("Apologize for missing the meeting") == IntentType.APOLOGY
+        assert self._run("Follow up on the invoice I sent last week") == IntentType.FOLLOW_UP
+        assert intent_report()["local_rate"] == 1.0
+
+    def test_uncertain_prompt_uses_llm_and_tracks_disagreement(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(intent_detection_agent, "load_mcp_config", lambda: {"intent_local_threshold": 1.01})
+        monkeypatch.setattr(intent_detection_agent, "get_llm", lambda **kw: object())
+        monkeypatch.setattr(
+            intent_detection_agent,
+            "invoke_structured",
+            lambda llm, schema, template, **kw: schema(intent="other"),
+        )
+        assert self._run("Apologize for missing the meeting") == IntentType.OTHER
+        report = intent_report()
+        assert report["llm_rate"] == 1.0
+        assert report["disagreement_rate"] == 1.0
+
+    def test_override_wins(self):
+        state = {"parsed_input": ParsedInput(prompt="Apologize", tone=ToneType.PROFESSIONAL), "user_intent_override": "outreach"}
+        assert self.agent.run(state)["intent"] == IntentType.OUTREACH
+
+
+def test_iter_draft_summaries(tmp_profiles_json):
+    append_draft("u1", "Sorry about Friday", "apology", "casual")
+    assert list(iter_draft_summaries()) == [("u1", {"subject": "Sorry about Friday", "intent": "apology", "tone": "casual"})]
+
+
+def test_iter_draft_summaries_parses_the_store_once(tmp_profiles_json, monkeypatch: pytest.MonkeyPatch):
+    for user_id in ("u1", "u2", "u3"):
+        save_profile(UserProfile(id=user_id))
+        append_draft(user_id, "Sorry about Friday", "apology", "casual")
+    calls = []
+    original = profile_store._load_data
+    monkeypatch.setattr(profile_store, "_load_data", lambda: calls.append(1) or original())
+    assert [user_id for user_id, _ in iter_draft_summaries()] == ["u1", "u2", "u3"]
+    assert len(calls) == 1
+
+
+class TestIntentClassifierModel:
+    def test_packaged_model_is_loaded_without_training(self, monkeypatch: pytest.MonkeyPatch):
+        assert intent_classifier.model_path().exists()
+        monkeypatch.setattr(intent_classifier, "train_intent_classifier", lambda **kw: pytest.fail("trained at load time"))
+        get_intent_classifier.cache_clear()
+        try:
+            assert get_intent_classifier().predict("Apologize for missing the meeting")[0] == "apology"
+        finally:
+            get_intent_classifier.cache_clear()
+
+    def test_retrain_command_saves_a_model(self, tmp_path, capsys: pytest.CaptureFixture):
+        out = tmp_path / "intent.npz"
+        intent_classifier.main(["--no-history", "--out", str(out)])
+        assert TextClassifier.load(out).predict("Follow up on the invoice I sent last week")[0] == "follow_up"
+        assert "Saved intent classifier" in capsys.readouterr().out
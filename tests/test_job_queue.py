@@ -0,0 +1,134 @@
+"""Tests for the durable SQLite job queue and its workers."""
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from email_assistant.src import cli
+from email_assistant.src.jobs.queue import Job, JobQueue, JobStatus, backoff_s, default_db_path
+from email_assistant.src.jobs.worker import run_workers, work
+from email_assistant.src.models.schemas import EmailContext
+from email_assistant.src.observability.usage import BudgetExceededError
+
+
+def _echo(job: Job) -> dict:
+    return {"draft": {"subject": job.context.prompt}}
+
+
+def _flaky(job: Job) -> dict:
+    raise RuntimeError("provider down")
+
+
+def _over_budget(job: Job) -> dict:
+    raise BudgetExceededError("daily budget of $1.00 reached")
+
+
+class TestJobQueue:
+    def setup_method(self):
+        self.ctx = EmailContext(prompt="Ask for the Q3 report", tone="formal")
+
+    def test_enqueue_lease_complete(self, tmp_path: Path):
+        with JobQueue(tmp_path / "q.db") as queue:
+            job_id = queue.enqueue(self.ctx, user_id="alice")
+            job = queue.lease("w1", lease_s=30)
+            assert job.id == job_id and job.status == JobStatus.RUNNING
+            assert job.context.tone.value == "formal" and job.user_id == "alice"
+            assert queue.lease("w2", lease_s=30) is None
+            assert queue.complete(job_id, "w1", {"ok": True})
+            done = queue.get(job_id)
+            assert done.status == JobStatus.SUCCEEDED and done.result == {"ok": True}
+            assert queue.counts()["succeeded"] == 1
+
+    def test_expired_lease_is_handed_out_again(self, tmp_path: Path):
+        with JobQueue(tmp_path / "q.db") as queue:
+            job_id = queue.enqueue(self.ctx)
+            queue.lease("w1", lease_s=0.01)
+            time.sleep(0.02)
+            job = queue.lease("w2", lease_s=30)
+            assert job.id == job_id and job.attempts == 2
+            # The first worker lost its lease, so its late result is ignored
+            assert not queue.complete(job_id, "w1", {"late": True})
+            assert queue.complete(job_id, "w2", {"ok": True})
+
+    def test_lease_expiring_on_last_attempt_fails_the_job(self, tmp_path: Path):
+        with JobQueue(tmp_path / "q.db") as queue:
+            job_id = queue.enqueue(self.ctx, max_attempts=2)
+            for worker_id in ("w1", "w2"):
+                assert queue.lease(worker_id, lease_s=0.01).id == job_id
+                time.sleep(0.02)
+            assert queue.lease("w3", lease_s=30) is None
+            job = queue.get(job_id)
+            assert job.status == JobStatus.FAILED and job.error == "lease expired" and job.attempts == 2
+            assert queue.pending() == 0
+
+    def test_failures_back_off_then_fail(self, tmp_path: Path):
+        with JobQueue(tmp_path / "q.db", backoff_base_s=0.01, backoff_max_s=0.01) as queue:
+            job_id = queue.enqueue(self.ctx, max_attempts=2)
+            queue.lease("w1")
+            assert queue.fail(job_id, "w1", "boom")
+            assert queue.get(job_id).status == JobStatus.QUEUED
+            time.sleep(0.02)
+            queue.lease("w1")
+            queue.fail(job_id, "w1", "boom again")
+            job = queue.get(job_id)
+            assert job.status == JobStatus.FAILED and job.error == "boom again" and job.attempts == 2
+
+    def test_default_db_follows_profile_store_dir(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("PROFILE_STORE_DIR", str(tmp_path))
+        assert default_db_path() == tmp_path / "jobs.sqlite3"
+
+    def test_backoff_grows_and_caps(self):
+        assert 1.0 <= backoff_s(1, 2.0, 60.0) <= 2.0
+        assert 4.0 <= backoff_s(3, 2.0, 60.0) <= 8.0
+        assert backoff_s(20, 2.0, 60.0) <= 60.0
+
+
+class TestWorkers:
+    def test_worker_drains_queue(self, tmp_path: Path):
+        db = tmp_path / "q.db"
+        with JobQueue(db) as queue:
+            ids = queue.enqueue_many([EmailContext(prompt=f"email {i}") for i in range(5)])
+        assert work(db, runner=_echo, exit_when_idle=True, poll_s=0.01) == 5
+        with JobQueue(db) as queue:
+            assert [queue.get(i).result["draft"]["subject"] for i in ids] == [f"email {i}" for i in range(5)]
+
+    def test_worker_records_errors(self, tmp_path: Path):
+        db = tmp_path / "q.db"
+        with JobQueue(db) as queue:
+            job_id = queue.enqueue(EmailContext(prompt="x"), max_attempts=1)
+        work(db, runner=_flaky, exit_when_idle=True, poll_s=0.01)
+        with JobQueue(db) as queue:
+            job = queue.get(job_id)
+        assert job.status == JobStatus.FAILED and "provider down" in job.error
+
+    def test_budget_errors_are_not_retried(self, tmp_path: Path):
+        db = tmp_path / "q.db"
+        with JobQueue(db) as queue:
+            job_id = queue.enqueue(EmailContext(prompt="x"), max_attempts=3)
+        work(db, runner=_over_budget, exit_when_idle=True, poll_s=0.01)
+        with JobQueue(db) as queue:
+            job = queue.get(job_id)
+        assert job.status == JobStatus.FAILED and job.attempts == 1
+        assert job.error == "BudgetExceededError: daily budget of $1.00 reached"
+
+    def test_processes_share_the_queue(self, tmp_path: Path):
+        db = tmp_path / "q.db"
+        with JobQueue(db) as queue:
+            queue.enqueue_many([EmailContext(prompt=f"email {i}") for i in range(20)])
+        run_workers(2, db_path=db, runner=_echo, exit_when_idle=True, poll_s=0.01)
+        with JobQueue(db) as queue:
+            assert queue.counts()["succeeded"] == 20
+
+
+class TestJobsCli:
+    def test_enqueue_and_status(self, tmp_path: Path, capsys):
+        src = tmp_path / "in.jsonl"
+        src.write_text('{"prompt": "hello", "tone": "casual", "user_id": "bob"}\n')
+        db = str(tmp_path / "q.db")
+        assert cli.main(["jobs", "--db", db, "enqueue", str(src)]) == 0
+        job_id = capsys.readouterr().out.strip()
+        assert cli.main(["jobs", "--db", db, "status", job_id]) == 0
+        job = json.loads(capsys.readouterr().out)
+        assert job["status"] == "queued" and job["user_id"] == "bob"
@@ -0,0 +1,70 @@
+"""Tests for the load-test harness and the stub latency distributions."""
+
+import random
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+
+from email_assistant.src.evaluation.loadtest import Sample, build_report, run_load
+from email_assistant.src.integrations.stub_client import latency_sampler
+from email_assistant.src.memory import profile_store
+from email_assistant.src.observability.metrics import get_metrics
+
+
+def _target(user_id: str, prompt: str, tone: str):
+    time.sleep(0.005)
+    return "RateLimitError" if random.random() < 0.2 else None
+
+
+class TestLoadHarness:
+    def test_closed_loop_report(self):
+        report = run_load(_target, users=4, duration_s=0.2)
+        assert report["requests"] >= 4 * 10
+        assert report["requests"] == report["succeeded"] + sum(report["errors"].values())
+        assert set(report["errors"]) <= {"RateLimitError"}
+        assert 0 < report["latency_s"]["p50"] <= report["latency_s"]["p99"] <= report["latency_s"]["max"]
+        assert report["throughput_rps"] > 0
+
+    def test_open_loop_follows_arrival_rate(self):
+        seen: list[str] = []
+
+        def target(user_id: str, prompt: str, tone: str):
+            seen.append(user_id)
+
+        report = run_load(target, users=2, duration_s=0.5, rate=100, shared_user=True)
+        assert 20 <= report["requests"] <= 120
+        assert set(seen) == {"load-shared"}
+        assert report["config"]["mode"] == "open"
+
+    def test_error_rate_and_target_exceptions(self):
+        samples = [Sample(0, 0.1, None), Sample(0, 0.2, "HTTP 429"), Sample(0, 0.3, "HTTP 429"), Sample(0, 0.4, None)]
+        report = build_report(samples, wall_s=1.0, config={}, counters={"profile_store.lock_acquired": 4, "profile_store.lock_contended": 1})
+        assert report["error_rate"] == 0.5 and report["errors"] == {"HTTP 429": 2}
+        assert report["throughput_rps"] == 2.0
+        assert report["profile_store"]["contended_rate"] == 0.25
+
+        def boom(*args):
+            raise ConnectionError("refused")
+
+        assert run_load(boom, users=1, duration_s=0.05)["errors"].keys() == {"ConnectionError"}
+
+
+class TestStubLatency:
+    def test_specs(self):
+        assert latency_sampler("250")() == 0.25
+        assert latency_sampler("fixed:40")() == 0.04
+        assert 0.1 <= latency_sampler("uniform:100,200")() <= 0.2
+        assert statistics.median(latency_sampler("lognormal:300,0.5")() for _ in range(2000)) == pytest.approx(0.3, rel=0.1)
+        with pytest.raises(ValueError):
+            latency_sampler("gamma:1")
+
+
+class TestStoreInstrumentation:
+    def test_store_dir_env_and_lock_counters(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("PROFILE_STORE_DIR", str(tmp_path))
+        before = get_metrics().counters().get("profile_store.lock_acquired", 0)
+        profile_store.append_draft("u1", "Hi", "other", "casual")
+        assert (tmp_path / "turn_logs").is_dir()
+        assert get_metrics().counters()["profile_store.lock_acquired"] > before
@@ -0,0 +1,101 @@
+"""Tests for per-node model overrides and fallback."""
+
+from pathlib import Path
+
+import pytest
+
+from email_assistant.src.agents.intent_detection_agent import _IntentOutput
+from email_assistant.src.integrations import config_loader, stub_client
+from email_assistant.src.integrations.llm_factory import get_llm, invoke_structured, node_settings
+from email_assistant.src.models.schemas import IntentType
+from email_assistant.src.observability.metrics import get_metrics, node_report
+from email_assistant.src.prompts.registry import get_template
+
+_CONFIG = """
+primary_provider: stub
+primary_model: big-model
+fallback_provider: stub
+fallback_model: global-fallback
+pricing:
+  big-model: {input: 10.0, output: 30.0}
+  small-model: {input: 0.1, output: 0.4}
+nodes:
+  intent_detection: {model: small-model, temperature: 0.3, timeout_s: 0.05, fallback_model: backup-model}
+  review: {model: small-model, timeout_s: 0.05}
+  draft_writer: {provider: openai, model: gpt-4o}
+"""
+
+
+@pytest.fixture
+def node_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path = tmp_path / "mcp.yaml"
+    path.write_text(_CONFIG)
+    monkeypatch.setattr(config_loader, "_config_path", lambda: path)
+    monkeypatch.setattr(config_loader, "_file_cache", None)
+    monkeypatch.delenv("PRIMARY_PROVIDER", raising=False)
+    monkeypatch.delenv("PRIMARY_MODEL", raising=False)
+    monkeypatch.setenv("STUB_LLM_LATENCY_MS", "0")
+    get_metrics().reset()
+    return path
+
+
+class TestNodeSettings:
+    def test_node_entry_overrides_top_level(self, node_config: Path):
+        settings = node_settings("intent_detection", temperature=0)
+        assert settings["model"] == "small-model" and settings["temperature"] == 0.3
+        assert settings["provider"] == "stub" and settings["fallback_model"] == "backup-model"
+        assert node_settings("review", temperature=0)["model"] == "small-model"
+        assert node_settings("campaign_touch_up", temperature=0.7)["model"] == "big-model"
+
+    def test_node_provider_and_model_are_a_pair(self, node_config: Path):
+        assert {k: node_settings("draft_writer")[k] for k in ("provider", "model")} == {"provider": "openai", "model": "gpt-4o"}
+
+    def test_primary_provider_env_drops_other_providers_models(self, node_config: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("PRIMARY_PROVIDER", "anthropic")
+        for node in ("intent_detection", "draft_writer", "campaign_touch_up"):
+            settings = node_settings(node)
+            assert (settings["provider"], settings["model"]) == ("anthropic", "big-model")
+        # Non-model settings still apply
+        assert node_settings("intent_detection")["timeout_s"] == 0.05
+        monkeypatch.setenv("PRIMARY_PROVIDER", "openai")
+        assert node_settings("draft_writer")["model"] == "gpt-4o"
+
+    def test_primary_model_env_wins_over_node_entries(self, node_config: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("PRIMARY_MODEL", "env-model")
+        assert {node_settings(node)["model"] for node in ("intent_detection", "draft_writer", "campaign_touch_up")} == {"env-model"}
+
+    def test_shipped_config_pins_no_model_without_its_provider(self):
+        nodes = config_loader.load_mcp_config().get("nodes") or {}
+        assert all("provider" in entry for entry in nodes.values() if "model" in entry)
+
+    def test_get_llm_builds_the_node_model(self, node_config: Path):
+        llm = get_llm(temperature=0, node="intent_detection")
+        assert (llm.model_name, llm.temperature, llm.timeout_s) == ("small-model", 0.3, 0.05)
+        assert get_llm(temperature=0.7, node="campaign_touch_up").model_name == "big-model"
+        assert get_llm(temperature=0, node="intent_detection") is llm
+
+
+class TestFallback:
+    def test_timed_out_call_retries_on_node_fallback(self, node_config: Path, monkeypatch: pytest.MonkeyPatch):
+        latencies = iter([0.2, 0.0])  # primary times out, fallback answers at once
+        monkeypatch.setattr(stub_client, "_latency_override", lambda: next(latencies))
+        llm = get_llm(temperature=0, node="intent_detection")
+        out = invoke_structured(llm, _IntentOutput, get_template("intent_detection"), prompt="Sorry I missed it")
+        assert out.intent in set(IntentType)
+        assert get_metrics().counters()["llm.fallback.intent_detection"] == 1
+        assert node_report()["intent_detection"]["models"] == {"backup-model": 1}
+
+    def test_node_without_fallback_model_raises(self, node_config: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("STUB_LLM_LATENCY_MS", "200")
+        with pytest.raises(TimeoutError):
+            invoke_structured(get_llm(temperature=0, node="review"), _IntentOutput, get_template("intent_detection"), prompt="x", node="review")
+
+
+class TestNodeReport:
+    def test_cost_and_model_per_node(self, node_config: Path):
+        for node in ("intent_detection", "tone_judge"):
+            invoke_structured(get_llm(temperature=0, node=node), _IntentOutput, get_template("intent_detection"), prompt="Sorry", node=node)
+        report = node_report()
+        assert report["intent_detection"]["models"] == {"small-model": 1}
+        assert report["tone_judge"]["models"] == {"big-model": 1}
+        assert report["tone_judge"]["cost_usd"] > 50 * report["intent_detection"]["cost_usd"] > 0
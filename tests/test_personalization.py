@@ -2,6 +2,8 @@
 
 from pathlib import Path
 
+import pytest
+
 from email_assistant.src.agents.personalization_agent import PersonalizationAgent
 from email_assistant.src.memory.profile_store import save_profile
 from email_assistant.src.models.schemas import (
@@ -11,6 +13,7 @@ from email_assistant.src.models.schemas import (
     ToneType,
     UserProfile,
 )
+from email_assistant.src.nlp.substitution import SubstitutionEngine, get_engine
 
 
 class TestPersonalizationAgent:
@@ -94,3 +97,51 @@ class TestPersonalizationAgent:
         body = result["personalized_draft"].body
         assert "[Name]" not in body
         assert "Grace" in body
+
+    def test_uses_profile_from_state_without_store_read(self, tmp_profiles_json: Path, monkeypatch):
+        import email_assistant.src.memory.profile_store as ps
+
+        monkeypatch.setattr(ps, "load_profile", lambda user_id: pytest.fail("profile re-read"))
+        draft = DraftResult(subject="Hi", body="Thanks,\n[Name]", intent=IntentType.OTHER, tone=ToneType.CASUAL)
+        result = self.agent.run({"draft": draft, "user_id": "u8", "profile": UserProfile(id="u8", name="Heidi")})
+        assert result["personalized_draft"].body.endswith("Heidi")
+
+    def test_avoid_phrases_rewritten_or_flagged(self):
+        profile = UserProfile(
+            id="u9",
+            name="Ivan",
+            style_preferences=StylePreferences(avoid_phrases=["circle back => follow up", "per my last email"]),
+        )
+        draft = DraftResult(
+            subject="Hi",
+            body="Per my  last email, I wanted to Circle back on [Company].",
+            intent=IntentType.FOLLOW_UP,
+            tone=ToneType.CASUAL,
+        )
+        result = self.agent.run({"draft": draft, "profile": profile})
+        body = result["personalized_draft"].body
+        assert "follow up on [Company]" in body
+        assert result["style_flags"] == ["Per my  last email"]
+
+
+class TestSubstitutionEngine:
+    def test_longest_phrase_wins_and_respects_word_boundaries(self):
+        engine = SubstitutionEngine("Ann", "Acme", ("sync => meet", "sync up => talk", "asap"))
+        result = engine.apply("Let's sync up asap, not asapx. [Your Company] / [Company Name]")
+        assert result.body == "Let's talk asap, not asapx. Acme / Acme"
+        assert result.flags == ["asap"]
+
+    def test_many_rules_single_pass(self):
+        rules = tuple(f"phrase{i} word{i} => swap{i}" for i in range(2000))
+        engine = SubstitutionEngine(None, None, rules)
+        body = " ".join(f"phrase{i} word{i}" for i in range(0, 2000, 7)) * 20
+        result = engine.apply(body)
+        assert "phrase7 word7" not in result.body
+        assert "swap7" in result.body
+
+    def test_engine_cached_per_rule_set(self):
+        a = UserProfile(id="a", name="A", style_preferences=StylePreferences(avoid_phrases=["x"]))
+        b = a.model_copy(update={"version": a.version + 1})
+        assert get_engine(a) is get_engine(b)
+        edited = a.model_copy(update={"style_preferences": StylePreferences(avoid_phrases=["y"])})
+        assert get_engine(edited) is not get_engine(a)
@@ -1,13 +1,22 @@
 """Unit tests for profile_store memory layer."""
 
+import json
+import multiprocessing
 from pathlib import Path
 
+import pytest
+
+from email_assistant.src.memory import profile_store
 from email_assistant.src.memory.profile_store import (
+    ProfileVersionConflict,
     append_conversation,
     append_draft,
     clear_history,
+    compact,
     load_profile,
+    recent_turns,
     save_profile,
+    update_profile,
 )
 from email_assistant.src.models.schemas import UserProfile
 
@@ -73,3 +82,147 @@ class TestClearHistory:
 
     def test_noop_for_missing_user(self, tmp_profiles_json: Path):
         clear_history("nonexistent")  # should not raise
+
+
+class TestTurnLog:
+    def test_appends_do_not_rewrite_snapshot(self, tmp_profiles_json: Path):
+        save_profile(UserProfile(id="u1", name="Alice"))
+        before = tmp_profiles_json.read_text()
+        append_conversation("u1", "prompt", "subj", "body", "outreach", "formal")
+        assert tmp_profiles_json.read_text() == before
+        assert load_profile("u1").conversation_history[0].prompt == "prompt"
+
+    def test_compact_folds_log_and_applies_retention(self, tmp_profiles_json: Path):
+        for i in range(15):
+            append_conversation("u1", f"prompt {i}", f"subj {i}", f"body {i}", "other", "casual")
+            append_draft("u1", f"subj {i}", "other", "casual")
+        compact("u1")
+        snapshot = json.loads(tmp_profiles_json.read_text())["profiles"][0]
+        assert len(snapshot["conversation_history"]) == 10
+        assert len(snapshot["prior_drafts"]) == 15
+        assert snapshot["conversation_history"][-1]["prompt"] == "prompt 14"
+        # Compacting again, or reading, must not double-apply retained log entries
+        compact("u1")
+        profile = load_profile("u1")
+        assert [t.prompt for t in profile.conversation_history] == [f"prompt {i}" for i in range(5, 15)]
+
+    def test_entries_are_numbered_per_log(self, tmp_profiles_json: Path):
+        for i in range(3):
+            append_draft("u1", f"subj {i}", "other", "casual")
+        append_draft("u2", "subj", "other", "casual")
+        seqs = [json.loads(line)["ts"] for line in profile_store._log_path("u1").read_text().splitlines()]
+        assert seqs == [1, 2, 3]
+        assert json.loads(profile_store._log_path("u2").read_text())["ts"] == 1
+
+    def test_appends_after_compaction_stay_above_watermark(self, tmp_profiles_json: Path):
+        # Draft entries are not kept in the log, so compaction leaves only a sequence marker
+        for i in range(3):
+            append_draft("u1", f"subj {i}", "other", "casual")
+        compact("u1")
+        assert load_profile("u1").log_watermark == 3
+        append_draft("u1", "after compaction", "other", "casual")
+        assert load_profile("u1").prior_drafts[-1].subject == "after compaction"
+        compact("u1")
+        assert [d.subject for d in load_profile("u1").prior_drafts][-2:] == ["subj 2", "after compaction"]
+
+    def test_recent_turns_reads_tail(self, tmp_profiles_json: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(profile_store, "_TAIL_BLOCK_BYTES", 64)
+        for i in range(6):
+            append_conversation("u1", f"prompt {i}", "subj", "body", "other", "casual")
+        monkeypatch.setattr(profile_store, "_load_data", lambda: pytest.fail("snapshot parsed"))
+        assert [t.prompt for t in recent_turns("u1", 3)] == ["prompt 3", "prompt 4", "prompt 5"]
+
+    def test_draft_writer_falls_back_to_recent_turns(self, tmp_profiles_json: Path, monkeypatch: pytest.MonkeyPatch):
+        from email_assistant.src.agents.draft_writer_agent import DraftWriterAgent
+
+        for i in range(4):
+            append_conversation("u1", f"prompt {i}", "subj", "body", "other", "casual")
+        profile = load_profile("u1")
+        monkeypatch.setattr(profile_store, "_load_data", lambda: pytest.fail("snapshot parsed"))
+        context = DraftWriterAgent()._build_conversation_context(profile, "anything")
+        assert "prompt 0" not in context
+        assert all(f"prompt {i}" in context for i in (1, 2, 3))
+
+    def test_recent_turns_falls_back_to_snapshot(self, tmp_profiles_json: Path):
+        for i in range(4):
+            append_conversation("u1", f"prompt {i}", "subj", "body", "other", "casual")
+        compact("u1")
+        clear_log = profile_store._log_path("u1")
+        clear_log.write_text("")
+        assert [t.prompt for t in recent_turns("u1", 2)] == ["prompt 2", "prompt 3"]
+
+    def test_clear_history_drops_pending_log(self, tmp_profiles_json: Path):
+        append_conversation("u1", "prompt", "subj", "body", "outreach", "formal")
+        clear_history("u1")
+        assert load_profile("u1").conversation_history == []
+        assert profile_store._log_path("u1").read_text() == ""
+
+
+class TestVersioning:
+    def test_save_bumps_version(self, tmp_profiles_json: Path):
+        p = UserProfile(id="u1")
+        save_profile(p)
+        assert p.version == 1
+        assert load_profile("u1").version == 1
+
+    def test_stale_save_raises_conflict(self, tmp_profiles_json: Path):
+        save_profile(UserProfile(id="u1", name="Alice"))
+        stale = load_profile("u1")
+        fresh = load_profile("u1")
+        fresh.name = "Alice B"
+        save_profile(fresh)
+        stale.company = "Acme"
+        with pytest.raises(ProfileVersionConflict):
+            save_profile(stale)
+        assert load_profile("u1").name == "Alice B"
+
+    def test_update_profile_retries_on_conflict(self, tmp_profiles_json: Path, monkeypatch: pytest.MonkeyPatch):
+        save_profile(UserProfile(id="u1"))
+        real_cas = profile_store._compare_and_swap
+        calls = {"n": 0}
+
+        def _racing_cas(profile, expected):
+            calls["n"] += 1
+            if calls["n"] == 1:
+                # Another writer sneaks in between our read and our write
+                other = load_profile("u1")
+                other.company = "Other Corp"
+                real_cas(other, other.version)
+            return real_cas(profile, expected)
+
+        monkeypatch.setattr(profile_store, "_compare_and_swap", _racing_cas)
+        update_profile("u1", lambda p: setattr(p, "name", "Alice"))
+        loaded = load_profile("u1")
+        assert calls["n"] == 2
+        assert loaded.name == "Alice"
+        assert loaded.company == "Other Corp"
+
+    def test_write_is_atomic_on_failure(self, tmp_profiles_json: Path, monkeypatch: pytest.MonkeyPatch):
+        save_profile(UserProfile(id="u1", name="Alice"))
+
+        def _boom(*args, **kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(profile_store.json, "dump", _boom)
+        with pytest.raises(OSError):
+            update_profile("u1", lambda p: setattr(p, "company", "Acme"))
+        monkeypatch.undo()
+        assert json.loads(tmp_profiles_json.read_text())["profiles"][0]["name"] == "Alice"
+        assert not list(tmp_profiles_json.parent.glob("*.tmp"))
+
+
+def _append_many(path: str, worker: int, count: int) -> None:
+    profile_store._profiles_path = lambda: Path(path)
+    for i in range(count):
+        append_draft("shared", f"w{worker}-{i}", "other", "casual")
+
+
+def test_concurrent_processes_do_not_lose_updates(tmp_profiles_json: Path):
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_append_many, args=(str(tmp_profiles_json), w, 5)) for w in range(3)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    profile = load_profile("shared")
+    assert len(profile.prior_drafts) == 15
@@ -0,0 +1,87 @@
+"""Unit tests for prompt templates and structured-call metrics."""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+from email_assistant.src.integrations.llm_factory import invoke_structured
+from email_assistant.src.observability.metrics import cache_report, get_metrics
+from email_assistant.src.prompts.registry import PromptTemplate, get_template, register_template
+
+
+class _Out(BaseModel):
+    intent: str
+
+
+class _FakeLLM:
+    """Records the messages it receives and returns a canned raw response."""
+
+    def __init__(self, usage: dict):
+        self.usage = usage
+        self.messages = None
+
+    def with_structured_output(self, schema, include_raw=False):
+        assert include_raw
+        return self
+
+    def invoke(self, messages):
+        self.messages = messages
+        return {"raw": AIMessage(content="", usage_metadata=self.usage), "parsed": _Out(intent="apology"), "parsing_error": None}
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    get_metrics().reset()
+    yield
+    get_metrics().reset()
+
+
+class TestPromptTemplates:
+    def test_static_instructions_precede_request_data(self):
+        messages = get_template("draft_writer").render(
+            tone_context="Tone: formal",
+            prompt="Apologize to Dana",
+            recipient="",
+            length_hint="",
+            sender_info="",
+            conversation_snippets="",
+        )
+        assert isinstance(messages[0], SystemMessage) and isinstance(messages[1], HumanMessage)
+        assert messages[0].content.startswith("Write a complete email")
+        assert messages[0].content.endswith("Tone: formal")
+        assert "Apologize to Dana" in messages[1].content
+        assert "Apologize to Dana" not in messages[0].content
+
+    def test_system_prefix_identical_across_requests(self):
+        template = get_template("intent_detection")
+        a = template.render(prompt="follow up on the invoice")
+        b = template.render(prompt="apologize for the delay")
+        assert a[0].content == b[0].content
+
+    def test_cache_hints_mark_system_block(self):
+        messages = get_template("intent_detection").render(cache_hints=True, prompt="x")
+        block = messages[0].content[0]
+        assert block["cache_control"] == {"type": "ephemeral"}
+
+    def test_duplicate_registration_rejected(self):
+        with pytest.raises(ValueError):
+            register_template(PromptTemplate(name="review", system="", user=""))
+
+
+class TestInvokeStructured:
+    def test_records_cached_token_ratio_per_node(self):
+        usage = {"input_tokens": 200, "output_tokens": 5, "total_tokens": 205, "input_token_details": {"cache_read": 150}}
+        llm = _FakeLLM(usage)
+        out = invoke_structured(llm, _Out, get_template("intent_detection"), prompt="sorry")
+        assert out.intent == "apology"
+        report = cache_report()
+        assert report["intent_detection"]["cached_ratio"] == pytest.approx(0.75)
+        assert report["intent_detection"]["calls"] == 1
+
+    def test_parsing_error_raised(self):
+        class _Broken(_FakeLLM):
+            def invoke(self, messages):
+                return {"raw": AIMessage(content=""), "parsed": None, "parsing_error": ValueError("bad json")}
+
+        with pytest.raises(ValueError, match="bad json"):
+            invoke_structured(_Broken({}), _Out, get_template("intent_detection"), prompt="x")
@@ -0,0 +1,81 @@
+"""Unit tests for ReviewAgent's paragraph-level review cache."""
+
+import pytest
+
+from email_assistant.src.agents import review_agent
+from email_assistant.src.agents.review_agent import ReviewAgent
+from email_assistant.src.models.schemas import DraftResult, IntentType, ParsedInput, ToneType
+
+_BODY = "Hi Sam,\n\nThe launch moves to Tuesday.\n\nLet me know if that works.\n\nBest,"
+
+
+class TestIncrementalReview:
+    def setup_method(self):
+        self.agent = ReviewAgent()
+        self.calls: list[dict] = []
+
+    def _fake_llm(self, monkeypatch: pytest.MonkeyPatch, flag_index: int | None = None, email_issue: str | None = None):
+        def _invoke(llm, schema, template, **variables):
+            self.calls.append(variables)
+            shown = [int(line[1 : line.index("]")]) for line in variables["sections"].split("\n\n")]
+            findings = [
+                {"index": i, "ok": i != flag_index, "issues": ["typo"] if i == flag_index else []}
+                for i in shown
+            ]
+            if email_issue:
+                return schema(passed=False, issues=[email_issue], findings=findings)
+            return schema(passed=True, findings=findings)
+
+        monkeypatch.setattr(review_agent, "get_llm", lambda **kw: object())
+        monkeypatch.setattr(review_agent, "invoke_structured", _invoke)
+        # Keep the local tone check out of the way
+        monkeypatch.setattr(self.agent._tone_classifier, "predict_proba", lambda text: dict.fromkeys([t.value for t in ToneType], 0.2))
+
+    def _state(self, body: str, cache: dict | None = None) -> dict:
+        draft = DraftResult(subject="Launch date", body=body, intent=IntentType.INTERNAL_UPDATE, tone=ToneType.CASUAL)
+        return {
+            "parsed_input": ParsedInput(prompt="tell Sam", tone=ToneType.CASUAL),
+            "personalized_draft": draft,
+            "review_cache": cache or {},
+        }
+
+    def test_retry_sends_only_changed_paragraphs(self, monkeypatch: pytest.MonkeyPatch):
+        self._fake_llm(monkeypatch)
+        first = self.agent.run(self._state(_BODY))
+        assert first["review_result"].passed
+        # Five sections plus the email-wide verdict
+        assert first["review_cache"] and len(first["review_cache"]) == 6
+
+        changed = _BODY.replace("Let me know if that works.", "Shout if that clashes with anything.")
+        second = self.agent.run(self._state(changed, first["review_cache"]))
+        assert second["review_result"].passed
+        assert self.calls[1]["sections"] == "[3] Shout if that clashes with anything."
+        assert "[1] Hi Sam," in self.calls[1]["unchanged"]
+
+    def test_unchanged_draft_skips_llm_and_keeps_findings(self, monkeypatch: pytest.MonkeyPatch):
+        self._fake_llm(monkeypatch, flag_index=2)
+        first = self.agent.run(self._state(_BODY))
+        assert not first["review_result"].passed
+        # Whitespace-only edits normalize to the same paragraphs
+        second = self.agent.run(self._state(_BODY.replace("Tuesday.", "Tuesday.  "), first["review_cache"]))
+        assert len(self.calls) == 1
+        assert second["review_result"].issues == ["typo"]
+        assert not second["review_result"].passed
+
+    def test_unchanged_draft_keeps_email_wide_failure(self, monkeypatch: pytest.MonkeyPatch):
+        self._fake_llm(monkeypatch, email_issue="Paragraphs contradict each other")
+        first = self.agent.run(self._state(_BODY))
+        assert not first["review_result"].passed
+        second = self.agent.run(self._state(_BODY, first["review_cache"]))
+        assert len(self.calls) == 1
+        assert not second["review_result"].passed
+        assert second["review_result"].issues == ["Paragraphs contradict each other"]
+
+    def test_new_combination_of_reviewed_sections_is_sent_again(self, monkeypatch: pytest.MonkeyPatch):
+        self._fake_llm(monkeypatch)
+        first = self.agent.run(self._state(_BODY))
+        shorter = _BODY.replace("\n\nLet me know if that works.", "")
+        second = self.agent.run(self._state(shorter, first["review_cache"]))
+        assert second["review_result"].passed
+        assert len(self.calls) == 2
+        assert self.calls[1]["sections"].count("[") == 4
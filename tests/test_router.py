@@ -0,0 +1,52 @@
+"""Unit tests for RouterAgent."""
+
+from pathlib import Path
+
+from email_assistant.src.agents.router_agent import RouterAgent
+from email_assistant.src.memory import profile_store
+from email_assistant.src.memory.profile_store import load_profile
+from email_assistant.src.models.schemas import DraftResult, IntentType, ReviewResult, ToneType
+
+
+class TestRouterAgent:
+    def setup_method(self):
+        self.agent = RouterAgent()
+        self.draft = DraftResult(subject="Hi", body="Hello", intent=IntentType.OUTREACH, tone=ToneType.FORMAL)
+
+    def test_commits_final_draft_once(self, tmp_profiles_json: Path):
+        state = {
+            "personalized_draft": self.draft,
+            "review_result": ReviewResult(passed=True),
+            "raw_prompt": "Say hello",
+            "user_id": "u1",
+            "retry_count": 0,
+        }
+        result = self.agent.run(state)
+        assert result["retry_count"] == 0
+        lines = profile_store._log_path("u1").read_text().splitlines()
+        assert len(lines) == 1
+        profile = load_profile("u1")
+        assert profile.prior_drafts[0].subject == "Hi"
+        assert profile.conversation_history[0].prompt == "Say hello"
+
+    def test_retry_does_not_write_memory(self, tmp_profiles_json: Path):
+        state = {
+            "personalized_draft": self.draft,
+            "review_result": ReviewResult(passed=False, issues=["Typo"]),
+            "user_id": "u1",
+            "retry_count": 0,
+        }
+        result = self.agent.run(state)
+        assert result["retry_count"] == 1
+        assert result["retry_reason"] == "Typo"
+        assert load_profile("u1") is None
+
+    def test_commits_when_retries_exhausted(self, tmp_profiles_json: Path):
+        state = {
+            "personalized_draft": self.draft,
+            "review_result": ReviewResult(passed=False, issues=["Typo"]),
+            "user_id": "u1",
+            "retry_count": 2,
+        }
+        self.agent.run(state)
+        assert len(load_profile("u1").conversation_history) == 1
@@ -0,0 +1,106 @@
+"""Tests for the HTTP API server against the stub LLM provider."""
+
+import asyncio
+import json
+import threading
+from pathlib import Path
+
+import pytest
+from starlette.testclient import TestClient
+
+from email_assistant.src.server.app import PipelineService, Saturated, Unavailable, create_app
+
+
+@pytest.fixture
+def stub_llm(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("PRIMARY_PROVIDER", "stub")
+    monkeypatch.setenv("STUB_LLM_LATENCY_MS", "0")
+
+
+@pytest.fixture
+def client(tmp_profiles_json: Path, stub_llm):
+    with TestClient(create_app(workers=2, queue_size=8, warmup=False)) as c:
+        yield c
+
+
+class TestEndpoints:
+    def test_generate(self, client: TestClient):
+        resp = client.post("/v1/generate", json={"prompt": "Ask Bob for the Q3 report", "tone": "formal", "user_id": "api"})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["draft"]["tone"] == "formal"
+        assert body["review"]["passed"] is True
+
+    def test_batch_preserves_order(self, client: TestClient):
+        tones = ["formal", "casual", "friendly"]
+        resp = client.post("/v1/batch", json={"requests": [{"prompt": f"Say hi {t}", "tone": t} for t in tones]})
+        assert [r["draft"]["tone"] for r in resp.json()["results"]] == tones
+
+    def test_stream_emits_node_events_then_result(self, client: TestClient):
+        with client.stream("POST", "/v1/stream", json={"prompt": "Thank the team", "tone": "friendly"}) as resp:
+            lines = [json.loads(line) for line in resp.iter_lines() if line]
+        assert lines[0] == {"event": "started", "node": "input_parser", "elapsed_s": 0.0}
+        assert lines[-1]["event"] == "result"
+        assert lines[-1]["draft"]["tone"] == "friendly"
+
+    def test_validation_and_probes(self, client: TestClient):
+        assert client.post("/v1/generate", json={"prompt": ""}).status_code == 400
+        assert client.get("/healthz").status_code == 200
+        assert client.get("/readyz").json()["status"] == "ready"
+
+
+class TestAdmission:
+    def test_full_queue_rejected_and_drain_finishes_work(self):
+        async def scenario():
+            service = PipelineService(workers=1, queue_size=1, drain_timeout_s=5)
+            await service.start()
+            release = threading.Event()
+            running = service.submit([lambda: release.wait(5) and "first"])[0]
+            await asyncio.sleep(0.05)  # let the worker pick it up
+            queued = service.submit([lambda: "second"])[0]
+            with pytest.raises(Saturated):
+                service.submit([lambda: "third"])
+            with pytest.raises(Saturated):
+                service.submit([lambda: 1, lambda: 2])
+
+            stopping = asyncio.create_task(service.stop())
+            await asyncio.sleep(0.05)
+            with pytest.raises(Unavailable):
+                service.submit([lambda: "late"])
+            release.set()
+            await stopping
+            return await running, await queued
+
+        assert asyncio.run(scenario()) == ("first", "second")
+
+    def test_http_status_codes(self, tmp_profiles_json: Path, stub_llm):
+        app = create_app(workers=1, queue_size=1)
+        with TestClient(app) as c:
+            app.state.service.ready = False
+            resp = c.post("/v1/generate", json={"prompt": "hi"})
+            assert resp.status_code == 503
+            assert c.get("/readyz").status_code == 503
+            app.state.service.ready = True
+            resp = c.post("/v1/batch", json={"requests": [{"prompt": "a"}, {"prompt": "b"}]})
+            assert resp.status_code == 429
+            assert resp.headers["Retry-After"] == "1"
+
+    def test_requests_wait_for_warm_up(self, tmp_profiles_json: Path, stub_llm, monkeypatch: pytest.MonkeyPatch):
+        from email_assistant.src.server import app as server_app
+        from email_assistant.src.workflow.warmup import WarmupReport, WarmupStep
+
+        release = threading.Event()
+
+        def _slow_warm_up(connect: bool = True) -> WarmupReport:
+            release.wait(5)
+            return WarmupReport(steps=[WarmupStep("graphs", 0.5)], total_s=0.5)
+
+        monkeypatch.setattr(server_app, "run_warm_up", _slow_warm_up)
+        with TestClient(create_app(workers=1, queue_size=4, warmup=True)) as c:
+            resp = c.get("/readyz")
+            assert resp.status_code == 503 and resp.json()["error"] == "warming up"
+            threading.Timer(0.1, release.set).start()
+            # Admitted during warm-up, served once it finishes
+            assert c.post("/v1/generate", json={"prompt": "Say hi"}).status_code == 200
+            ready = c.get("/readyz").json()
+            assert ready["status"] == "ready" and ready["warmup"]["steps"][0]["name"] == "graphs"
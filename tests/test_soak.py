@@ -0,0 +1,36 @@
+"""Tests for the soak test's memory-growth detection."""
+
+from email_assistant.src.evaluation.soak import MemorySample, format_report, growth_per_request, rss_bytes, run_soak
+
+_leaked: list[bytes] = []
+
+
+def _leaky_target(user_id: str, prompt: str, tone: str):
+    _leaked.append(bytes(50_000))
+
+
+def _clean_target(user_id: str, prompt: str, tone: str):
+    bytes(50_000)
+
+
+class TestSoak:
+    def test_growth_is_slope_per_request(self):
+        samples = [MemorySample(0, n, 1000 + 300 * n, 0) for n in (10, 20, 40)]
+        assert round(growth_per_request(samples, "traced_bytes")) == 300
+        assert growth_per_request(samples[:1], "traced_bytes") == 0.0
+
+    def test_detects_a_leak_and_names_the_site(self):
+        report = run_soak(_leaky_target, duration_s=0.4, interval_s=0.1, warmup=1, users=1, max_bytes_per_request=10_000)
+        _leaked.clear()
+        assert not report["passed"]
+        assert report["traced_bytes_per_request"] > 40_000
+        assert "test_soak.py" in report["top_growth"][0]["site"]
+        assert "FAIL" in format_report(report)
+
+    def test_steady_state_passes(self):
+        report = run_soak(_clean_target, duration_s=0.4, interval_s=0.1, warmup=1, users=1, max_bytes_per_request=10_000)
+        assert report["passed"], report["failures"]
+        assert report["requests"] > 0 and len(report["samples"]) == 4
+
+    def test_rss_is_sampled(self):
+        assert rss_bytes() > 1_000_000
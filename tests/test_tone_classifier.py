@@ -0,0 +1,104 @@
+"""Unit tests for the local text/tone classifier and ReviewAgent's first-pass tone check."""
+
+import time
+from pathlib import Path
+
+import pytest
+
+from email_assistant.src.agents import review_agent
+from email_assistant.src.agents.review_agent import ReviewAgent
+from email_assistant.src.models.schemas import DraftResult, IntentType, ParsedInput, ToneType
+from email_assistant.src.nlp import tone_classifier
+from email_assistant.src.nlp.classifier import TextClassifier
+from email_assistant.src.nlp.tone_classifier import classify_tone, get_tone_classifier
+
+_FORMAL = "Dear Mr. Smith,\n\nI am writing to request the revised agreement at your earliest convenience. Thank you for your assistance.\n\nYours sincerely,"
+_CASUAL = "Hey! Quick one - can you send me the slides? Thanks a bunch, see ya"
+
+
+class TestTextClassifier:
+    def setup_method(self):
+        texts = ["great lovely thanks", "thanks so lovely", "deadline now immediately", "immediately need this now"]
+        labels = ["warm", "warm", "urgent", "urgent"]
+        self.model = TextClassifier.train(texts, labels)
+
+    def test_predicts_training_labels(self):
+        assert self.model.predict("lovely thanks")[0] == "warm"
+        assert self.model.predict("need it immediately")[0] == "urgent"
+
+    def test_probabilities_sum_to_one(self):
+        probs = self.model.predict_proba("completely unseen words")
+        assert set(probs) == {"warm", "urgent"}
+        assert sum(probs.values()) == pytest.approx(1.0)
+
+    def test_save_load_round_trip(self, tmp_path: Path):
+        path = tmp_path / "model.npz"
+        self.model.save(path)
+        loaded = TextClassifier.load(path)
+        assert loaded.predict_proba("lovely thanks") == pytest.approx(self.model.predict_proba("lovely thanks"))
+
+
+class TestToneClassifier:
+    def test_detects_clear_tones(self):
+        for text, tone in ((_FORMAL, "formal"), (_CASUAL, "casual")):
+            probs = classify_tone(text)
+            assert max(probs, key=probs.get) == tone
+            assert set(probs) == {t.value for t in ToneType}
+
+    def test_prediction_is_sub_millisecond(self):
+        model = get_tone_classifier()
+        model.predict_proba(_FORMAL)
+        start = time.perf_counter()
+        for _ in range(200):
+            model.predict_proba(_FORMAL)
+        assert (time.perf_counter() - start) / 200 < 1e-3
+
+    def test_missing_model_does_not_read_history(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        from email_assistant.src.memory import profile_store
+
+        monkeypatch.setattr(tone_classifier, "model_path", lambda: tmp_path / "missing.npz")
+        monkeypatch.setattr(profile_store, "iter_turn_records", lambda: pytest.fail("history read at load time"))
+        get_tone_classifier.cache_clear()
+        try:
+            probs = classify_tone(_FORMAL)
+            assert max(probs, key=probs.get) == "formal"
+        finally:
+            get_tone_classifier.cache_clear()
+
+
+class TestReviewToneCheck:
+    def setup_method(self):
+        self.agent = ReviewAgent()
+
+    def _state(self, requested: ToneType, body: str) -> dict:
+        parsed = ParsedInput(prompt="send the slides", tone=requested)
+        draft = DraftResult(subject="Slides", body=body, intent=IntentType.FOLLOW_UP, tone=requested)
+        return {"parsed_input": parsed, "draft": draft, "tone_context": f"Tone: {requested.value}"}
+
+    def test_confident_mismatch_fails_without_llm(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(review_agent, "get_llm", lambda **kw: pytest.fail("LLM called"))
+        monkeypatch.setattr(self.agent._tone_classifier, "predict_proba", lambda text: {"formal": 0.01, "casual": 0.97, "assertive": 0.01, "friendly": 0.005, "professional": 0.005})
+        result = self.agent.run(self._state(ToneType.FORMAL, _CASUAL))["review_result"]
+        assert not result.passed
+        assert "casual" in result.issues[0]
+
+    def test_confident_match_marks_tone_verified(self, monkeypatch: pytest.MonkeyPatch):
+        seen = {}
+
+        def _fake_invoke(llm, schema, template, **variables):
+            seen.update(variables)
+            return schema(passed=True)
+
+        monkeypatch.setattr(review_agent, "get_llm", lambda **kw: object())
+        monkeypatch.setattr(review_agent, "invoke_structured", _fake_invoke)
+        monkeypatch.setattr(self.agent._tone_classifier, "predict_proba", lambda text: {"formal": 0.9, "casual": 0.02, "assertive": 0.02, "friendly": 0.03, "professional": 0.03})
+        result = self.agent.run(self._state(ToneType.FORMAL, _FORMAL))["review_result"]
+        assert result.passed
+        assert "verified" in seen["expected_tone"]
+
+    def test_style_flags_fail_without_llm(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(review_agent, "get_llm", lambda **kw: pytest.fail("LLM called"))
+        state = self._state(ToneType.FORMAL, _FORMAL) | {"style_flags": ["per my last email"]}
+        result = self.agent.run(state)["review_result"]
+        assert not result.passed
+        assert "per my last email" in result.issues[0]
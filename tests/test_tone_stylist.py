@@ -1,7 +1,12 @@
 """Unit tests for ToneStylistAgent."""
 
+import builtins
+
+import pytest
+
 from email_assistant.src.agents.tone_stylist_agent import ToneStylistAgent
 from email_assistant.src.models.schemas import IntentType, ParsedInput, ToneType, Constraints
+from email_assistant.src.nlp.tone_library import ToneExample, ToneLibrary
 
 
 class TestToneStylistAgent:
@@ -46,3 +51,33 @@ class TestToneStylistAgent:
             parsed = ParsedInput(prompt="Test", tone=tone, constraints=Constraints())
             result = self.agent.run({"parsed_input": parsed, "intent": IntentType.OTHER})
             assert result["tone_context"] != ""
+
+    def test_does_not_read_files_per_request(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(builtins, "open", lambda *a, **k: pytest.fail("disk read during request"))
+        parsed = ParsedInput(prompt="Apologize for the late report", tone=ToneType.FORMAL, constraints=Constraints())
+        result = self.agent.run({"parsed_input": parsed, "intent": IntentType.APOLOGY})
+        assert "Examples of this tone" in result["tone_context"]
+
+
+class TestToneLibrary:
+    def setup_method(self):
+        self.library = ToneLibrary([
+            ToneExample(ToneType.CASUAL, IntentType.OTHER, "Who wants tacos for lunch on Friday?"),
+            ToneExample(ToneType.CASUAL, IntentType.APOLOGY, "Sorry I missed standup, train delays."),
+            ToneExample(ToneType.CASUAL, None, "Hey, just checking in on the invoice."),
+            ToneExample(ToneType.FORMAL, IntentType.APOLOGY, "Please accept my apologies for the delay."),
+        ])
+
+    def test_same_intent_ranked_first(self):
+        picked = self.library.select(ToneType.CASUAL, IntentType.APOLOGY, "lunch on friday", k=2)
+        assert picked[0].startswith("Sorry I missed standup")
+        assert picked[1].startswith("Who wants tacos")
+
+    def test_similarity_orders_without_intent_match(self):
+        picked = self.library.select(ToneType.CASUAL, IntentType.FOLLOW_UP, "chase the unpaid invoice", k=1)
+        assert picked == ["Hey, just checking in on the invoice."]
+
+    def test_only_requested_tone(self):
+        picked = self.library.select(ToneType.FORMAL, None, "anything", k=5)
+        assert picked == ["Please accept my apologies for the delay."]
+        assert self.library.select(ToneType.FRIENDLY, None, "anything") == []
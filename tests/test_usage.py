@@ -0,0 +1,125 @@
+"""Tests for per-user usage metering and budgets."""
+
+import contextvars
+from datetime import date
+from pathlib import Path
+
+import pytest
+from starlette.testclient import TestClient
+
+from email_assistant.src.integrations import config_loader
+from email_assistant.src.observability.metrics import get_metrics
+from email_assistant.src.observability.usage import (
+    BudgetExceededError,
+    UsageMeter,
+    budget_mode,
+    cost_usd,
+    current_user,
+    get_meter,
+    metered,
+    record_call,
+)
+from email_assistant.src.server.app import create_app
+from email_assistant.src.workflow.langgraph_flow import invoke, stream
+
+_CONFIG = """
+primary_model: gpt-4o-mini
+pricing:
+  gpt-4o-mini: {input: 0.15, cached_input: 0.075, output: 0.60}
+  small-model: {input: 0.05, output: 0.20}
+budgets:
+  daily_usd: 1.0
+  near_fraction: 0.5
+  economy_model: small-model
+  users:
+    vip: {daily_usd: null}
+"""
+
+
+@pytest.fixture
+def budget_config(tmp_path: Path, tmp_profiles_json: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path = tmp_path / "mcp.yaml"
+    path.write_text(_CONFIG)
+    monkeypatch.setattr(config_loader, "_config_path", lambda: path)
+    monkeypatch.setattr(config_loader, "_file_cache", None)
+    monkeypatch.setenv("PRIMARY_PROVIDER", "stub")
+    monkeypatch.setenv("STUB_LLM_LATENCY_MS", "0")
+    return path
+
+
+class TestMeter:
+    def test_cost_bills_cached_input_at_its_own_price(self, budget_config: Path):
+        assert cost_usd("gpt-4o-mini", 1_000_000, 1_000_000) == pytest.approx(0.75)
+        assert cost_usd("gpt-4o-mini", 1_000_000, 0, cached_tokens=500_000) == pytest.approx(0.1125)
+        assert cost_usd("unpriced", 10, 10) is None
+
+    def test_aggregates_per_day_user_node_and_model(self, tmp_path: Path):
+        meter = UsageMeter(tmp_path / "usage.sqlite3")
+        today, earlier = date(2026, 3, 15), date(2026, 3, 2)
+        meter.record("ann", "draft_writer", "m", 100, 50, cost_usd=0.5, day=today)
+        meter.record("ann", "draft_writer", "m", 100, 50, cost_usd=0.25, day=today)
+        meter.record("ann", "review", "m", 10, 5, cost_usd=0.1, day=earlier)
+        meter.record("bob", "review", "m", 10, 5, cost_usd=2.0, day=today)
+
+        assert meter.spent("ann", "day", today) == pytest.approx(0.75)
+        assert meter.spent("ann", "month", today) == pytest.approx(0.85)
+        assert meter.spent("ann", "month", date(2026, 4, 1)) == 0
+        (row,) = meter.report("ann", "day", today)
+        assert row["calls"] == 2 and row["input_tokens"] == 200 and row["cost_usd"] == pytest.approx(0.75)
+        assert [r["user_id"] for r in meter.report(None, "month", today)] == ["bob", "ann", "ann"]
+        meter.close()
+
+    def test_calls_outside_a_metered_request_are_not_attributed(self, budget_config: Path):
+        record_call("review", "gpt-4o-mini", 100, 10)
+        assert get_meter().report() == []
+
+
+class TestBudgets:
+    def test_pipeline_calls_recorded_per_node(self, budget_config: Path):
+        invoke(raw_prompt="Ask Bob for the Q3 report", user_tone="formal", user_id="ann")
+        rows = get_meter().report("ann")
+        assert {r["model"] for r in rows} == {"gpt-4o-mini"}
+        assert "draft_writer" in {r["node"] for r in rows}
+        spent = get_meter().spent("ann")
+        assert spent > 0 and spent == pytest.approx(sum(r["cost_usd"] for r in rows))
+
+    def test_near_budget_uses_economy_model_and_skips_review(self, budget_config: Path):
+        get_meter().record("ann", "draft_writer", "gpt-4o-mini", cost_usd=0.6)
+        assert budget_mode("ann") == "economy"
+        skipped = get_metrics().counters().get("review.skipped_economy", 0)
+
+        state = invoke(raw_prompt="Ask Bob for the Q3 report", user_tone="formal", user_id="ann")
+
+        assert state["review_result"].passed
+        assert get_metrics().counters()["review.skipped_economy"] == skipped + 1
+        new_rows = [r for r in get_meter().report("ann") if r["model"] == "small-model"]
+        assert new_rows and "review" not in {r["node"] for r in new_rows}
+
+    def test_over_budget_is_rejected_before_any_call(self, budget_config: Path):
+        get_meter().record("ann", "draft_writer", "gpt-4o-mini", cost_usd=1.0)
+        with pytest.raises(BudgetExceededError, match="daily budget"):
+            invoke(raw_prompt="Ask Bob for the Q3 report", user_id="ann")
+        assert len(get_meter().report("ann")) == 1
+
+        get_meter().record("vip", "draft_writer", "gpt-4o-mini", cost_usd=5.0)
+        with metered("vip") as mode:
+            assert mode == "normal"
+
+    def test_stream_meters_only_while_the_graph_runs(self, budget_config: Path):
+        events = stream(raw_prompt="Ask Bob for the Q3 report", user_tone="formal", user_id="ann")
+        next(events)
+        # Between events the consumer's own calls are not billed to the user
+        assert current_user() is None
+        record_call("review", "gpt-4o-mini", 1_000_000, 0)
+        assert get_meter().report("ann") == []
+        # Closing the stream from another context must not trip over the scope
+        contextvars.copy_context().run(events.close)
+
+        list(stream(raw_prompt="Ask Bob for the Q3 report", user_tone="formal", user_id="ann"))
+        assert "draft_writer" in {r["node"] for r in get_meter().report("ann")}
+
+    def test_server_answers_402(self, budget_config: Path):
+        get_meter().record("ann", "draft_writer", "gpt-4o-mini", cost_usd=1.0)
+        with TestClient(create_app(workers=1, queue_size=4)) as client:
+            resp = client.post("/v1/generate", json={"prompt": "Say hi", "user_id": "ann"})
+        assert resp.status_code == 402 and "budget" in resp.json()["error"]
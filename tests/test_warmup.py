@@ -0,0 +1,60 @@
+"""Tests for the startup warm-up routine."""
+
+from pathlib import Path
+
+import pytest
+
+from email_assistant.src.cli import main
+from email_assistant.src.workflow import warmup
+from email_assistant.src.workflow.warmup import open_connection, warm_up
+
+
+class _Models:
+    def __init__(self, fail: bool = False) -> None:
+        self.calls = 0
+        self.fail = fail
+
+    def list(self) -> list:
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("unreachable")
+        return []
+
+
+class _SDK:
+    def __init__(self, fail: bool = False) -> None:
+        self.models = _Models(fail)
+
+
+class _ChatModel:
+    def __init__(self, fail: bool = False) -> None:
+        self.root_client = _SDK(fail)
+
+
+@pytest.fixture
+def stub_llm(tmp_profiles_json: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("PRIMARY_PROVIDER", "stub")
+
+
+class TestWarmUp:
+    def test_all_steps_timed_with_stub_provider(self, stub_llm):
+        report = warm_up()
+        assert [s.name for s in report.steps] == ["config", "graphs", "local_models", "stores", "llm_clients", "connections"]
+        assert report.ok and all(s.duration_s >= 0 for s in report.steps)
+        assert report.total_s >= sum(s.duration_s for s in report.steps) - 0.01
+        assert warm_up(connect=False).steps[-1].name == "llm_clients"
+
+    def test_open_connection_lists_models_once(self):
+        llm = _ChatModel()
+        assert open_connection(llm) and llm.root_client.models.calls == 1
+        assert not open_connection(object())
+
+    def test_failed_step_is_reported_not_raised(self, stub_llm, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(warmup, "_clients", lambda clients: lambda: clients.append(_ChatModel(fail=True)) or "1 client(s)")
+        report = warm_up()
+        step = report.steps[-1]
+        assert not report.ok and step.name == "connections" and "ConnectionError" in step.detail
+
+    def test_cli_exit_code(self, stub_llm, capsys: pytest.CaptureFixture):
+        assert main(["warmup", "--no-connect"]) == 0
+        assert "llm_clients" in capsys.readouterr().out
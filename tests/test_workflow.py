@@ -0,0 +1,94 @@
+"""Tests for the LangGraph workflow's streaming API and config/client caching."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from email_assistant.src.agents import draft_writer_agent, input_parser_agent, intent_detection_agent, review_agent
+from email_assistant.src.integrations import config_loader
+from email_assistant.src.workflow.langgraph_flow import invoke_variants, save_variant, stream
+
+
+class _FailingLLM:
+    def with_structured_output(self, schema, **kwargs):
+        return self
+
+    def invoke(self, prompt):
+        raise RuntimeError("no LLM in tests")
+
+
+@pytest.fixture
+def offline_agents(monkeypatch: pytest.MonkeyPatch):
+    for module in (input_parser_agent, intent_detection_agent, draft_writer_agent, review_agent):
+        monkeypatch.setattr(module, "get_llm", lambda **kw: _FailingLLM())
+
+
+def test_stream_reports_each_node(tmp_profiles_json: Path, offline_agents):
+    events = list(stream(raw_prompt="Apologize for missing the meeting", user_tone="formal", user_id="s1"))
+    finished = [e.node for e in events if e.status == "finished"]
+    assert finished == ["input_parser", "intent_detection", "tone_stylist", "draft_writer", "personalization", "review", "router"]
+    assert all(e.elapsed_s >= 0 for e in events if e.status == "finished")
+    assert events[-1].status == "done"
+    assert events[-1].state["draft"].subject == "(Error)"
+
+
+def test_invoke_without_remember_records_no_turn(tmp_profiles_json: Path, offline_agents):
+    from email_assistant.src.memory.profile_store import load_profile
+    from email_assistant.src.workflow.langgraph_flow import invoke
+
+    invoke(raw_prompt="Invite {{name}} to the webinar", user_id="c1", remember=False)
+    assert load_profile("c1") is None
+    invoke(raw_prompt="Invite Ada to the webinar", user_id="c1")
+    assert len(load_profile("c1").conversation_history) == 1
+
+
+def test_config_file_parsed_once_until_modified(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    path = tmp_path / "mcp.yaml"
+    path.write_text("max_retries: 5\n")
+    monkeypatch.setattr(config_loader, "_config_path", lambda: path)
+    monkeypatch.setattr(config_loader, "_file_cache", None)
+    assert config_loader.load_mcp_config()["max_retries"] == 5
+
+    loads = []
+    real_load = config_loader.yaml.safe_load
+    monkeypatch.setattr(config_loader.yaml, "safe_load", lambda f: loads.append(1) or real_load(f))
+    config_loader.load_mcp_config()
+    assert loads == []
+
+    path.write_text("max_retries: 1\n")
+    os.utime(path, ns=(path.stat().st_mtime_ns + 10**9,) * 2)
+    assert config_loader.load_mcp_config()["max_retries"] == 1
+    assert loads == [1]
+
+
+def test_variants_share_parse_and_follow_tone_order(tmp_profiles_json: Path, offline_agents, monkeypatch: pytest.MonkeyPatch):
+    from email_assistant.src.memory.profile_store import load_profile
+    from email_assistant.src.workflow import langgraph_flow
+
+    parse_calls = []
+    real_run = langgraph_flow._input_parser.run
+    monkeypatch.setattr(langgraph_flow._input_parser, "run", lambda state: parse_calls.append(1) or real_run(state))
+
+    state = invoke_variants(raw_prompt="Ask for the bug specification", tones=["professional", "friendly", "casual"], user_id="v1")
+    assert parse_calls == [1]
+    assert [d.tone.value for d in state["variants"]] == ["professional", "friendly", "casual"]
+    assert load_profile("v1") is None
+
+    save_variant(state, state["variants"][1])
+    assert load_profile("v1").conversation_history[-1].tone == "friendly"
+
+
+def test_variants_reject_unknown_tones_before_running(tmp_profiles_json: Path, offline_agents, monkeypatch: pytest.MonkeyPatch):
+    from email_assistant.src.workflow import langgraph_flow
+
+    monkeypatch.setattr(langgraph_flow._input_parser, "run", lambda state: pytest.fail("graph started"))
+    with pytest.raises(ValueError, match="sarcastic"):
+        invoke_variants(raw_prompt="Ask for the spec", tones=["formal", "sarcastic"], user_id="v3")
+    with pytest.raises(ValueError):
+        invoke_variants(raw_prompt="Ask for the spec", tones=[], user_id="v3")
+
+
+def test_variants_of_an_empty_prompt_do_not_raise(tmp_profiles_json: Path, offline_agents):
+    state = invoke_variants(raw_prompt="", tones=["formal", "casual"], user_id="v2")
+    assert state["variants"] and all(d.tone is None for d in state["variants"])